@@ -0,0 +1,98 @@
+"""BearerAuthMiddleware の1リクエストあたりのオーバーヘッドを測る
+
+    uv run python -m benchmarks.bench_auth [リクエスト数]
+
+ミドルウェアなし・旧実装（BaseHTTPMiddleware）・現在の純粋な ASGI 実装で、
+最小限の ASGI アプリへの認証済みリクエストを直接呼び出して比較する。
+"""
+
+import asyncio
+import hmac
+import sys
+import time
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from src.auth import BearerAuthMiddleware
+
+TOKEN = "benchmark-token"
+
+
+class LegacyBearerAuthMiddleware(BaseHTTPMiddleware):
+    """置き換え前の実装（比較用）"""
+
+    def __init__(self, app, token: str):
+        super().__init__(app)
+        self.token = token
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path == "/health":
+            return await call_next(request)
+        auth = request.headers.get("authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {self.token}"):
+            return JSONResponse({"error": "Unauthorized"}, status_code=401)
+        return await call_next(request)
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "POST",
+    "scheme": "http",
+    "path": "/mcp",
+    "raw_path": b"/mcp",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [
+        (b"host", b"localhost"),
+        (b"content-type", b"application/json"),
+        (b"authorization", f"Bearer {TOKEN}".encode()),
+    ],
+    "client": ("127.0.0.1", 12345),
+    "server": ("localhost", 8080),
+}
+
+
+async def receive():
+    return {"type": "http.request", "body": b"{}", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def measure(app, n: int) -> float:
+    """1リクエストあたりの平均時間（マイクロ秒）"""
+    for _ in range(min(n, 1000)):  # ウォームアップ
+        await app(dict(SCOPE), receive, send)
+    started = time.perf_counter()
+    for _ in range(n):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - started) / n * 1e6
+
+
+async def main(n: int) -> None:
+    baseline = await measure(endpoint, n)
+    cases = {
+        "BaseHTTPMiddleware (before)": LegacyBearerAuthMiddleware(endpoint, token=TOKEN),
+        "pure ASGI, 1 token": BearerAuthMiddleware(endpoint, token=TOKEN),
+        "pure ASGI, 3 tokens": BearerAuthMiddleware(
+            endpoint, tokens={"a": "token-a", "b": "token-b", "c": TOKEN}
+        ),
+    }
+    print(f"{'no middleware':30s} {baseline:8.2f} us/request")
+    for name, app in cases.items():
+        total = await measure(app, n)
+        print(f"{name:30s} {total:8.2f} us/request  (+{total - baseline:.2f} us)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,63 @@
+"""load_access_token の1回あたりの時間を、トークンキャッシュの有無で比べる
+
+    uv run python -m benchmarks.bench_token_cache [呼び出し回数]
+
+インメモリと SQLite の保存先それぞれで、発行済みのアクセストークンを繰り返し検証する。
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp.server.auth.provider import AuthorizationParams
+from mcp.shared.auth import OAuthClientInformationFull
+from pydantic import AnyUrl
+
+from src.oauth_provider import InMemoryOAuthProvider
+from src.oauth_storage import MemoryOAuthStorage, SqliteOAuthStorage
+
+CLIENT = OAuthClientInformationFull(
+    client_id="bench",
+    redirect_uris=[AnyUrl("http://localhost/cb")],
+    token_endpoint_auth_method="none",
+)
+PARAMS = AuthorizationParams(
+    state=None,
+    scopes=[],
+    code_challenge="x",
+    redirect_uri=AnyUrl("http://localhost/cb"),
+    redirect_uri_provided_explicitly=True,
+)
+
+
+async def measure(provider: InMemoryOAuthProvider, n: int) -> float:
+    """1回あたりの平均時間（マイクロ秒）"""
+    await provider.register_client(CLIENT)
+    redirect_url = await provider.authorize(CLIENT, PARAMS)
+    code = redirect_url.split("code=")[1].split("&")[0]
+    ac = await provider.load_authorization_code(CLIENT, code)
+    token = (await provider.exchange_authorization_code(CLIENT, ac)).access_token
+    for _ in range(min(n, 100)):  # ウォームアップ
+        await provider.load_access_token(token)
+    started = time.perf_counter()
+    for _ in range(n):
+        assert await provider.load_access_token(token) is not None
+    return (time.perf_counter() - started) / n * 1e6
+
+
+async def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        storages = {
+            "memory": lambda: MemoryOAuthStorage(),
+            "sqlite": lambda: SqliteOAuthStorage(str(Path(tmp) / f"{time.time_ns()}.db")),
+        }
+        for name, make in storages.items():
+            uncached = await measure(InMemoryOAuthProvider(storage=make(), token_cache_size=0), n)
+            cached = await measure(InMemoryOAuthProvider(storage=make()), n)
+            print(f"{name:8s} no cache {uncached:8.2f} us/call   cache {cached:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -1,22 +1,53 @@
 import hmac
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from src.services.metrics import AUTH_REQUESTS
 
-class BearerAuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, token: str):
-        super().__init__(app)
-        self.token = token
+# 認証なしで通すパス
+PUBLIC_PATHS = frozenset({"/health"})
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path == "/health":
-            return await call_next(request)
 
-        auth = request.headers.get("authorization", "")
-        if not hmac.compare_digest(auth, f"Bearer {self.token}"):
-            return JSONResponse(
-                {"error": "Unauthorized"}, status_code=401
-            )
-        return await call_next(request)
+class BearerAuthMiddleware:
+    """静的 Bearer Token 認証（純粋な ASGI ミドルウェア）
+
+    `tokens` はラベル → トークン。ローテーション中は新旧のトークンを両方登録しておき、
+    どのトークンで認証されたかをラベルでメトリクスに記録する。照合はすべてのトークンと
+    定数時間で行い、一致した位置や件数がタイミングに出ないようにする。
+    """
+
+    def __init__(
+        self, app: ASGIApp, token: str | None = None, tokens: dict[str, str] | None = None
+    ):
+        self.app = app
+        tokens = {**(tokens or {}), **({"default": token} if token else {})}
+        if not tokens:
+            raise ValueError("BearerAuthMiddleware requires at least one token")
+        self._expected = [(label, f"Bearer {t}".encode()) for label, t in tokens.items()]
+
+    def _match(self, header: bytes) -> str | None:
+        matched = None
+        for label, expected in self._expected:
+            if hmac.compare_digest(header, expected) and matched is None:
+                matched = label
+        return matched
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in PUBLIC_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        header = b""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                header = value
+                break
+        label = self._match(header)
+        if label is None:
+            AUTH_REQUESTS.inc(token="", outcome="rejected")
+            response = JSONResponse({"error": "Unauthorized"}, status_code=401)
+            await response(scope, receive, send)
+            return
+        AUTH_REQUESTS.inc(token=label, outcome="ok")
+        await self.app(scope, receive, send)
@@ -5,8 +5,33 @@ class Settings(BaseSettings):
     printify_api_key: str
     printify_shop_id: str | None = None
     mcp_auth_token: str | None = None
+    # ラベル付きの追加トークン（JSON: {"laptop": "...", "ci": "..."}）。ローテーション時は新旧を併記
+    mcp_auth_tokens: dict[str, str] = {}
     oauth_issuer_url: str | None = None  # OAuth有効化: サーバーの公開URL（例: https://xxx.run.app）
+    oauth_store: str = "memory"  # OAuth トークンの保存先: memory / sqlite（DATA_DIR）/ redis
+    redis_url: str | None = None  # redis を使う場合の接続先（例: redis://localhost:6379/0）
     port: int = 8080
+    workers: int = 1  # uvicorn のワーカープロセス数（2以上では SHARED_STORE が必須）
+    # ワーカー間で共有する状態（レート制限・キャッシュの無効化・ジョブのリース）の保存先:
+    # sqlite（DATA_DIR）/ redis（REDIS_URL）
+    shared_store: str | None = None
     transport: str = "streamable-http"
+    # Printify API クライアントのコネクションプールとタイムアウト（秒）
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 10.0
+    http_read_timeout: float = 30.0
+    http_write_timeout: float = 30.0
+    http_pool_timeout: float = 10.0  # プールの空きを待つ上限
+    http2: bool = False  # HTTP/2 多重化（http2 extra が必要）
+    shop_cache_ttl: float = 600.0  # ショップ一覧のキャッシュ期間（秒）
+    data_dir: str | None = None  # ローカルインデックス等の保存先（未設定ならインメモリ）
+    catalog_index_interval: float = 60.0  # カタログインデックス更新間隔（秒）
+    catalog_index_batch_size: int = 5  # 1回の更新で索引するブループリント数
+    order_sync_interval: float = 300.0  # 注文ミラーの同期間隔（秒、デフォルトショップのみ）
+    product_sync_interval: float = 600.0  # 商品ミラーの同期間隔（秒、デフォルトショップのみ）
+    upload_dir: str | None = None  # upload_image の path で読み込めるステージングディレクトリ
+    otel_exporter: str | None = None  # トレースの送信先: "otlp" / "console"（otel extra が必要）
 
     model_config = {"env_file": ".env", "extra": "ignore"}
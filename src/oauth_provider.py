@@ -2,6 +2,11 @@
 
 Claude Web/Mobile が MCP SDK の OAuth フローで接続できるようにする。
 同時に、既存の静的 Bearer Token 認証（Claude Code / TypingMind）も維持する。
+
+保存先は `src.oauth_storage` のバックエンドで差し替えられる（デフォルトはインメモリ）。
+期限切れの認可コード・トークンは `sweep()`（サーバーではバックグラウンドジョブ）で
+削除する。DCR は認証なしで呼べるため、クライアント数とクライアントごとの発行数に
+上限を設け、超えた分は古いものから捨てる（上限は保存先が持つ）。
 """
 
 import hashlib
@@ -17,14 +22,27 @@ from mcp.server.auth.provider import (
     AuthorizationParams,
     OAuthAuthorizationServerProvider,
     RefreshToken,
+    TokenError,
 )
 from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
 
+from src.oauth_storage import Grant, MemoryOAuthStorage, OAuthStorage
+from src.services.cache import TTLCache
+from src.services.metrics import Snapshot
+
 logger = logging.getLogger(__name__)
 
 TOKEN_TTL = 3600  # 1時間
 REFRESH_TOKEN_TTL = 86400 * 30  # 30日
 AUTH_CODE_TTL = 600  # 10分
+SWEEP_INTERVAL = 60.0  # 秒
+# load_access_token の前に置く LRU（キーはトークンの `_hash`）。保存先が共有されている場合、
+# 他のプロセスでの失効はこの秒数以内に反映される
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_TTL = 30.0  # 秒
+
+# 保存する値から取り除く生の値（キーは `_hash` したもの）
+_SECRET_FIELDS = {"auth_codes": "code", "access_tokens": "token", "refresh_tokens": "token"}
 
 
 def _hash(value: str) -> str:
@@ -47,28 +65,96 @@ class InMemoryOAuthProvider(
 ):
     """インメモリ OAuth プロバイダー
 
-    - DB不要（個人利用、インスタンス再起動でトークン無効化）
+    - DB不要（個人利用、インスタンス再起動でトークン無効化）。`storage` に SQLite / Redis の
+      保存先を渡すと、再起動後や複数プロセス間でもトークンを共有できる
     - 同意画面なし（authorize で即座にリダイレクト）
     - 静的 Bearer Token もフォールバックとして受け付ける
     """
 
-    def __init__(self, static_bearer_token: str | None = None):
-        self._clients: dict[str, OAuthClientInformationFull] = {}
-        self._auth_codes: dict[str, AuthorizationCode] = {}
-        self._access_tokens: dict[str, AccessToken] = {}
-        self._refresh_tokens: dict[str, RefreshToken] = {}
+    def __init__(
+        self,
+        static_bearer_token: str | None = None,
+        storage: OAuthStorage | None = None,
+        token_cache_size: int = TOKEN_CACHE_SIZE,
+    ):
+        self.storage = storage or MemoryOAuthStorage()
         self._static_bearer_token = static_bearer_token
+        self._last_stats: dict | None = None  # sweep() 時点の件数（/metrics 用）
+        # トークンの `_hash` → AccessToken（保存先にない場合は None）
+        self.token_cache = TTLCache(maxsize=token_cache_size)
+
+    async def _put(self, kind: str, secret: str, grant: Grant) -> None:
+        stored = grant.model_copy(update={_SECRET_FIELDS[kind]: ""})
+        if await self.storage.put_grant(kind, _hash(secret), stored):
+            logger.warning(f"OAuth grant limit reached for client {grant.client_id}")
+            if kind == "access_tokens":
+                # 上限で捨てられたトークンがキャッシュに残らないようにする
+                self.token_cache.clear()
+
+    def _restore(self, kind: str, secret: str, grant: Grant | None) -> Grant | None:
+        if grant is None:
+            return None
+        return grant.model_copy(update={_SECRET_FIELDS[kind]: secret})
+
+    async def _get(self, kind: str, secret: str) -> Grant | None:
+        return self._restore(kind, secret, await self.storage.get_grant(kind, _hash(secret)))
+
+    async def _pop(self, kind: str, secret: str) -> Grant | None:
+        return self._restore(kind, secret, await self.storage.pop_grant(kind, _hash(secret)))
+
+    async def sweep(self, now: float | None = None) -> int:
+        """期限切れの認可コード・トークンを削除し、削除した件数を返す"""
+        removed = await self.storage.sweep(time.time() if now is None else now)
+        if removed:
+            logger.info(f"Swept {removed} expired OAuth grants")
+        self._last_stats = await self.storage.stats()
+        return removed
+
+    async def stats(self) -> dict:
+        """保持件数とおおよそのメモリ使用量（バイト）"""
+        return await self.storage.stats()
+
+    def metrics(self) -> list[Snapshot]:
+        """`/metrics` 用の保持件数とメモリ使用量（最後の `sweep()` 時点）とトークンキャッシュ"""
+        cache = self.token_cache.stats()
+        snapshots = [
+            Snapshot(
+                "counter",
+                "oauth_token_cache_lookups_total",
+                "Access token cache lookups by result",
+                [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])],
+            ),
+        ]
+        if self._last_stats is None:
+            return snapshots
+        stats = self._last_stats
+        return snapshots + [
+            Snapshot(
+                "gauge",
+                "oauth_entries",
+                "OAuth clients, authorization codes and tokens held in storage",
+                [({"kind": k}, v) for k, v in stats.items() if k != "bytes"],
+            ),
+            Snapshot(
+                "gauge",
+                "oauth_grant_bytes",
+                "Approximate size of stored OAuth codes and tokens",
+                [({}, stats["bytes"])],
+            ),
+        ]
 
     # --- Client Registration (DCR) ---
 
     async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
-        return self._clients.get(client_id)
+        return await self.storage.get_client(client_id)
 
     async def register_client(self, client_info: OAuthClientInformationFull) -> None:
         if not client_info.client_id:
             client_info.client_id = str(uuid.uuid4())
         client_info.client_id_issued_at = int(time.time())
-        self._clients[client_info.client_id] = client_info
+        for evicted in await self.storage.put_client(client_info):
+            logger.warning(f"OAuth client limit reached, evicted {evicted}")
+            self.token_cache.clear()
         logger.info(f"OAuth client registered: {client_info.client_id}")
 
     # --- Authorization ---
@@ -80,15 +166,19 @@ class InMemoryOAuthProvider(
     ) -> str:
         """同意画面なしで即座に認可コードを発行しリダイレクト"""
         code = secrets.token_urlsafe(32)
-        self._auth_codes[_hash(code)] = AuthorizationCode(
-            code=code,
-            scopes=params.scopes or [],
-            expires_at=time.time() + AUTH_CODE_TTL,
-            client_id=client.client_id,
-            code_challenge=params.code_challenge,
-            redirect_uri=params.redirect_uri,
-            redirect_uri_provided_explicitly=params.redirect_uri_provided_explicitly,
-            resource=params.resource,
+        await self._put(
+            "auth_codes",
+            code,
+            AuthorizationCode(
+                code=code,
+                scopes=params.scopes or [],
+                expires_at=time.time() + AUTH_CODE_TTL,
+                client_id=client.client_id,
+                code_challenge=params.code_challenge,
+                redirect_uri=params.redirect_uri,
+                redirect_uri_provided_explicitly=params.redirect_uri_provided_explicitly,
+                resource=params.resource,
+            ),
         )
         logger.info(f"Auth code issued for client {client.client_id}")
         return _construct_redirect_uri(
@@ -102,13 +192,13 @@ class InMemoryOAuthProvider(
         client: OAuthClientInformationFull,
         authorization_code: str,
     ) -> AuthorizationCode | None:
-        ac = self._auth_codes.get(_hash(authorization_code))
+        ac = await self._get("auth_codes", authorization_code)
         if ac is None:
             return None
         if ac.client_id != client.client_id:
             return None
         if time.time() > ac.expires_at:
-            self._auth_codes.pop(_hash(authorization_code), None)
+            await self._pop("auth_codes", authorization_code)
             return None
         return ac
 
@@ -119,25 +209,34 @@ class InMemoryOAuthProvider(
         client: OAuthClientInformationFull,
         authorization_code: AuthorizationCode,
     ) -> OAuthToken:
-        # 認可コード消費（ワンタイム）
-        self._auth_codes.pop(_hash(authorization_code.code), None)
+        # 認可コード消費（ワンタイム。複数プロセスで同時に交換された場合は1つだけ通す）
+        if await self._pop("auth_codes", authorization_code.code) is None:
+            raise TokenError("invalid_grant", "authorization code was already used")
 
         access_token = secrets.token_urlsafe(32)
         refresh_token = secrets.token_urlsafe(32)
         now = int(time.time())
 
-        self._access_tokens[_hash(access_token)] = AccessToken(
-            token=access_token,
-            client_id=client.client_id,
-            scopes=authorization_code.scopes,
-            expires_at=now + TOKEN_TTL,
-            resource=authorization_code.resource,
+        await self._put(
+            "access_tokens",
+            access_token,
+            AccessToken(
+                token=access_token,
+                client_id=client.client_id,
+                scopes=authorization_code.scopes,
+                expires_at=now + TOKEN_TTL,
+                resource=authorization_code.resource,
+            ),
         )
-        self._refresh_tokens[_hash(refresh_token)] = RefreshToken(
-            token=refresh_token,
-            client_id=client.client_id,
-            scopes=authorization_code.scopes,
-            expires_at=now + REFRESH_TOKEN_TTL,
+        await self._put(
+            "refresh_tokens",
+            refresh_token,
+            RefreshToken(
+                token=refresh_token,
+                client_id=client.client_id,
+                scopes=authorization_code.scopes,
+                expires_at=now + REFRESH_TOKEN_TTL,
+            ),
         )
 
         logger.info(f"Tokens issued for client {client.client_id}")
@@ -154,13 +253,13 @@ class InMemoryOAuthProvider(
         client: OAuthClientInformationFull,
         refresh_token: str,
     ) -> RefreshToken | None:
-        rt = self._refresh_tokens.get(_hash(refresh_token))
+        rt = await self._get("refresh_tokens", refresh_token)
         if rt is None:
             return None
         if rt.client_id != client.client_id:
             return None
         if rt.expires_at and time.time() > rt.expires_at:
-            self._refresh_tokens.pop(_hash(refresh_token), None)
+            await self._pop("refresh_tokens", refresh_token)
             return None
         return rt
 
@@ -170,8 +269,12 @@ class InMemoryOAuthProvider(
         refresh_token: RefreshToken,
         scopes: list[str],
     ) -> OAuthToken:
-        # 古いトークンを無効化
-        self._refresh_tokens.pop(_hash(refresh_token.token), None)
+        # 古いトークンを無効化（同時に使われた場合は1つだけ通す）
+        if await self._pop("refresh_tokens", refresh_token.token) is None:
+            raise TokenError("invalid_grant", "refresh token was already used")
+        # キャッシュのエントリはどのリフレッシュトークンから発行されたかを持たないので、
+        # ローテーション（クライアントごとに1時間に1回程度）のたびに全体を捨てる
+        self.token_cache.clear()
 
         # 新しいトークンを発行（トークンローテーション）
         new_access = secrets.token_urlsafe(32)
@@ -179,17 +282,25 @@ class InMemoryOAuthProvider(
         now = int(time.time())
         effective_scopes = scopes if scopes else refresh_token.scopes
 
-        self._access_tokens[_hash(new_access)] = AccessToken(
-            token=new_access,
-            client_id=client.client_id,
-            scopes=effective_scopes,
-            expires_at=now + TOKEN_TTL,
+        await self._put(
+            "access_tokens",
+            new_access,
+            AccessToken(
+                token=new_access,
+                client_id=client.client_id,
+                scopes=effective_scopes,
+                expires_at=now + TOKEN_TTL,
+            ),
         )
-        self._refresh_tokens[_hash(new_refresh)] = RefreshToken(
-            token=new_refresh,
-            client_id=client.client_id,
-            scopes=effective_scopes,
-            expires_at=now + REFRESH_TOKEN_TTL,
+        await self._put(
+            "refresh_tokens",
+            new_refresh,
+            RefreshToken(
+                token=new_refresh,
+                client_id=client.client_id,
+                scopes=effective_scopes,
+                expires_at=now + REFRESH_TOKEN_TTL,
+            ),
         )
 
         return OAuthToken(
@@ -208,11 +319,15 @@ class InMemoryOAuthProvider(
         1. OAuthで発行されたアクセストークンを検索
         2. 見つからなければ静的Bearer Token（MCP_AUTH_TOKEN）と照合
         """
-        # OAuth トークン検証
-        at = self._access_tokens.get(_hash(token))
+        # OAuth トークン検証（直近の結果は保存先を読まずに返す）
+        fingerprint = _hash(token)
+        at = await self.token_cache.get_or_fill(
+            fingerprint, TOKEN_CACHE_TTL, lambda: self._get("access_tokens", token)
+        )
         if at is not None:
             if at.expires_at and time.time() > at.expires_at:
-                self._access_tokens.pop(_hash(token), None)
+                self.token_cache.delete(fingerprint)
+                await self._pop("access_tokens", token)
                 return None
             return at
 
@@ -236,6 +351,9 @@ class InMemoryOAuthProvider(
         token: AccessToken | RefreshToken,
     ) -> None:
         if isinstance(token, AccessToken):
-            self._access_tokens.pop(_hash(token.token), None)
+            # 保存先から消してからキャッシュを無効化する（逆順だと、間に始まった読み込みが
+            # 失効前の値をキャッシュし得る）
+            await self._pop("access_tokens", token.token)
+            self.token_cache.delete(_hash(token.token))
         elif isinstance(token, RefreshToken):
-            self._refresh_tokens.pop(_hash(token.token), None)
+            await self._pop("refresh_tokens", token.token)
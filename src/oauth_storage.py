@@ -0,0 +1,447 @@
+"""OAuth のクライアント・認可コード・トークンの保存先
+
+`OAuthStorage` を実装したバックエンドを `InMemoryOAuthProvider(storage=...)` に渡す。
+
+- `MemoryOAuthStorage`: プロセス内（デフォルト。再起動でトークンは無効になる）
+- `SqliteOAuthStorage`: `DATA_DIR` 下の SQLite（再起動後もトークンが残る）
+- `RedisOAuthStorage`: Redis（複数プロセス・複数インスタンスで共有する。`redis` extra が必要）
+
+認可コード・トークンのキーはプロバイダーが `_hash` したもので、保存する値からも
+生のコード・トークンは取り除かれている（プロバイダーが読み込み時に戻す）。
+どのバックエンドもクライアント数とクライアントごとの発行数に上限を持ち、
+超えた分は最近使われていないクライアント・古い発行分から捨てる。
+"""
+
+import heapq
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from mcp.shared.auth import OAuthClientInformationFull
+
+from src.services.store import MEMORY, SqliteStore, store_path
+
+MAX_CLIENTS = 1000
+MAX_GRANTS_PER_CLIENT = 50  # 認可コード・アクセストークン・リフレッシュトークンそれぞれ
+BACKENDS = ("memory", "sqlite", "redis")
+
+Grant = AuthorizationCode | AccessToken | RefreshToken
+
+# 種類ごとのモデル
+KINDS: dict[str, type[Grant]] = {
+    "auth_codes": AuthorizationCode,
+    "access_tokens": AccessToken,
+    "refresh_tokens": RefreshToken,
+}
+
+
+def _size(key: str, record: str) -> int:
+    return len(key) + len(record)
+
+
+class OAuthStorage(ABC):
+    """保存先のインターフェース（`kind` は `KINDS` のキー）"""
+
+    @abstractmethod
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        """クライアントを返し、最近使われたものとして記録する"""
+
+    @abstractmethod
+    async def put_client(self, client: OAuthClientInformationFull) -> list[str]:
+        """保存し、上限を超えて捨てたクライアント（発行分も削除済み）の ID を返す"""
+
+    @abstractmethod
+    async def get_grant(self, kind: str, key: str) -> Grant | None:
+        """保存されていなければ None"""
+
+    @abstractmethod
+    async def put_grant(self, kind: str, key: str, grant: Grant) -> int:
+        """保存し、クライアントごとの上限を超えて捨てた件数を返す"""
+
+    @abstractmethod
+    async def pop_grant(self, kind: str, key: str) -> Grant | None:
+        """削除して返す。同じキーを同時に pop しても値を受け取るのは1つだけ"""
+
+    @abstractmethod
+    async def sweep(self, now: float) -> int:
+        """期限切れの認可コード・トークンを削除し、削除した件数を返す"""
+
+    @abstractmethod
+    async def stats(self) -> dict:
+        """クライアント数・種類ごとの件数・認可コードとトークンのおおよそのバイト数"""
+
+    async def close(self) -> None:
+        pass
+
+
+class _GrantStore:
+    """1種類分の認可コード・トークン（`MemoryOAuthStorage` 用）
+
+    有効期限のヒープとクライアントごとの発行順を持ち、期限切れの一括削除と
+    クライアントごとの上限を O(log n) で扱う。ヒープの要素は削除時に取り除かず、
+    `sweep()` で取り出したときに現在の値と照合する。
+    """
+
+    def __init__(self, per_client: int):
+        self.per_client = per_client
+        self.bytes = 0  # 保持している値のおおよそのサイズ
+        self._items: dict[str, Grant] = {}
+        self._sizes: dict[str, int] = {}
+        self._by_client: dict[str, OrderedDict[str, None]] = {}
+        self._expiry: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Grant | None:
+        return self._items.get(key)
+
+    def put(self, key: str, item: Grant) -> int:
+        self.pop(key)
+        self._items[key] = item
+        self._sizes[key] = _size(key, item.model_dump_json())
+        self.bytes += self._sizes[key]
+        if item.expires_at:
+            heapq.heappush(self._expiry, (item.expires_at, key))
+        keys = self._by_client.setdefault(item.client_id, OrderedDict())
+        keys[key] = None
+        evicted = 0
+        while len(keys) > self.per_client:
+            self.pop(next(iter(keys)))
+            evicted += 1
+        return evicted
+
+    def pop(self, key: str) -> Grant | None:
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+        self.bytes -= self._sizes.pop(key)
+        keys = self._by_client.get(item.client_id)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._by_client[item.client_id]
+        return item
+
+    def drop_client(self, client_id: str) -> int:
+        keys = list(self._by_client.get(client_id, ()))
+        for key in keys:
+            self.pop(key)
+        return len(keys)
+
+    def sweep(self, now: float) -> int:
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, key = heapq.heappop(self._expiry)
+            item = self._items.get(key)
+            # 削除済み、または期限を延ばして保存し直されたもの（新しい要素が別にある）は飛ばす
+            if item is not None and item.expires_at and item.expires_at <= now:
+                self.pop(key)
+                removed += 1
+        if len(self._expiry) > 2 * len(self._items) + 64:
+            # 削除済みの要素がたまったらヒープを作り直す
+            self._expiry = [(i.expires_at, k) for k, i in self._items.items() if i.expires_at]
+            heapq.heapify(self._expiry)
+        return removed
+
+
+class MemoryOAuthStorage(OAuthStorage):
+    def __init__(
+        self, max_clients: int = MAX_CLIENTS, max_grants_per_client: int = MAX_GRANTS_PER_CLIENT
+    ):
+        self.max_clients = max_clients
+        # 最近使われた順（末尾が最新）。上限を超えたら先頭から捨てる
+        self._clients: OrderedDict[str, OAuthClientInformationFull] = OrderedDict()
+        self._grants = {kind: _GrantStore(max_grants_per_client) for kind in KINDS}
+
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        client = self._clients.get(client_id)
+        if client is not None:
+            self._clients.move_to_end(client_id)
+        return client
+
+    async def put_client(self, client: OAuthClientInformationFull) -> list[str]:
+        self._clients[client.client_id] = client
+        self._clients.move_to_end(client.client_id)
+        evicted = []
+        while len(self._clients) > self.max_clients:
+            client_id, _ = self._clients.popitem(last=False)
+            for store in self._grants.values():
+                store.drop_client(client_id)
+            evicted.append(client_id)
+        return evicted
+
+    async def get_grant(self, kind: str, key: str) -> Grant | None:
+        return self._grants[kind].get(key)
+
+    async def put_grant(self, kind: str, key: str, grant: Grant) -> int:
+        return self._grants[kind].put(key, grant)
+
+    async def pop_grant(self, kind: str, key: str) -> Grant | None:
+        return self._grants[kind].pop(key)
+
+    async def sweep(self, now: float) -> int:
+        return sum(store.sweep(now) for store in self._grants.values())
+
+    async def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            **{kind: len(store) for kind, store in self._grants.items()},
+            "bytes": sum(store.bytes for store in self._grants.values()),
+        }
+
+
+class SqliteOAuthStorage(SqliteStore, OAuthStorage):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS oauth_clients (
+        client_id TEXT PRIMARY KEY,
+        record TEXT NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS oauth_clients_last_used ON oauth_clients (last_used);
+    CREATE TABLE IF NOT EXISTS oauth_grants (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- 発行順
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        client_id TEXT NOT NULL,
+        expires_at REAL,
+        record TEXT NOT NULL,
+        UNIQUE (kind, key)
+    );
+    CREATE INDEX IF NOT EXISTS oauth_grants_expires_at ON oauth_grants (expires_at);
+    CREATE INDEX IF NOT EXISTS oauth_grants_client ON oauth_grants (kind, client_id, seq);
+    """
+
+    def __init__(
+        self,
+        path: str = MEMORY,
+        max_clients: int = MAX_CLIENTS,
+        max_grants_per_client: int = MAX_GRANTS_PER_CLIENT,
+    ):
+        super().__init__(path)
+        self.max_clients = max_clients
+        self.max_grants_per_client = max_grants_per_client
+
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        def touch(conn):
+            return conn.execute(
+                "UPDATE oauth_clients SET last_used = ? WHERE client_id = ? RETURNING record",
+                (time.time(), client_id),
+            ).fetchone()
+
+        row = await self._run(touch)
+        return OAuthClientInformationFull.model_validate_json(row["record"]) if row else None
+
+    async def put_client(self, client: OAuthClientInformationFull) -> list[str]:
+        def upsert(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO oauth_clients (client_id, record, last_used) "
+                "VALUES (?, ?, ?)",
+                (client.client_id, client.model_dump_json(), time.time()),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM oauth_clients").fetchone()
+            evicted = [
+                row["client_id"]
+                for row in conn.execute(
+                    "SELECT client_id FROM oauth_clients WHERE client_id != ? "
+                    "ORDER BY last_used LIMIT ?",
+                    (client.client_id, max(0, count - self.max_clients)),
+                )
+            ]
+            for client_id in evicted:
+                conn.execute("DELETE FROM oauth_clients WHERE client_id = ?", (client_id,))
+                conn.execute("DELETE FROM oauth_grants WHERE client_id = ?", (client_id,))
+            return evicted
+
+        return await self._run(upsert)
+
+    async def get_grant(self, kind: str, key: str) -> Grant | None:
+        def query(conn):
+            return conn.execute(
+                "SELECT record FROM oauth_grants WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+
+        row = await self._run(query)
+        return KINDS[kind].model_validate_json(row["record"]) if row else None
+
+    async def put_grant(self, kind: str, key: str, grant: Grant) -> int:
+        def insert(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO oauth_grants "
+                "(kind, key, client_id, expires_at, record) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, grant.client_id, grant.expires_at, grant.model_dump_json()),
+            )
+            return conn.execute(
+                """
+                DELETE FROM oauth_grants WHERE kind = ? AND client_id = ? AND seq NOT IN (
+                    SELECT seq FROM oauth_grants WHERE kind = ? AND client_id = ?
+                    ORDER BY seq DESC LIMIT ?
+                )
+                """,
+                (kind, grant.client_id, kind, grant.client_id, self.max_grants_per_client),
+            ).rowcount
+
+        return await self._run(insert)
+
+    async def pop_grant(self, kind: str, key: str) -> Grant | None:
+        def delete(conn):
+            return conn.execute(
+                "DELETE FROM oauth_grants WHERE kind = ? AND key = ? RETURNING record",
+                (kind, key),
+            ).fetchone()
+
+        row = await self._run(delete)
+        return KINDS[kind].model_validate_json(row["record"]) if row else None
+
+    async def sweep(self, now: float) -> int:
+        def delete(conn):
+            return conn.execute(
+                "DELETE FROM oauth_grants WHERE expires_at <= ?", (now,)
+            ).rowcount
+
+        return await self._run(delete)
+
+    async def stats(self) -> dict:
+        def query(conn):
+            (clients,) = conn.execute("SELECT COUNT(*) FROM oauth_clients").fetchone()
+            rows = conn.execute(
+                "SELECT kind, COUNT(*) AS n, SUM(length(key) + length(record)) AS bytes "
+                "FROM oauth_grants GROUP BY kind"
+            ).fetchall()
+            return clients, {row["kind"]: (row["n"], row["bytes"]) for row in rows}
+
+        clients, by_kind = await self._run(query)
+        return {
+            "clients": clients,
+            **{kind: by_kind.get(kind, (0, 0))[0] for kind in KINDS},
+            "bytes": sum(b for _, b in by_kind.values()),
+        }
+
+    async def close(self) -> None:
+        SqliteStore.close(self)
+
+
+class RedisOAuthStorage(OAuthStorage):
+    """Redis に保存する（`redis.asyncio.Redis(decode_responses=True)` 互換のクライアント）
+
+    キー（`prefix` 以下）:
+    - `client:<id>` / `clients`（最終利用時刻をスコアにした sorted set）
+    - `grant:<kind>:<key>`、`expiry:<kind>`（有効期限の sorted set）、
+      `owner:<kind>:<client_id>`（発行順の sorted set）、`sizes:<kind>`（hash）
+    - `bytes`（種類ごとのバイト数の hash）、`seq`（発行順の連番）
+
+    認可コードの使い捨てを複数プロセス間でも守るため、取り出しは GETDEL で行う。
+    """
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "printify-mcp:oauth:",
+        max_clients: int = MAX_CLIENTS,
+        max_grants_per_client: int = MAX_GRANTS_PER_CLIENT,
+    ):
+        self.redis = client
+        self.prefix = prefix
+        self.max_clients = max_clients
+        self.max_grants_per_client = max_grants_per_client
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisOAuthStorage":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("OAUTH_STORE=redis requires the redis extra") from e
+        return cls(redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        record = await self.redis.get(self._key("client", client_id))
+        if record is None:
+            return None
+        await self.redis.zadd(self._key("clients"), {client_id: time.time()})
+        return OAuthClientInformationFull.model_validate_json(record)
+
+    async def put_client(self, client: OAuthClientInformationFull) -> list[str]:
+        await self.redis.set(self._key("client", client.client_id), client.model_dump_json())
+        await self.redis.zadd(self._key("clients"), {client.client_id: time.time()})
+        excess = await self.redis.zcard(self._key("clients")) - self.max_clients
+        if excess <= 0:
+            return []
+        evicted = [m for m, _ in await self.redis.zpopmin(self._key("clients"), excess)]
+        for client_id in evicted:
+            await self.redis.delete(self._key("client", client_id))
+            for kind in KINDS:
+                for key in await self.redis.zrange(self._key("owner", kind, client_id), 0, -1):
+                    await self.pop_grant(kind, key)
+        return evicted
+
+    async def get_grant(self, kind: str, key: str) -> Grant | None:
+        record = await self.redis.get(self._key("grant", kind, key))
+        return KINDS[kind].model_validate_json(record) if record else None
+
+    async def put_grant(self, kind: str, key: str, grant: Grant) -> int:
+        await self.pop_grant(kind, key)
+        record = grant.model_dump_json()
+        await self.redis.set(self._key("grant", kind, key), record)
+        await self.redis.zadd(self._key("expiry", kind), {key: grant.expires_at or float("inf")})
+        owner = self._key("owner", kind, grant.client_id)
+        await self.redis.zadd(owner, {key: await self.redis.incr(self._key("seq"))})
+        size = _size(key, record)
+        await self.redis.hset(self._key("sizes", kind), key, size)
+        await self.redis.hincrby(self._key("bytes"), kind, size)
+        excess = await self.redis.zcard(owner) - self.max_grants_per_client
+        if excess <= 0:
+            return 0
+        for old, _ in await self.redis.zpopmin(owner, excess):
+            await self.pop_grant(kind, old)
+        return excess
+
+    async def pop_grant(self, kind: str, key: str) -> Grant | None:
+        record = await self.redis.getdel(self._key("grant", kind, key))
+        if record is None:
+            return None
+        grant = KINDS[kind].model_validate_json(record)
+        await self.redis.zrem(self._key("expiry", kind), key)
+        await self.redis.zrem(self._key("owner", kind, grant.client_id), key)
+        size = await self.redis.hget(self._key("sizes", kind), key)
+        await self.redis.hdel(self._key("sizes", kind), key)
+        await self.redis.hincrby(self._key("bytes"), kind, -int(size or 0))
+        return grant
+
+    async def sweep(self, now: float) -> int:
+        removed = 0
+        for kind in KINDS:
+            for key in await self.redis.zrangebyscore(self._key("expiry", kind), "-inf", now):
+                if await self.pop_grant(kind, key) is not None:
+                    removed += 1
+        return removed
+
+    async def stats(self) -> dict:
+        sizes = await self.redis.hgetall(self._key("bytes"))
+        return {
+            "clients": await self.redis.zcard(self._key("clients")),
+            **{kind: await self.redis.zcard(self._key("expiry", kind)) for kind in KINDS},
+            "bytes": sum(int(v) for v in sizes.values()),
+        }
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_storage(
+    backend: str, data_dir: str | None = None, redis_url: str | None = None
+) -> OAuthStorage:
+    if backend == "memory":
+        return MemoryOAuthStorage()
+    if backend == "sqlite":
+        if not data_dir:
+            raise ValueError("OAUTH_STORE=sqlite requires DATA_DIR")
+        return SqliteOAuthStorage(store_path(data_dir, "oauth.db"))
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("OAUTH_STORE=redis requires REDIS_URL")
+        return RedisOAuthStorage.from_url(redis_url)
+    raise ValueError(f"OAUTH_STORE must be one of {', '.join(BACKENDS)}, got {backend!r}")
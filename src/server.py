@@ -2,27 +2,122 @@ import contextlib
 import logging
 import os
 
+import anyio
+import httpx
 from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.server import TransportSecuritySettings
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
-from starlette.routing import Mount, Route
-
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Mount, Route, request_response
+
+from src.services.background import Job, run_jobs
+from src.services.catalog_index import CatalogIndex
+from src.services.image_index import ImageIndex
+from src.services.metrics import REGISTRY
+from src.services.order_store import OrderStore
 from src.services.printify import PrintifyService
+from src.services.product_store import ProductStore
+from src.services.rate_limit import SharedRateLimiter
+from src.services.shared_state import (
+    SYNC_INTERVAL,
+    create_shared_state,
+    leader_only,
+    lease_scope,
+)
+from src.services.store import store_path
+from src.services.tracing import setup_tracing, shutdown_tracing
 from src.tools import shops, products, catalog, images, orders
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
+MIN_SHOP_REFRESH_INTERVAL = 60.0  # 秒
+
+
+def _check_workers(settings) -> None:
+    """複数ワーカーで動かすのに必要な共有の保存先が設定されているか確かめる
+
+    注文・商品のミラー、カタログインデックス、画像インデックスは `DATA_DIR` 下の SQLite を
+    ワーカー間で共有するので、`DATA_DIR` も必須（未設定だとワーカーごとのインメモリになる）。
+    """
+    if settings.workers <= 1:
+        return
+    if not settings.data_dir:
+        raise ValueError("WORKERS > 1 requires DATA_DIR (local stores are shared through it)")
+    if not settings.shared_store:
+        raise ValueError("WORKERS > 1 requires SHARED_STORE (sqlite or redis)")
+    if settings.oauth_issuer_url and settings.oauth_store == "memory":
+        raise ValueError("WORKERS > 1 with OAuth requires OAUTH_STORE=sqlite or redis")
+
 
 def _create_service_and_mcp():
     from src.config import Settings
 
     settings = Settings()
+    _check_workers(settings)
+    if settings.otel_exporter:
+        setup_tracing(settings.otel_exporter)
+    shared = None
+    if settings.shared_store:
+        shared = create_shared_state(settings.shared_store, settings.data_dir, settings.redis_url)
     service = PrintifyService(
         api_key=settings.printify_api_key,
         shop_id=settings.printify_shop_id,
+        image_index=ImageIndex(store_path(settings.data_dir, "images.db")),
+        upload_dir=settings.upload_dir,
+        shop_ttl=settings.shop_cache_ttl,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.http_connect_timeout,
+            read=settings.http_read_timeout,
+            write=settings.http_write_timeout,
+            pool=settings.http_pool_timeout,
+        ),
+        http2=settings.http2,
+        rate_limiter=SharedRateLimiter(shared) if shared else None,
+        shared=shared,
     )
+    catalog_index = CatalogIndex(store_path(settings.data_dir, "catalog.db"))
+    order_store = OrderStore(store_path(settings.data_dir, "orders.db"))
+    product_store = ProductStore(store_path(settings.data_dir, "products.db"))
+    jobs = []
+    if settings.data_dir:
+        # 巡回には数時間かかるため、インデックスが再起動後も残る場合だけ動かす
+        jobs.append(
+            Job(
+                "catalog-index",
+                settings.catalog_index_interval,
+                lambda: catalog_index.refresh(service, settings.catalog_index_batch_size),
+            )
+        )
+    if settings.shop_cache_ttl > 0:
+        # ショップ一覧を常にロードしておき、shop_id を API を呼ばずに検証できるようにする
+        interval = max(settings.shop_cache_ttl / 2, MIN_SHOP_REFRESH_INTERVAL)
+        jobs.append(Job("shop-registry", interval, service.shops.refresh))
+    if settings.printify_shop_id and settings.data_dir:
+        # インメモリだと起動のたびに全注文・全商品を読み直すことになるため、永続化時のみ
+        jobs += [
+            Job("order-sync", settings.order_sync_interval, lambda: order_store.sync(service)),
+            Job(
+                "product-sync",
+                settings.product_sync_interval,
+                lambda: product_store.sync(service),
+            ),
+        ]
+    if shared and settings.data_dir:
+        # ワーカーごとに持つショップ一覧以外は、同じ DATA_DIR を使うワーカーのうち
+        # リースを取れた1つだけで巡回・同期する
+        scope = lease_scope(settings.data_dir)
+        jobs = [j if j.name == "shop-registry" else leader_only(shared, j, scope) for j in jobs]
+    if shared:
+        jobs.append(Job("cache-sync", SYNC_INTERVAL, service.sync_shared))
+
+    # /metrics でスクレイプ時に値を集めるもの
+    collectors = [service.metrics]
 
     # OAuth / Bearer Token 認証の設定
     mcp_kwargs = {
@@ -37,11 +132,15 @@ def _create_service_and_mcp():
         # OAuth モード: Claude Web/Mobile + 静的Bearer Token（Claude Code/TypingMind）
         from mcp.server.auth.settings import AuthSettings, ClientRegistrationOptions
 
-        from src.oauth_provider import InMemoryOAuthProvider
+        from src.oauth_provider import SWEEP_INTERVAL, InMemoryOAuthProvider
+        from src.oauth_storage import create_storage
 
         oauth_provider = InMemoryOAuthProvider(
             static_bearer_token=settings.mcp_auth_token,
+            storage=create_storage(settings.oauth_store, settings.data_dir, settings.redis_url),
         )
+        jobs.append(Job("oauth-sweep", SWEEP_INTERVAL, oauth_provider.sweep))
+        collectors.append(oauth_provider.metrics)
         mcp_kwargs["auth_server_provider"] = oauth_provider
         mcp_kwargs["auth"] = AuthSettings(
             issuer_url=settings.oauth_issuer_url,
@@ -57,12 +156,12 @@ def _create_service_and_mcp():
     mcp = FastMCP("Printify MCP Server", **mcp_kwargs)
 
     shops.register(mcp, service)
-    products.register(mcp, service)
-    catalog.register(mcp, service)
+    products.register(mcp, service, product_store)
+    catalog.register(mcp, service, catalog_index, indexed=bool(settings.data_dir))
     images.register(mcp, service)
-    orders.register(mcp, service)
+    orders.register(mcp, service, order_store)
 
-    return settings, service, mcp
+    return settings, service, mcp, jobs, collectors
 
 
 async def health(request):
@@ -70,7 +169,7 @@ async def health(request):
 
 
 def create_app() -> Starlette:
-    settings, service, mcp = _create_service_and_mcp()
+    settings, service, mcp, jobs, collectors = _create_service_and_mcp()
 
     @contextlib.asynccontextmanager
     async def lifespan(app):
@@ -78,24 +177,50 @@ def create_app() -> Starlette:
         try:
             async with contextlib.AsyncExitStack() as stack:
                 await stack.enter_async_context(mcp.session_manager.run())
+                await stack.enter_async_context(run_jobs(jobs))
                 yield
         finally:
             await service.close()
+            shutdown_tracing()
             logger.info("Printify MCP Server stopped")
 
-    app = Starlette(
-        routes=[
-            Route("/health", health),
-            Mount("/", app=mcp.streamable_http_app()),
-        ],
-        lifespan=lifespan,
-    )
+    async def metrics(request):
+        return PlainTextResponse(
+            REGISTRY.render(extra=[m for collect in collectors for m in collect()]),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    routes = [Route("/health", health)]
+    if not settings.oauth_issuer_url:
+        # 静的トークンがあれば下のミドルウェアがアプリ全体と一緒に保護する
+        routes.append(Route("/metrics", metrics))
+    elif settings.mcp_auth_token or settings.mcp_auth_tokens:
+        # OAuth モードの認証は /mcp にしかかからないため、静的トークンで個別に保護する。
+        # 静的トークンがなければ /metrics は公開しない
+        from src.auth import BearerAuthMiddleware
+
+        routes.append(
+            Route(
+                "/metrics",
+                BearerAuthMiddleware(
+                    request_response(metrics),
+                    token=settings.mcp_auth_token,
+                    tokens=settings.mcp_auth_tokens,
+                ),
+            )
+        )
+    routes.append(Mount("/", app=mcp.streamable_http_app()))
+    app = Starlette(routes=routes, lifespan=lifespan)
 
     # OAuth無効時のみ旧ミドルウェアでBearer Token認証
-    if not settings.oauth_issuer_url and settings.mcp_auth_token:
+    if not settings.oauth_issuer_url and (settings.mcp_auth_token or settings.mcp_auth_tokens):
         from src.auth import BearerAuthMiddleware
 
-        app.add_middleware(BearerAuthMiddleware, token=settings.mcp_auth_token)
+        app.add_middleware(
+            BearerAuthMiddleware,
+            token=settings.mcp_auth_token,
+            tokens=settings.mcp_auth_tokens,
+        )
 
     return app
 
@@ -103,12 +228,28 @@ def create_app() -> Starlette:
 if __name__ == "__main__":
     transport = os.environ.get("TRANSPORT", "streamable-http")
     if transport == "stdio":
-        _, _, mcp = _create_service_and_mcp()
-        mcp.run(transport="stdio")
+        _, _, mcp, jobs, _ = _create_service_and_mcp()
+
+        async def run_stdio():
+            try:
+                async with run_jobs(jobs):
+                    await mcp.run_stdio_async()
+            finally:
+                shutdown_tracing()
+
+        anyio.run(run_stdio)
     else:
         import uvicorn
 
         from src.config import Settings
 
-        app = create_app()
-        uvicorn.run(app, host="0.0.0.0", port=Settings().port)
+        settings = Settings()
+        _check_workers(settings)
+        # ワーカーごとに create_app() を呼んでアプリを作る
+        uvicorn.run(
+            "src.server:create_app",
+            factory=True,
+            host="0.0.0.0",
+            port=settings.port,
+            workers=settings.workers,
+        )
@@ -0,0 +1,41 @@
+"""サーバー稼働中に定期実行するバックグラウンドジョブ"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float  # 秒
+    func: Callable[[], Awaitable[Any]]
+
+
+async def run_periodically(job: Job) -> None:
+    while True:
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Background job {job.name} failed")
+        await asyncio.sleep(job.interval)
+
+
+@contextlib.asynccontextmanager
+async def run_jobs(jobs: list[Job]):
+    tasks = [asyncio.create_task(run_periodically(job), name=job.name) for job in jobs]
+    for job in jobs:
+        logger.info(f"Background job {job.name} started (every {job.interval}s)")
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
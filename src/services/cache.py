@@ -0,0 +1,176 @@
+"""プロセス内の非同期レスポンスキャッシュ
+
+- `SingleFlight`: 同じキーに対する同時実行中の処理を1つにまとめる
+- `TTLCache`: エントリごとの TTL とサイズ上限付き LRU。未キャッシュ時の取得は
+  single-flight で1回だけ実行し、ヒット/ミス数を記録する。書き込み操作に合わせて
+  キーを無効化でき、無効化の前に始まった取得の結果はキャッシュしない
+- `ConditionalCache`: ETag / Last-Modified による条件付き GET 用に検証子と本文を保持する
+
+キャッシュされた値は呼び出し元間で共有されるため、呼び出し元は変更しないこと。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+_MISSING = object()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """`key` の処理が実行中ならその結果を待ち、なければ `factory` を実行する"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+
+            def _done(t: asyncio.Future) -> None:
+                if self._calls.get(key) is t:
+                    del self._calls[key]
+
+            task.add_done_callback(_done)
+        # 待機側がキャンセルされても、他の待機者のために処理自体は続行する
+        return await asyncio.shield(task)
+
+    def forget_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """条件に合う実行中の処理を以後の呼び出しと共有しない（結果が古くなる場合に使う）"""
+        for key in [k for k in self._calls if predicate(k)]:
+            del self._calls[key]
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._flight = SingleFlight()
+        self._generation = 0  # 無効化のたびに増やす
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self.delete_where(lambda k: k == key)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """条件に合うキーを削除し、実行中の取得もキャッシュさせない。削除件数を返す"""
+        self._generation += 1
+        self._flight.forget_where(predicate)
+        keys = [k for k in self._data if predicate(k)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._flight.forget_where(lambda k: True)
+        self._data.clear()
+
+    async def get_or_fill(
+        self, key: Hashable, ttl: float, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        value = self._lookup(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        generation = self._generation
+
+        async def fill():
+            result = await factory()
+            # 取得中に無効化されていたら、書き込み前の値かもしれないので保存しない
+            if self._generation == generation:
+                self.set(key, result, ttl)
+            return result
+
+        return await self._flight.do(key, fill)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ConditionalCache:
+    """GET レスポンスの検証子（ETag / Last-Modified）と本文を保持する
+
+    次の取得で `If-None-Match` / `If-Modified-Since` を送り、304 が返れば保持している
+    本文をそのまま使う（ペイロードのダウンロードと JSON パースを省ける）。
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.revalidated = 0  # 304 で本文を再利用した回数
+        self._data: OrderedDict[Hashable, tuple[dict[str, str], Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> tuple[dict[str, str], Any] | None:
+        """条件付きリクエスト用のヘッダーと、304 のときに使う本文。保持していなければ None
+
+        送信前に両方を受け取っておく（応答を待つ間に追い出されたり、検証子のない
+        200 で消されたりしても、304 ならこの本文を使えるように）。
+        """
+        entry = self._data.get(key)
+        return (dict(entry[0]), entry[1]) if entry else None
+
+    def revalidate(self, key: Hashable, body: Any) -> Any:
+        """304 を受けたときに、送信前に受け取っておいた本文を返す"""
+        if key in self._data:
+            self._data.move_to_end(key)
+        self.revalidated += 1
+        return body
+
+    def store(self, key: Hashable, headers, body: Any) -> None:
+        validators = {}
+        if etag := headers.get("etag"):
+            validators["If-None-Match"] = etag
+        if last_modified := headers.get("last-modified"):
+            validators["If-Modified-Since"] = last_modified
+        if not validators:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (validators, body)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -0,0 +1,307 @@
+"""カタログ検索用のローカルインデックス（SQLite + FTS5）
+
+`list_blueprints` → `get_print_providers` → `get_variants` を少しずつ辿って
+ブループリント・プリントプロバイダー・バリアントをローカルに保存し、
+テキスト・ブランド・プロバイダー・色・サイズ・所在地で絞り込めるようにする。
+"""
+
+import logging
+import re
+import time
+
+from src.services.printify import PrintifyService
+from src.services.store import MEMORY, SqliteStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAX_AGE = 7 * 86400  # この期間を過ぎたブループリントはバリアントを取り直す
+MAX_VARIANTS_PER_MATCH = 10
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+")
+
+
+def _fts_query(text: str) -> str | None:
+    """自由入力を FTS5 のクエリ（全語の前方一致 AND）に変換する"""
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class CatalogIndex(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS blueprints (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        brand TEXT,
+        model TEXT,
+        indexed_at REAL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS blueprints_fts
+        USING fts5(title, brand, model, description);
+    CREATE TABLE IF NOT EXISTS providers (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        country TEXT,
+        region TEXT,
+        city TEXT
+    );
+    CREATE TABLE IF NOT EXISTS offerings (
+        blueprint_id INTEGER NOT NULL,
+        provider_id INTEGER NOT NULL,
+        variant_count INTEGER NOT NULL,
+        PRIMARY KEY (blueprint_id, provider_id)
+    );
+    CREATE TABLE IF NOT EXISTS variants (
+        blueprint_id INTEGER NOT NULL,
+        provider_id INTEGER NOT NULL,
+        id INTEGER NOT NULL,
+        title TEXT,
+        color TEXT,
+        size TEXT,
+        PRIMARY KEY (blueprint_id, provider_id, id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_blueprints_brand ON blueprints (brand COLLATE NOCASE);
+    CREATE INDEX IF NOT EXISTS idx_blueprints_indexed_at ON blueprints (indexed_at);
+    CREATE INDEX IF NOT EXISTS idx_variants_color ON variants (color COLLATE NOCASE);
+    CREATE INDEX IF NOT EXISTS idx_variants_size ON variants (size COLLATE NOCASE);
+    """
+
+    def __init__(self, path: str = MEMORY, max_age: float = INDEX_MAX_AGE):
+        super().__init__(path)
+        self.max_age = max_age
+
+    # --- Refresh ---
+
+    async def refresh(self, service: PrintifyService, batch_size: int = 5) -> dict:
+        """ブループリント一覧を同期し、未索引または古いものを最大 `batch_size` 件索引する"""
+        blueprints = await service.list_blueprints()
+        await self._run(self._sync_blueprints, blueprints)
+
+        pending = await self._run(self._stale_blueprints, time.time() - self.max_age, batch_size)
+        for blueprint_id in pending:
+            await self._index_blueprint(service, blueprint_id)
+
+        status = await self.status()
+        logger.info(
+            f"Catalog index refreshed: {len(pending)} blueprints indexed, "
+            f"{status['pending_blueprints']} pending"
+        )
+        return {"indexed": len(pending), **status}
+
+    async def _index_blueprint(self, service: PrintifyService, blueprint_id: int) -> None:
+        providers = await service.get_print_providers(blueprint_id, cache=False)
+        offerings = []
+        for provider in providers:
+            provider_id = provider["id"]
+            if not await self._run(self._has_provider, provider_id):
+                detail = await service.get_print_provider(provider_id, cache=False)
+                await self._run(self._upsert_provider, detail)
+            variants = await service.get_variants(blueprint_id, provider_id, cache=False)
+            offerings.append((provider_id, variants.get("variants", [])))
+        await self._run(self._replace_offerings, blueprint_id, offerings)
+
+    @staticmethod
+    def _sync_blueprints(conn, blueprints: list[dict]) -> None:
+        seen = []
+        for bp in blueprints:
+            seen.append(bp["id"])
+            conn.execute(
+                """
+                INSERT INTO blueprints (id, title, brand, model) VALUES (?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    title = excluded.title, brand = excluded.brand, model = excluded.model
+                """,
+                (bp["id"], bp.get("title", ""), bp.get("brand"), bp.get("model")),
+            )
+            conn.execute("DELETE FROM blueprints_fts WHERE rowid = ?", (bp["id"],))
+            conn.execute(
+                "INSERT INTO blueprints_fts (rowid, title, brand, model, description)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    bp["id"],
+                    bp.get("title", ""),
+                    bp.get("brand") or "",
+                    bp.get("model") or "",
+                    _TAG_RE.sub(" ", bp.get("description") or ""),
+                ),
+            )
+        # カタログから消えたブループリントを削除
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_blueprints (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM seen_blueprints")
+        conn.executemany("INSERT INTO seen_blueprints VALUES (?)", [(i,) for i in seen])
+        for table, column in (
+            ("blueprints", "id"),
+            ("blueprints_fts", "rowid"),
+            ("offerings", "blueprint_id"),
+            ("variants", "blueprint_id"),
+        ):
+            conn.execute(
+                f"DELETE FROM {table} WHERE {column} NOT IN (SELECT id FROM seen_blueprints)"
+            )
+
+    @staticmethod
+    def _stale_blueprints(conn, before: float, limit: int) -> list[int]:
+        rows = conn.execute(
+            """
+            SELECT id FROM blueprints
+            WHERE indexed_at IS NULL OR indexed_at < ?
+            ORDER BY indexed_at IS NOT NULL, indexed_at, id
+            LIMIT ?
+            """,
+            (before, limit),
+        ).fetchall()
+        return [r["id"] for r in rows]
+
+    @staticmethod
+    def _has_provider(conn, provider_id: int) -> bool:
+        row = conn.execute("SELECT 1 FROM providers WHERE id = ?", (provider_id,)).fetchone()
+        return row is not None
+
+    @staticmethod
+    def _upsert_provider(conn, provider: dict) -> None:
+        location = provider.get("location") or {}
+        conn.execute(
+            "INSERT OR REPLACE INTO providers (id, title, country, region, city)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                provider["id"],
+                provider.get("title", ""),
+                location.get("country"),
+                location.get("region"),
+                location.get("city"),
+            ),
+        )
+
+    @staticmethod
+    def _replace_offerings(conn, blueprint_id: int, offerings: list) -> None:
+        conn.execute("DELETE FROM offerings WHERE blueprint_id = ?", (blueprint_id,))
+        conn.execute("DELETE FROM variants WHERE blueprint_id = ?", (blueprint_id,))
+        for provider_id, variants in offerings:
+            conn.execute(
+                "INSERT INTO offerings (blueprint_id, provider_id, variant_count) VALUES (?, ?, ?)",
+                (blueprint_id, provider_id, len(variants)),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO variants"
+                " (blueprint_id, provider_id, id, title, color, size) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        blueprint_id,
+                        provider_id,
+                        v["id"],
+                        v.get("title"),
+                        (v.get("options") or {}).get("color"),
+                        (v.get("options") or {}).get("size"),
+                    )
+                    for v in variants
+                ],
+            )
+        conn.execute(
+            "UPDATE blueprints SET indexed_at = ? WHERE id = ?", (time.time(), blueprint_id)
+        )
+
+    # --- Search ---
+
+    async def status(self) -> dict:
+        def query(conn):
+            row = conn.execute(
+                "SELECT COUNT(*) AS total, COUNT(indexed_at) AS indexed FROM blueprints"
+            ).fetchone()
+            return {
+                "total_blueprints": row["total"],
+                "indexed_blueprints": row["indexed"],
+                "pending_blueprints": row["total"] - row["indexed"],
+            }
+
+        return await self._run(query)
+
+    async def search(
+        self,
+        text: str | None = None,
+        brand: str | None = None,
+        provider: str | None = None,
+        color: str | None = None,
+        size: str | None = None,
+        location: str | None = None,
+        limit: int = 10,
+    ) -> list[dict]:
+        return await self._run(
+            self._search, text, brand, provider, color, size, location, limit
+        )
+
+    @staticmethod
+    def _search(conn, text, brand, provider, color, size, location, limit) -> list[dict]:
+        joins = []
+        where = []
+        params: list = []
+        order = "o.variant_count DESC, o.blueprint_id"
+
+        fts = _fts_query(text) if text else None
+        if fts:
+            joins.append("JOIN blueprints_fts ON blueprints_fts.rowid = b.id")
+            where.append("blueprints_fts MATCH ?")
+            params.append(fts)
+            order = f"blueprints_fts.rank, {order}"
+        if brand:
+            where.append("b.brand LIKE ?")
+            params.append(f"%{brand}%")
+        if provider:
+            if str(provider).isdigit():
+                where.append("o.provider_id = ?")
+                params.append(int(provider))
+            else:
+                where.append("p.title LIKE ?")
+                params.append(f"%{provider}%")
+        if location:
+            where.append("(p.country LIKE ? OR p.region LIKE ? OR p.city LIKE ?)")
+            params.extend([location, f"%{location}%", f"%{location}%"])
+
+        variant_where = ["v.blueprint_id = o.blueprint_id", "v.provider_id = o.provider_id"]
+        variant_params: list = []
+        if color:
+            variant_where.append("v.color LIKE ?")
+            variant_params.append(f"%{color}%")
+        if size:
+            variant_where.append("v.size = ? COLLATE NOCASE")
+            variant_params.append(size)
+        if color or size:
+            where.append(f"EXISTS (SELECT 1 FROM variants v WHERE {' AND '.join(variant_where)})")
+            params.extend(variant_params)
+
+        sql = f"""
+            SELECT o.blueprint_id, b.title, b.brand, o.provider_id, p.title AS provider,
+                   p.country, p.region, o.variant_count
+            FROM offerings o
+            JOIN blueprints b ON b.id = o.blueprint_id
+            LEFT JOIN providers p ON p.id = o.provider_id
+            {' '.join(joins)}
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY {order}
+            LIMIT ?
+        """
+        rows = conn.execute(sql, [*params, limit]).fetchall()
+
+        results = []
+        for row in rows:
+            variants = conn.execute(
+                f"""
+                SELECT v.id, v.title FROM variants v, offerings o
+                WHERE o.blueprint_id = ? AND o.provider_id = ? AND {' AND '.join(variant_where)}
+                ORDER BY v.id LIMIT ?
+                """,
+                [row["blueprint_id"], row["provider_id"], *variant_params,
+                 MAX_VARIANTS_PER_MATCH],
+            ).fetchall()
+            results.append({
+                "blueprint_id": row["blueprint_id"],
+                "title": row["title"],
+                "brand": row["brand"],
+                "provider_id": row["provider_id"],
+                "provider": row["provider"],
+                "location": ", ".join(filter(None, [row["region"], row["country"]])) or None,
+                "variant_count": row["variant_count"],
+                "variants": [{"id": v["id"], "title": v["title"]} for v in variants],
+            })
+        return results
@@ -0,0 +1,39 @@
+"""商品更新用の差分計算
+
+`update_product` に渡すデータのうち、現在の商品と値が異なるフィールドだけを残す。
+`variants` は id をキーに要素単位で比較し、どれか1つでも変わっていれば指定された
+リスト全体を送る（Printify の商品更新は `variants` を送るときに全バリアントを要求する）。
+それ以外のフィールドは値全体で比較する。
+"""
+
+from typing import Any
+
+_MISSING = object()
+
+# id をキーに要素単位で比較するリストフィールド
+KEYED_LIST_FIELDS = ("variants",)
+
+
+def _keyed_list_changed(current: list[dict], desired: list[dict]) -> bool:
+    """`desired` の要素のうち、`current` にない id か値の異なるフィールドを持つものがあるか"""
+    by_id = {item.get("id"): item for item in current if isinstance(item, dict)}
+    for item in desired:
+        existing = by_id.get(item.get("id")) if isinstance(item, dict) else None
+        if existing is None:
+            return True
+        if any(k != "id" and existing.get(k, _MISSING) != v for k, v in item.items()):
+            return True
+    return False
+
+
+def diff_product(current: dict, desired: dict) -> dict[str, Any]:
+    """`desired` のうち `current` から変化したフィールドだけを返す（変化なしなら空 dict）"""
+    patch: dict[str, Any] = {}
+    for key, value in desired.items():
+        existing = current.get(key, _MISSING)
+        if key in KEYED_LIST_FIELDS and isinstance(value, list) and isinstance(existing, list):
+            if _keyed_list_changed(existing, value):
+                patch[key] = value
+        elif existing != value:
+            patch[key] = value
+    return patch
@@ -0,0 +1,88 @@
+"""アップロード済み画像のコンテンツアドレス索引
+
+画像の内容（base64 をデコードしたバイト列の sha256）または正規化した URL を
+キーに、Printify が返した画像レコードを保存する。同じ画像の再アップロードは
+API を呼ばずに既存のレコードを返す。
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.services.store import MEMORY, SqliteStore
+
+_DECODE_CHUNK = 4 * 64 * 1024  # base64 は4文字単位でデコードできる
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """スキーム・ホストの大文字小文字、既定ポート、フラグメント、クエリ順の違いを吸収する"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def contents_digest(contents: str) -> str:
+    """base64 文字列をチャンクごとにデコードしながら sha256 を計算する"""
+    digest = hashlib.sha256()
+    data = "".join(contents.split()) if any(c in contents for c in " \r\n\t") else contents
+    try:
+        for i in range(0, len(data), _DECODE_CHUNK):
+            digest.update(base64.b64decode(data[i:i + _DECODE_CHUNK], validate=True))
+    except (binascii.Error, ValueError):
+        # 不正な base64 は Printify 側でエラーになるが、キーとしては文字列自体を使う
+        digest = hashlib.sha256(contents.encode())
+    return digest.hexdigest()
+
+
+def file_digest(path: str, chunk_size: int = _DECODE_CHUNK) -> str:
+    """ファイルの sha256 をチャンク単位で計算する（base64 アップロードと同じキーになる）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_key(url: str | None = None, contents: str | None = None) -> str:
+    if url:
+        return f"url:{normalize_url(url)}"
+    return f"sha256:{contents_digest(contents or '')}"
+
+
+class ImageIndex(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS images (
+        key TEXT PRIMARY KEY,
+        image_id TEXT NOT NULL,
+        record TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = MEMORY):
+        super().__init__(path)
+
+    async def get(self, key: str) -> dict | None:
+        def query(conn):
+            return conn.execute("SELECT record FROM images WHERE key = ?", (key,)).fetchone()
+
+        row = await self._run(query)
+        return json.loads(row["record"]) if row else None
+
+    async def put(self, key: str, record: dict) -> None:
+        def insert(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO images (key, image_id, record, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, str(record["id"]), json.dumps(record), time.time()),
+            )
+
+        await self._run(insert)
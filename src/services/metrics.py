@@ -0,0 +1,201 @@
+"""Prometheus 形式のメトリクス（`/metrics` で公開する）
+
+依存を増やさないよう、カウンターとヒストグラムだけを持つ最小限のレジストリを実装する。
+ツール呼び出しは `handle_errors` で、Printify API 呼び出しは `PrintifyService._request`
+で計測する。キャッシュやコネクションプールのようにサービスが既に数えている値は、
+スクレイプ時に `render(extra=...)` で追加する。
+
+Printify のパスには ID が含まれるため、`endpoint` ラベルは `endpoint_label()` で
+ID を `{id}` に置き換えてから使う（ラベルの種類が際限なく増えないようにする）。
+"""
+
+from collections.abc import Iterable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = tuple[str, dict[str, str], float]  # (名前, ラベル, 値)
+
+
+def endpoint_label(path: str) -> str:
+    """数字を含むパスセグメントを ID とみなして `{id}` に置き換える（先頭の "/v1" は除く）"""
+    parts = path.split("/")
+    for i, part in enumerate(parts[2:], start=2):
+        stem, dot, ext = part.partition(".")
+        if any(c.isdigit() for c in stem):
+            parts[i] = "{id}" + dot + ext
+    return "/".join(parts)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in sorted(self._values.items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # ラベルごとに [バケットごとの件数..., 合計値, 件数]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def samples(self) -> Iterable[Sample]:
+        for key, state in sorted(self._values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, state):
+                cumulative += n
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, state[-2]
+            yield f"{self.name}_count", labels, state[-1]
+
+
+class Snapshot(_Metric):
+    """他のオブジェクトが数えている値をスクレイプ時に渡す（`render(extra=...)` 用）"""
+
+    def __init__(
+        self, type: str, name: str, help: str, samples: Iterable[tuple[dict[str, str], float]]
+    ):
+        super().__init__(name, help)
+        self.type = type
+        self._samples = list(samples)
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self._samples:
+            yield self.name, labels, value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self, extra: Iterable[_Metric] = ()) -> str:
+        """Prometheus のテキスト形式（version 0.0.4）で出力する"""
+        lines = []
+        for metric in [*self._metrics.values(), *extra]:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_CALLS = REGISTRY.counter(
+    "mcp_tool_calls_total",
+    "MCP tool calls by outcome (ok, error: structured error response, exception: raised)",
+    ("tool", "outcome"),
+)
+TOOL_DURATION = REGISTRY.histogram(
+    "mcp_tool_duration_seconds", "MCP tool call latency", ("tool",)
+)
+API_REQUESTS = REGISTRY.counter(
+    "printify_api_requests_total",
+    "Printify API responses by status code (error: no response)",
+    ("method", "endpoint", "status"),
+)
+API_DURATION = REGISTRY.histogram(
+    "printify_api_request_duration_seconds",
+    "Printify API request latency per attempt",
+    ("method", "endpoint"),
+)
+API_RETRIES = REGISTRY.counter(
+    "printify_api_retries_total", "Printify API requests retried after 429", ("method", "endpoint")
+)
+RATE_LIMITED = REGISTRY.counter(
+    "printify_api_rate_limited_total", "429 responses from the Printify API", ("method", "endpoint")
+)
+RATE_LIMIT_SLEEP = REGISTRY.counter(
+    "printify_rate_limit_sleep_seconds_total",
+    "Seconds spent waiting for rate limit tokens before sending",
+)
+AUTH_REQUESTS = REGISTRY.counter(
+    "mcp_auth_requests_total",
+    "Requests checked by the bearer token middleware, by token label",
+    ("token", "outcome"),
+)
@@ -0,0 +1,350 @@
+"""注文のローカルミラー（SQLite）と差分同期
+
+`list_orders` を新しい順に辿り、前回同期した最新の `created_at`（ウォーターマーク）から
+`RESYNC_WINDOW` 遡った注文までを取り込む。ステータスが変わりやすい直近の注文は
+毎回取り直し、それより古いページは読まない。Printify の注文には `updated_at` が
+ないため、ウィンドウより古い注文の発送・キャンセルは `FULL_RESYNC_INTERVAL` ごとの
+全件同期で拾う。集計系の質問はこのミラーに対して SQL で答えるので、API のページを
+何十回も辿る必要がない。
+"""
+
+import contextlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+from src.services.printify import PrintifyService
+from src.services.store import MEMORY, SqliteStore, normalize_timestamp
+
+logger = logging.getLogger(__name__)
+
+RESYNC_WINDOW = timedelta(days=14)
+FULL_RESYNC_INTERVAL = 86400.0  # 秒
+UPSERT_BATCH = 100
+
+DATE_FIELDS = ("created_at", "sent_to_production_at", "fulfilled_at")
+GROUP_BY = {
+    "status": "o.status",
+    "day": "substr(o.{date_field}, 1, 10)",
+    "country": "o.country",
+    "sku": "i.sku",
+}
+
+
+def _filter_timestamp(value: str, name: str) -> str:
+    normalized = normalize_timestamp(value)
+    if normalized is None:
+        raise ValueError(f"{name} must be an ISO date or datetime (e.g. 2024-01-31)")
+    return normalized
+
+
+def _order_row(shop_id: str, order: dict) -> tuple:
+    created_at = normalize_timestamp(order.get("created_at"))
+    sent_at = normalize_timestamp(order.get("sent_to_production_at"))
+    fulfilled_at = normalize_timestamp(order.get("fulfilled_at"))
+    updated_at = normalize_timestamp(order.get("updated_at")) or max(
+        filter(None, [created_at, sent_at, fulfilled_at]), default=None
+    )
+    return (
+        str(order["id"]),
+        shop_id,
+        order.get("status"),
+        created_at,
+        updated_at,
+        sent_at,
+        fulfilled_at,
+        order.get("total_price"),
+        order.get("total_shipping"),
+        order.get("total_tax"),
+        (order.get("address_to") or {}).get("country"),
+        json.dumps(order),
+    )
+
+
+def _item_rows(order: dict) -> list[tuple]:
+    rows = []
+    for item in order.get("line_items") or []:
+        metadata = item.get("metadata") or {}
+        rows.append((
+            str(order["id"]),
+            item.get("product_id"),
+            item.get("variant_id"),
+            metadata.get("sku"),
+            metadata.get("title"),
+            item.get("quantity") or 0,
+            metadata.get("price"),
+            item.get("status"),
+        ))
+    return rows
+
+
+class OrderStore(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS orders (
+        id TEXT PRIMARY KEY,
+        shop_id TEXT NOT NULL,
+        status TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        sent_to_production_at TEXT,
+        fulfilled_at TEXT,
+        total_price INTEGER,
+        total_shipping INTEGER,
+        total_tax INTEGER,
+        country TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_orders_shop_created ON orders (shop_id, created_at);
+    CREATE INDEX IF NOT EXISTS idx_orders_shop_status ON orders (shop_id, status);
+    CREATE INDEX IF NOT EXISTS idx_orders_shop_fulfilled ON orders (shop_id, fulfilled_at);
+    CREATE TABLE IF NOT EXISTS order_items (
+        order_id TEXT NOT NULL,
+        product_id TEXT,
+        variant_id INTEGER,
+        sku TEXT,
+        title TEXT,
+        quantity INTEGER NOT NULL,
+        price INTEGER,
+        status TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id);
+    CREATE INDEX IF NOT EXISTS idx_order_items_sku ON order_items (sku);
+    CREATE TABLE IF NOT EXISTS sync_state (
+        shop_id TEXT PRIMARY KEY,
+        watermark TEXT,
+        synced_at REAL NOT NULL,
+        full_synced_at REAL
+    );
+    """
+
+    def __init__(
+        self,
+        path: str = MEMORY,
+        resync_window: timedelta = RESYNC_WINDOW,
+        full_resync_interval: float = FULL_RESYNC_INTERVAL,
+    ):
+        super().__init__(path)
+        self.resync_window = resync_window
+        self.full_resync_interval = full_resync_interval
+
+    # --- Sync ---
+
+    async def sync(
+        self, service: PrintifyService, shop_id: str | None = None, full: bool = False
+    ) -> dict:
+        """ショップの注文をミラーに取り込む。`full` なら全ページを読み直す
+
+        前回の全件同期から `full_resync_interval` 秒以上経っていれば、`full` でなくても
+        全件同期する。
+        """
+        sid = service.resolve_shop_id(shop_id)
+        state = await self._run(self._get_state, sid)
+        if not full and state:
+            last_full = state["full_synced_at"]
+            full = last_full is None or time.time() - last_full >= self.full_resync_interval
+        cutoff = None
+        if not full and state and state["watermark"]:
+            watermark = datetime.fromisoformat(state["watermark"])
+            cutoff = (watermark - self.resync_window).strftime("%Y-%m-%d %H:%M:%S")
+        full = cutoff is None
+
+        fetched = 0
+        newest = state["watermark"] if state else None
+        batch: list[dict] = []
+        async with contextlib.aclosing(service.iter_orders(shop_id=sid)) as orders:
+            async for order in orders:
+                created_at = normalize_timestamp(order.get("created_at"))
+                if cutoff and created_at and created_at < cutoff:
+                    break
+                if created_at and (newest is None or created_at > newest):
+                    newest = created_at
+                batch.append(order)
+                fetched += 1
+                if len(batch) >= UPSERT_BATCH:
+                    await self._run(self._upsert, sid, batch)
+                    batch = []
+        await self._run(self._upsert, sid, batch)
+        await self._run(self._set_state, sid, newest, full)
+
+        logger.info(f"Order sync for shop {sid}: {fetched} orders fetched (full={full})")
+        return {"shop_id": sid, "fetched": fetched, "full": full, **await self.status(sid)}
+
+    @staticmethod
+    def _get_state(conn, shop_id: str):
+        return conn.execute(
+            "SELECT watermark, synced_at, full_synced_at FROM sync_state WHERE shop_id = ?",
+            (shop_id,),
+        ).fetchone()
+
+    @staticmethod
+    def _set_state(conn, shop_id: str, watermark: str | None, full: bool) -> None:
+        now = time.time()
+        conn.execute(
+            """
+            INSERT INTO sync_state (shop_id, watermark, synced_at, full_synced_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (shop_id) DO UPDATE SET
+                watermark = excluded.watermark,
+                synced_at = excluded.synced_at,
+                full_synced_at = COALESCE(excluded.full_synced_at, full_synced_at)
+            """,
+            (shop_id, watermark, now, now if full else None),
+        )
+
+    @staticmethod
+    def _upsert(conn, shop_id: str, orders: list[dict]) -> None:
+        if not orders:
+            return
+        conn.executemany(
+            "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_order_row(shop_id, o) for o in orders],
+        )
+        conn.executemany(
+            "DELETE FROM order_items WHERE order_id = ?", [(str(o["id"]),) for o in orders]
+        )
+        conn.executemany(
+            "INSERT INTO order_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [row for o in orders for row in _item_rows(o)],
+        )
+
+    # --- Queries ---
+
+    async def status(self, shop_id: str) -> dict:
+        def query(conn):
+            count = conn.execute(
+                "SELECT COUNT(*) FROM orders WHERE shop_id = ?", (shop_id,)
+            ).fetchone()[0]
+            state = self._get_state(conn, shop_id)
+            return {
+                "orders_stored": count,
+                "newest_order_at": state["watermark"] if state else None,
+                "synced_at": state["synced_at"] if state else None,
+            }
+
+        return await self._run(query)
+
+    @staticmethod
+    def _filters(
+        shop_id: str,
+        status: str | None,
+        since: str | None,
+        until: str | None,
+        sku: str | None,
+        date_field: str,
+    ) -> tuple[str, list]:
+        if date_field not in DATE_FIELDS:
+            raise ValueError(f"date_field must be one of {', '.join(DATE_FIELDS)}")
+        where = ["o.shop_id = ?"]
+        params: list = [shop_id]
+        if status:
+            where.append("o.status = ?")
+            params.append(status)
+        if since:
+            where.append(f"o.{date_field} >= ?")
+            params.append(_filter_timestamp(since, "since"))
+        if until:
+            where.append(f"o.{date_field} < ?")
+            params.append(_filter_timestamp(until, "until"))
+        if sku:
+            where.append(
+                "EXISTS (SELECT 1 FROM order_items s WHERE s.order_id = o.id AND s.sku = ?)"
+            )
+            params.append(sku)
+        return " AND ".join(where), params
+
+    async def query(
+        self,
+        shop_id: str,
+        status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        sku: str | None = None,
+        date_field: str = "created_at",
+        limit: int = 50,
+    ) -> list[dict]:
+        where, params = self._filters(shop_id, status, since, until, sku, date_field)
+
+        def query(conn):
+            rows = conn.execute(
+                f"""
+                SELECT o.id, o.status, o.created_at, o.fulfilled_at, o.total_price, o.country
+                FROM orders o WHERE {where}
+                ORDER BY o.{date_field} DESC LIMIT ?
+                """,
+                [*params, limit],
+            ).fetchall()
+            results = []
+            for row in rows:
+                items = conn.execute(
+                    "SELECT sku, quantity FROM order_items WHERE order_id = ?", (row["id"],)
+                ).fetchall()
+                results.append({
+                    **dict(row),
+                    "items": [{"sku": i["sku"], "quantity": i["quantity"]} for i in items],
+                })
+            return results
+
+        return await self._run(query)
+
+    async def stats(
+        self,
+        shop_id: str,
+        status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        sku: str | None = None,
+        date_field: str = "created_at",
+        group_by: str | None = None,
+    ) -> dict:
+        """注文数・数量・売上（total_price、セント単位）を集計する"""
+        where, params = self._filters(shop_id, status, since, until, sku, date_field)
+        if group_by is not None and group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+
+        def query(conn):
+            totals = conn.execute(
+                f"""
+                SELECT COUNT(*) AS orders,
+                       COALESCE(SUM(o.total_price), 0) AS revenue,
+                       COALESCE(SUM(o.total_shipping), 0) AS shipping,
+                       COALESCE(SUM(o.total_tax), 0) AS tax
+                FROM orders o WHERE {where}
+                """,
+                params,
+            ).fetchone()
+            result = dict(totals)
+            result["items"] = conn.execute(
+                f"""
+                SELECT COALESCE(SUM(i.quantity), 0) FROM order_items i
+                JOIN orders o ON o.id = i.order_id WHERE {where}
+                """,
+                params,
+            ).fetchone()[0]
+            if group_by == "sku":
+                # SKU 単位では注文数と数量・明細売上を集計する
+                rows = conn.execute(
+                    f"""
+                    SELECT i.sku AS key, COUNT(DISTINCT o.id) AS orders,
+                           SUM(i.quantity) AS items,
+                           COALESCE(SUM(i.price * i.quantity), 0) AS revenue
+                    FROM order_items i JOIN orders o ON o.id = i.order_id
+                    WHERE {where} GROUP BY key ORDER BY items DESC
+                    """,
+                    params,
+                ).fetchall()
+                result["groups"] = [dict(r) for r in rows]
+            elif group_by:
+                key = GROUP_BY[group_by].format(date_field=date_field)
+                rows = conn.execute(
+                    f"""
+                    SELECT {key} AS key, COUNT(*) AS orders,
+                           COALESCE(SUM(o.total_price), 0) AS revenue
+                    FROM orders o WHERE {where} GROUP BY key ORDER BY key
+                    """,
+                    params,
+                ).fetchall()
+                result["groups"] = [dict(r) for r in rows]
+            return result
+
+        return await self._run(query)
@@ -1,18 +1,119 @@
 import asyncio
+import functools
 import logging
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from pathlib import Path
 
 import httpx
 
+from src.services.cache import ConditionalCache, SingleFlight, TTLCache
+from src.services.diff import diff_product
+from src.services.image_index import ImageIndex, file_digest, image_key
+from src.services.metrics import (
+    API_DURATION,
+    API_REQUESTS,
+    API_RETRIES,
+    RATE_LIMIT_SLEEP,
+    RATE_LIMITED,
+    Snapshot,
+    endpoint_label,
+)
+from src.services.rate_limit import RateLimiter
+from src.services.shared_state import SharedState
+from src.services.shop_registry import SHOP_TTL, ShopRegistry
+from src.services.streaming import Base64FileBody
+from src.services.tracing import span
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://api.printify.com"
+UPLOAD_PATH = "/v1/uploads/images.json"
 MAX_RETRIES = 3
 RATE_LIMIT_THRESHOLD = 5
+CACHE_MAXSIZE = 512
+CONDITIONAL_CACHE_MAXSIZE = 256  # 検証子（ETag / Last-Modified）付きで本文を保持する GET の数
+
+# 一括処理の並列度（最大 8）と自動ページングの先読みを同時に流せるコネクション数
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0
+)
+DEFAULT_TIMEOUT = httpx.Timeout(connect=10.0, read=30.0, write=30.0, pool=10.0)
+PAGE_PREFETCH = 3  # 自動ページングで同時に先読みするページ数
+PRODUCTS_PAGE_SIZE = 50  # Printify の最大値
+ORDERS_PAGE_SIZE = 10
+
+# カタログはほぼ変化しないため、エンドポイントごとの TTL（秒）でキャッシュする
+CATALOG_TTL = {
+    "blueprints": 24 * 3600,
+    "blueprint": 24 * 3600,
+    "print_providers": 6 * 3600,
+    "print_provider": 24 * 3600,
+    "variants": 3600,
+}
+
+# ショップの商品・注文の GET も TTL 付きでキャッシュする。このサーバー経由の書き込みは
+# 該当キーを無効化・更新するので、TTL は他経路（管理画面や Printify 側の処理）での
+# 変更を拾うまでの上限になる
+RESOURCE_TTL = {
+    "products": 300,
+    "product": 300,
+    "orders": 60,  # ステータスは Printify 側で進むので短め
+    "order": 60,
+}
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cache_key(path: str, params: dict) -> tuple:
+    return (path, tuple(sorted(params.items())))
 
 
 class PrintifyService:
-    def __init__(self, api_key: str, shop_id: str | None = None):
+    def __init__(
+        self,
+        api_key: str,
+        shop_id: str | None = None,
+        rate_limiter: RateLimiter | None = None,
+        image_index: ImageIndex | None = None,
+        upload_dir: str | None = None,
+        shop_ttl: float = SHOP_TTL,
+        transport: httpx.AsyncBaseTransport | None = None,
+        limits: httpx.Limits | None = None,
+        timeout: httpx.Timeout | None = None,
+        http2: bool = False,
+        shared: SharedState | None = None,
+    ):
         self.shop_id = shop_id
+        self.image_index = image_index
+        self.upload_dir = Path(upload_dir).resolve() if upload_dir else None
+        self.rate_limiter = rate_limiter or RateLimiter(margin=RATE_LIMIT_THRESHOLD)
+        self.cache = TTLCache(maxsize=CACHE_MAXSIZE)
+        self.conditional = ConditionalCache(maxsize=CONDITIONAL_CACHE_MAXSIZE)
+        self._inflight = SingleFlight()
+        # 複数ワーカー時: 他のワーカーにまだ伝えていない無効化と、読み込み済みの位置
+        self.shared = shared
+        self._unpublished: list[str] = []
+        self._shared_cursor: int | None = None
+        self.shops = ShopRegistry(lambda: self._get("/v1/shops.json"), ttl=shop_ttl)
+        self.limits = limits or DEFAULT_LIMITS
+        if http2 and not _h2_available():
+            logger.warning(
+                "HTTP2 is enabled but the h2 package is not installed "
+                "(install the http2 extra). Falling back to HTTP/1.1"
+            )
+            http2 = False
+        self._http2 = http2
+        self.in_flight = 0  # 送信中のリクエスト数（コネクションプールの使用状況）
+        self.peak_in_flight = 0
         self._client = httpx.AsyncClient(
             base_url=BASE_URL,
             headers={
@@ -20,41 +121,205 @@ class PrintifyService:
                 "user-agent": "printify-mcp-server/0.1.0",
                 "content-type": "application/json",
             },
-            timeout=30.0,
+            timeout=timeout or DEFAULT_TIMEOUT,
+            limits=self.limits,
+            http2=http2,
+            transport=transport,
         )
 
     async def close(self):
         await self._client.aclose()
+        if self.shared is not None:
+            await self.shared.close()
+
+    def pool_stats(self) -> dict:
+        """コネクションプールの使用状況。in_flight が max_connections に張り付いていれば
+        リクエストがプールの空き待ちになっている"""
+        return {
+            "http_version": "HTTP/2" if self._http2 else "HTTP/1.1",
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+    def metrics(self) -> list[Snapshot]:
+        """キャッシュとコネクションプールの値を `/metrics` 用に返す"""
+        stats = self.cache.stats()
+        pool = self.pool_stats()
+        return [
+            Snapshot(
+                "counter",
+                "printify_cache_lookups_total",
+                "Response cache lookups by result",
+                [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])],
+            ),
+            Snapshot(
+                "gauge",
+                "printify_cache_hit_ratio",
+                "Response cache hit ratio since start",
+                [({}, stats["hit_ratio"])],
+            ),
+            Snapshot(
+                "gauge", "printify_cache_entries", "Response cache entries", [({}, stats["size"])]
+            ),
+            Snapshot(
+                "counter",
+                "printify_cache_revalidated_total",
+                "Expired cache entries reused after a 304 Not Modified",
+                [({}, self.conditional.revalidated)],
+            ),
+            Snapshot(
+                "gauge",
+                "printify_rate_limit_tokens",
+                "Estimated rate limit tokens left (negative: requests queued)",
+                [({"bucket": name}, b.tokens) for name, b in self.rate_limiter.buckets.items()],
+            ),
+            Snapshot(
+                "gauge",
+                "printify_http_in_flight",
+                "Printify API requests in flight",
+                [({}, pool["in_flight"])],
+            ),
+            Snapshot(
+                "gauge",
+                "printify_http_peak_in_flight",
+                "Peak Printify API requests in flight since start",
+                [({}, pool["peak_in_flight"])],
+            ),
+            Snapshot(
+                "gauge",
+                "printify_http_max_connections",
+                "Connection pool size",
+                [({}, pool["max_connections"])],
+            ),
+        ]
+
+    async def _send(self, method: str, path: str, endpoint: str, **kwargs) -> httpx.Response:
+        """1回分の HTTP 呼び出し（コネクションプールの使用状況とレイテンシを記録する）"""
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        status = "error"
+        started = time.perf_counter()
+        try:
+            with span(
+                f"HTTP {method}", **{"http.request.method": method, "url.template": endpoint}
+            ) as current:
+                response = await self._client.request(method, path, **kwargs)
+                if current is not None:
+                    current.set_attribute("http.response.status_code", response.status_code)
+            status = str(response.status_code)
+            return response
+        finally:
+            self.in_flight -= 1
+            API_DURATION.observe(time.perf_counter() - started, method=method, endpoint=endpoint)
+            API_REQUESTS.inc(method=method, endpoint=endpoint, status=status)
 
     async def _request(
-        self, method: str, path: str, **kwargs
+        self, method: str, path: str, conditional: bool = False, **kwargs
+    ) -> dict | list:
+        """`conditional=True` の GET は前回の検証子を送り、304 なら保持している本文を返す"""
+        endpoint = endpoint_label(path)
+        with span(
+            "printify.request", **{"http.request.method": method, "url.template": endpoint}
+        ):
+            return await self._request_with_retries(method, path, endpoint, conditional, **kwargs)
+
+    async def _request_with_retries(
+        self, method: str, path: str, endpoint: str, conditional: bool, **kwargs
     ) -> dict | list:
+        key = _cache_key(path, kwargs.get("params") or {}) if conditional else None
+        headers = kwargs.pop("headers", None) or {}
         last_exc = None
         for attempt in range(MAX_RETRIES):
-            try:
-                response = await self._client.request(method, path, **kwargs)
-                response.raise_for_status()
-                # プロアクティブレート制限
-                remaining = response.headers.get("X-RateLimit-Remaining")
-                if remaining is not None and int(remaining) < RATE_LIMIT_THRESHOLD:
-                    reset = float(response.headers.get("X-RateLimit-Reset", "1"))
-                    logger.info(f"Rate limit low ({remaining} remaining). Sleeping {reset}s")
-                    await asyncio.sleep(reset)
-                if response.status_code == 204:
-                    return {}
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429:
-                    wait = float(e.response.headers.get("Retry-After", 2 ** attempt))
-                    logger.warning(f"Rate limited. Retrying in {wait}s (attempt {attempt + 1})")
-                    await asyncio.sleep(wait)
-                    last_exc = e
-                    continue
-                raise
+            with span("printify.attempt", attempt=attempt + 1):
+                # プロアクティブレート制限（トークンを予約し、順番が来るまで待つ）
+                with span("printify.rate_limit_wait") as current:
+                    waited = await self.rate_limiter.acquire(method, path)
+                    if current is not None:
+                        current.set_attribute("wait_seconds", waited)
+                RATE_LIMIT_SLEEP.inc(waited)
+                try:
+                    cached = self.conditional.get(key) if conditional else None
+                    validators = cached[0] if cached else {}
+                    response = await self._send(
+                        method, path, endpoint, headers={**headers, **validators} or None, **kwargs
+                    )
+                    self.rate_limiter.update(response.headers)
+                    if validators and response.status_code == 304:
+                        return self.conditional.revalidate(key, cached[1])
+                    response.raise_for_status()
+                    if response.status_code == 204:
+                        return {}
+                    body = response.json()
+                    if conditional:
+                        self.conditional.store(key, response.headers, body)
+                    return body
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 429:
+                        wait = float(e.response.headers.get("Retry-After", 2 ** attempt))
+                        logger.warning(
+                            f"Rate limited. Retrying in {wait}s (attempt {attempt + 1})"
+                        )
+                        self.rate_limiter.penalize(method, path, wait)
+                        RATE_LIMITED.inc(method=method, endpoint=endpoint)
+                        if attempt + 1 < MAX_RETRIES:
+                            API_RETRIES.inc(method=method, endpoint=endpoint)
+                        last_exc = e
+                        continue
+                    raise
         raise last_exc
 
-    async def _get(self, path: str, **params) -> dict | list:
-        return await self._request("GET", path, params=params)
+    async def _get(self, path: str, conditional: bool = False, **params) -> dict | list:
+        # 同一パス・パラメータの GET が実行中なら、その結果を共有する
+        return await self._inflight.do(
+            _cache_key(path, params),
+            lambda: self._request("GET", path, conditional=conditional, params=params),
+        )
+
+    async def _cached_get(self, path: str, ttl: float, **params) -> dict | list:
+        # TTL が切れたら条件付き GET で取り直す（変わっていなければ本文を再利用する）
+        return await self.cache.get_or_fill(
+            _cache_key(path, params), ttl, lambda: self._get(path, conditional=True, **params)
+        )
+
+    async def _read(self, path: str, ttl: float, cache: bool, **params) -> dict | list:
+        # cache=False はキャッシュを読みも書きもしない（カタログインデックスの巡回や、
+        # 差分更新の比較元のように最新の値が必要な場合）
+        if cache:
+            return await self._cached_get(path, ttl, **params)
+        return await self._get(path, **params)
+
+    def _invalidate(self, *paths: str) -> None:
+        """`paths` の GET キャッシュ（全パラメータ分）と実行中の GET を無効化する。
+        複数ワーカー時は次の `sync_shared` で他のワーカーにも伝える"""
+        if self.shared is not None:
+            self._unpublished += paths
+        self._drop(paths)
+
+    def _drop(self, paths) -> None:
+        targets = set(paths)
+
+        def match(key) -> bool:
+            return isinstance(key, tuple) and key[0] in targets
+
+        self.cache.delete_where(match)
+        self._inflight.forget_where(match)
+
+    async def sync_shared(self) -> None:
+        """このワーカーの無効化を公開し、他のワーカーの無効化をキャッシュに反映する
+        （`SYNC_INTERVAL` ごとのジョブ。他のワーカーの書き込みはこの間隔の分だけ遅れて届く）"""
+        if self.shared is None:
+            return
+        if self._shared_cursor is None:
+            self._shared_cursor = await self.shared.cursor()
+        if self._unpublished:
+            paths = list(self._unpublished)
+            await self.shared.publish(paths)
+            del self._unpublished[: len(paths)]
+        self._shared_cursor, paths = await self.shared.poll(self._shared_cursor)
+        if paths:
+            self._drop(paths)
 
     async def _post(self, path: str, data: dict | None = None) -> dict:
         return await self._request("POST", path, json=data)
@@ -65,109 +330,299 @@ class PrintifyService:
     async def _delete(self, path: str) -> dict:
         return await self._request("DELETE", path)
 
-    def _shop_path(self, suffix: str, shop_id: str | None = None) -> str:
+    async def _paginate(
+        self,
+        path: str,
+        page_size: int,
+        max_items: int | None = None,
+        concurrency: int = PAGE_PREFETCH,
+    ) -> AsyncIterator[dict]:
+        """ページ付き一覧の全アイテムを順番に yield する
+
+        1ページ目で last_page が分かった後は、最大 `concurrency` ページを並行して先読みする。
+        `max_items` を指定した場合は、それを満たすのに必要なページまでしか取得しない。
+        """
+        first = await self._get(path, page=1, limit=page_size)
+        last_page = int(first.get("last_page") or 1)
+        if max_items is not None:
+            last_page = min(last_page, max(1, math.ceil(max_items / page_size)))
+
+        count = 0
+        pending: deque[asyncio.Future] = deque()
+        next_page = 2
+        try:
+            page = first
+            while True:
+                # 現在のページを返している間に次のページを取得しておく
+                while next_page <= last_page and len(pending) < concurrency:
+                    pending.append(
+                        asyncio.ensure_future(self._get(path, page=next_page, limit=page_size))
+                    )
+                    next_page += 1
+                for item in page.get("data", []):
+                    if max_items is not None and count >= max_items:
+                        return
+                    yield item
+                    count += 1
+                if not pending:
+                    return
+                page = await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def resolve_shop_id(self, shop_id: str | None = None) -> str:
         sid = shop_id or self.shop_id
         if not sid:
             raise ValueError("shop_id is required. Set PRINTIFY_SHOP_ID or call list_shops first.")
-        return f"/v1/shops/{sid}/{suffix}"
+        # 一覧にない ID は、一覧が古ければ追加されたばかりかもしれないので API に任せる
+        if self.shops.contains(sid) is False:
+            raise ValueError(
+                f"Shop {sid} not found. Call list_shops(refresh=true) to see available shops."
+            )
+        return str(sid)
+
+    def _shop_path(self, suffix: str, shop_id: str | None = None) -> str:
+        return f"/v1/shops/{self.resolve_shop_id(shop_id)}/{suffix}"
 
     # --- Shops ---
 
-    async def list_shops(self) -> list[dict]:
-        return await self._get("/v1/shops.json")
+    async def list_shops(self, refresh: bool = False) -> list[dict]:
+        return await self.shops.all(refresh=refresh)
 
     async def get_shop(self, shop_id: str) -> dict | None:
-        shops = await self.list_shops()
-        return next((s for s in shops if str(s["id"]) == str(shop_id)), None)
+        return await self.shops.get(shop_id)
 
     # --- Products ---
 
     async def list_products(
         self, page: int = 1, limit: int = 10, shop_id: str | None = None
     ) -> dict:
-        return await self._get(
-            self._shop_path("products.json", shop_id=shop_id), page=page, limit=limit
+        return await self._cached_get(
+            self._shop_path("products.json", shop_id=shop_id),
+            RESOURCE_TTL["products"],
+            page=page,
+            limit=limit,
         )
 
-    async def get_product(self, product_id: str, shop_id: str | None = None) -> dict:
-        return await self._get(
-            self._shop_path(f"products/{product_id}.json", shop_id=shop_id)
+    def iter_products(
+        self,
+        shop_id: str | None = None,
+        max_items: int | None = None,
+        page_size: int = PRODUCTS_PAGE_SIZE,
+    ) -> AsyncIterator[dict]:
+        return self._paginate(
+            self._shop_path("products.json", shop_id=shop_id), page_size, max_items=max_items
         )
 
+    async def get_product(
+        self,
+        product_id: str,
+        shop_id: str | None = None,
+        cache: bool = True,
+        refresh: bool = False,
+    ) -> dict:
+        """`refresh=True` はキャッシュを使わずに取り直し、キャッシュもその値で置き換える。
+        パブリッシュ中（`is_locked`）の商品は Printify 側ですぐ状態が変わるため
+        キャッシュに残さない"""
+        path = self._shop_path(f"products/{product_id}.json", shop_id=shop_id)
+        key = _cache_key(path, {})
+        if refresh:
+            self.cache.delete(key)
+        product = await self._read(path, RESOURCE_TTL["product"], cache)
+        if cache and isinstance(product, dict) and product.get("is_locked"):
+            self.cache.delete(key)
+        return product
+
+    def _product_written(self, product_id: str, shop_id: str | None, product: dict | None):
+        """商品への書き込み後に、その商品の詳細とショップの一覧ページを無効化する。
+        書き込みのレスポンスが商品本体なら、詳細はそれで更新しておく"""
+        detail = self._shop_path(f"products/{product_id}.json", shop_id=shop_id)
+        self._invalidate(detail, self._shop_path("products.json", shop_id=shop_id))
+        if product and product.get("id") and not product.get("is_locked"):
+            self.cache.set(_cache_key(detail, {}), product, RESOURCE_TTL["product"])
+
     async def create_product(self, data: dict, shop_id: str | None = None) -> dict:
-        return await self._post(
+        result = await self._post(
             self._shop_path("products.json", shop_id=shop_id), data=data
         )
+        self._product_written(str(result.get("id")), shop_id, result)
+        return result
 
     async def update_product(
         self, product_id: str, data: dict, shop_id: str | None = None
     ) -> dict:
-        return await self._put(
+        result = await self._put(
             self._shop_path(f"products/{product_id}.json", shop_id=shop_id), data=data
         )
+        self._product_written(product_id, shop_id, result)
+        return result
+
+    async def patch_product(
+        self, product_id: str, data: dict, shop_id: str | None = None
+    ) -> dict | None:
+        """現在の商品と比較し、変更のあったフィールドだけを PUT する
+
+        変更がなければ API を呼ばずに None を返す。
+        """
+        current = await self.get_product(product_id, shop_id=shop_id, cache=False)
+        patch = diff_product(current, data)
+        if not patch:
+            logger.info(f"Product {product_id} unchanged. Skipping update")
+            return None
+        return await self.update_product(product_id, patch, shop_id=shop_id)
 
     async def delete_product(self, product_id: str, shop_id: str | None = None) -> dict:
-        return await self._delete(
+        result = await self._delete(
             self._shop_path(f"products/{product_id}.json", shop_id=shop_id)
         )
+        self._product_written(product_id, shop_id, None)
+        return result
 
     async def publish_product(
         self, product_id: str, data: dict, shop_id: str | None = None
     ) -> dict:
-        return await self._post(
+        result = await self._post(
             self._shop_path(f"products/{product_id}/publish.json", shop_id=shop_id),
             data=data,
         )
+        # パブリッシュで is_locked・external が変わるので、詳細も取り直させる
+        self._product_written(product_id, shop_id, None)
+        return result
 
     # --- Catalog ---
 
     async def list_blueprints(self) -> list[dict]:
-        return await self._get("/v1/catalog/blueprints.json")
+        return await self._cached_get(
+            "/v1/catalog/blueprints.json", CATALOG_TTL["blueprints"]
+        )
 
     async def get_blueprint(self, blueprint_id: int) -> dict:
-        return await self._get(f"/v1/catalog/blueprints/{blueprint_id}.json")
+        return await self._cached_get(
+            f"/v1/catalog/blueprints/{blueprint_id}.json", CATALOG_TTL["blueprint"]
+        )
 
-    async def get_print_providers(self, blueprint_id: int) -> list[dict]:
-        return await self._get(
-            f"/v1/catalog/blueprints/{blueprint_id}/print_providers.json"
+
+    async def get_print_providers(self, blueprint_id: int, cache: bool = True) -> list[dict]:
+        return await self._read(
+            f"/v1/catalog/blueprints/{blueprint_id}/print_providers.json",
+            CATALOG_TTL["print_providers"],
+            cache,
+        )
+
+    async def get_print_provider(self, provider_id: int, cache: bool = True) -> dict:
+        return await self._read(
+            f"/v1/catalog/print_providers/{provider_id}.json",
+            CATALOG_TTL["print_provider"],
+            cache,
         )
 
-    async def get_variants(self, blueprint_id: int, provider_id: int) -> dict:
-        return await self._get(
-            f"/v1/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/variants.json"
+    async def get_variants(self, blueprint_id: int, provider_id: int, cache: bool = True) -> dict:
+        return await self._read(
+            f"/v1/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/variants.json",
+            CATALOG_TTL["variants"],
+            cache,
         )
 
     # --- Images ---
 
+    def _staged_file(self, path: str) -> Path:
+        """アップロード用ステージングディレクトリ内のファイルパスを検証して返す"""
+        if self.upload_dir is None:
+            raise ValueError("File uploads are disabled. Set UPLOAD_DIR to enable them.")
+        resolved = (self.upload_dir / path).resolve()
+        if not resolved.is_relative_to(self.upload_dir):
+            raise ValueError(f"path must be inside the upload directory: {path}")
+        if not resolved.is_file():
+            raise ValueError(f"File not found in the upload directory: {path}")
+        return resolved
+
+    async def _upload_file(self, file_name: str, path: Path) -> dict:
+        body = Base64FileBody(path, {"file_name": file_name}, "contents")
+        return await self._request(
+            "POST", UPLOAD_PATH, content=body, headers={"content-length": str(len(body))}
+        )
+
     async def upload_image(
-        self, file_name: str, url: str | None = None, contents: str | None = None
+        self,
+        file_name: str,
+        url: str | None = None,
+        contents: str | None = None,
+        path: str | None = None,
     ) -> dict:
-        data = {"file_name": file_name}
         if url:
-            data["url"] = url
+            data = {"file_name": file_name, "url": url}
+            key = None if self.image_index is None else image_key(url=url)
+            upload = functools.partial(self._post, UPLOAD_PATH, data=data)
         elif contents:
-            data["contents"] = contents
+            data = {"file_name": file_name, "contents": contents}
+            key = None if self.image_index is None else image_key(contents=contents)
+            upload = functools.partial(self._post, UPLOAD_PATH, data=data)
+        elif path:
+            file_path = self._staged_file(path)
+            key = None
+            if self.image_index is not None:
+                key = f"sha256:{await asyncio.to_thread(file_digest, str(file_path))}"
+            upload = functools.partial(self._upload_file, file_name, file_path)
         else:
-            raise ValueError("Either url or contents (base64) is required")
-        return await self._post("/v1/uploads/images.json", data=data)
+            raise ValueError("Either url or contents (base64), or a staged file path is required")
+        if key is None:
+            return await upload()
+
+        # 同じ内容・URL の画像はアップロード済みのレコードを返す
+        cached = await self.image_index.get(key)
+        if cached is not None:
+            logger.info(f"Image already uploaded as {cached['id']}. Skipping upload")
+            return cached
+
+        async def upload_and_index():
+            record = await upload()
+            if record.get("id"):
+                await self.image_index.put(key, record)
+            return record
+
+        return await self._inflight.do(("upload", key), upload_and_index)
 
     # --- Orders ---
 
     async def list_orders(
         self, page: int = 1, limit: int = 10, shop_id: str | None = None
     ) -> dict:
-        return await self._get(
-            self._shop_path("orders.json", shop_id=shop_id), page=page, limit=limit
+        return await self._cached_get(
+            self._shop_path("orders.json", shop_id=shop_id),
+            RESOURCE_TTL["orders"],
+            page=page,
+            limit=limit,
         )
 
-    async def get_order(self, order_id: str, shop_id: str | None = None) -> dict:
-        return await self._get(
-            self._shop_path(f"orders/{order_id}.json", shop_id=shop_id)
+    def iter_orders(
+        self,
+        shop_id: str | None = None,
+        max_items: int | None = None,
+        page_size: int = ORDERS_PAGE_SIZE,
+    ) -> AsyncIterator[dict]:
+        return self._paginate(
+            self._shop_path("orders.json", shop_id=shop_id), page_size, max_items=max_items
+        )
+
+    async def get_order(
+        self, order_id: str, shop_id: str | None = None, cache: bool = True
+    ) -> dict:
+        return await self._read(
+            self._shop_path(f"orders/{order_id}.json", shop_id=shop_id),
+            RESOURCE_TTL["order"],
+            cache,
         )
 
     async def submit_order(self, order_id: str, shop_id: str | None = None) -> dict:
-        return await self._post(
+        result = await self._post(
             self._shop_path(
                 f"orders/{order_id}/send_to_production.json", shop_id=shop_id
             )
         )
+        self._invalidate(
+            self._shop_path(f"orders/{order_id}.json", shop_id=shop_id),
+            self._shop_path("orders.json", shop_id=shop_id),
+        )
+        return result
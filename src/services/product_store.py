@@ -0,0 +1,328 @@
+"""商品のローカルミラー（SQLite）と変更検知
+
+Printify の商品一覧には「更新日時以降」の絞り込みも並び順の保証もないため、
+同期のたびに `list_products` を全ページ辿る（ページは先読みする）。各商品の
+内容ハッシュを前回と比べ、変わった商品だけを書き込んで `product_changes` に
+追加・更新・削除を記録する。先読み中に商品が増減するとページ境界がずれて商品を
+読み飛ばすことがあるため、`REMOVE_AFTER_MISSES` 回続けて一覧に現れなかった商品だけを
+削除扱いにする。公開状態は `external`（チャネル上の出品）・`visible`・
+`is_locked` から求めて `publish_state` として索引する。
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import time
+
+from src.services.printify import PrintifyService
+from src.services.store import SqliteStore, normalize_timestamp
+
+logger = logging.getLogger(__name__)
+
+UPSERT_BATCH = 100
+MAX_CHANGES = 10000  # ショップごとに保持する変更履歴の件数
+REMOVE_AFTER_MISSES = 2  # この回数続けて一覧になければ削除とみなす
+
+PUBLISH_STATES = ("published", "hidden", "publishing", "unpublished")
+
+
+def publish_state(product: dict) -> str:
+    """`list_products` の説明どおり、external.id があればチャネルに出品済み、
+    visible が true なら公開中。is_locked は公開処理中を表す"""
+    if product.get("is_locked"):
+        return "publishing"
+    if (product.get("external") or {}).get("id"):
+        return "published" if product.get("visible") else "hidden"
+    return "unpublished"
+
+
+def _digest(product: dict) -> str:
+    return hashlib.sha256(json.dumps(product, sort_keys=True).encode()).hexdigest()
+
+
+def _changed_fields(old: dict, new: dict) -> list[str]:
+    return sorted(k for k in old.keys() | new.keys() if old.get(k) != new.get(k))
+
+
+def _product_row(shop_id: str, product: dict, digest: str) -> tuple:
+    external = product.get("external") or {}
+    return (
+        str(product["id"]),
+        shop_id,
+        product.get("title"),
+        product.get("blueprint_id"),
+        product.get("print_provider_id"),
+        publish_state(product),
+        int(bool(product.get("visible"))),
+        int(bool(product.get("is_locked"))),
+        external.get("id"),
+        external.get("handle"),
+        normalize_timestamp(product.get("created_at")),
+        normalize_timestamp(product.get("updated_at")),
+        digest,
+        json.dumps(product),
+    )
+
+
+class ProductStore(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS products (
+        id TEXT PRIMARY KEY,
+        shop_id TEXT NOT NULL,
+        title TEXT,
+        blueprint_id INTEGER,
+        print_provider_id INTEGER,
+        publish_state TEXT NOT NULL,
+        visible INTEGER NOT NULL,
+        is_locked INTEGER NOT NULL,
+        external_id TEXT,
+        external_handle TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        digest TEXT NOT NULL,
+        data TEXT NOT NULL,
+        missed_syncs INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_products_shop_blueprint ON products (shop_id, blueprint_id);
+    CREATE INDEX IF NOT EXISTS idx_products_shop_provider
+        ON products (shop_id, print_provider_id);
+    CREATE INDEX IF NOT EXISTS idx_products_shop_state ON products (shop_id, publish_state);
+    CREATE INDEX IF NOT EXISTS idx_products_shop_updated ON products (shop_id, updated_at);
+    CREATE TABLE IF NOT EXISTS product_tags (
+        product_id TEXT NOT NULL,
+        tag TEXT NOT NULL COLLATE NOCASE,
+        PRIMARY KEY (product_id, tag)
+    );
+    CREATE INDEX IF NOT EXISTS idx_product_tags_tag ON product_tags (tag);
+    CREATE TABLE IF NOT EXISTS product_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        shop_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        change TEXT NOT NULL,
+        fields TEXT,
+        detected_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_product_changes_shop ON product_changes (shop_id, seq);
+    CREATE TABLE IF NOT EXISTS product_sync_state (
+        shop_id TEXT PRIMARY KEY,
+        synced_at REAL NOT NULL
+    );
+    """
+
+    # --- Sync ---
+
+    async def sync(self, service: PrintifyService, shop_id: str | None = None) -> dict:
+        """ショップの商品一覧を読み、追加・更新・削除された商品をミラーに反映する"""
+        sid = service.resolve_shop_id(shop_id)
+        digests, missed = await self._run(self._digests, sid)
+        # 初回同期では全商品が「追加」になるだけなので変更履歴に残さない
+        record = (await self.status(sid))["synced_at"] is not None
+
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen: set[str] = set()
+        batch: list[tuple[dict, str]] = []
+        async with contextlib.aclosing(service.iter_products(shop_id=sid)) as products:
+            async for product in products:
+                pid = str(product["id"])
+                seen.add(pid)
+                digest = _digest(product)
+                if digests.get(pid) == digest:
+                    counts["unchanged"] += 1
+                    continue
+                counts["added" if pid not in digests else "updated"] += 1
+                batch.append((product, digest))
+                if len(batch) >= UPSERT_BATCH:
+                    await self._run(self._upsert, sid, batch, record)
+                    batch = []
+        await self._run(self._upsert, sid, batch, record)
+
+        # 全ページを読み切ったときだけここに来る。一覧になかった商品は見逃し回数を数え、
+        # 続けて見つからなかったものだけ削除する
+        not_seen = [pid for pid in digests if pid not in seen]
+        found_again = [pid for pid in missed if pid in seen]
+        counts["removed"] = await self._run(self._finish, sid, not_seen, found_again, record)
+
+        logger.info(
+            f"Product sync for shop {sid}: {counts['added']} added, "
+            f"{counts['updated']} updated, {counts['removed']} removed"
+        )
+        return {"shop_id": sid, **counts, **await self.status(sid)}
+
+    @staticmethod
+    def _digests(conn, shop_id: str) -> tuple[dict[str, str], set[str]]:
+        """商品 ID ごとの内容ハッシュと、前回の同期で一覧になかった商品 ID を返す"""
+        rows = conn.execute(
+            "SELECT id, digest, missed_syncs FROM products WHERE shop_id = ?", (shop_id,)
+        ).fetchall()
+        return {r["id"]: r["digest"] for r in rows}, {r["id"] for r in rows if r["missed_syncs"]}
+
+    @staticmethod
+    def _upsert(conn, shop_id: str, batch: list[tuple[dict, str]], record: bool) -> None:
+        if not batch:
+            return
+        now = time.time()
+        ids = [(str(p["id"]),) for p, _ in batch]
+        previous = {}
+        for (pid,) in ids:
+            row = conn.execute("SELECT data FROM products WHERE id = ?", (pid,)).fetchone()
+            if row:
+                previous[pid] = json.loads(row["data"])
+        conn.executemany(
+            "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+            [_product_row(shop_id, p, digest) for p, digest in batch],
+        )
+        conn.executemany("DELETE FROM product_tags WHERE product_id = ?", ids)
+        conn.executemany(
+            "INSERT OR IGNORE INTO product_tags VALUES (?, ?)",
+            [(str(p["id"]), tag) for p, _ in batch for tag in p.get("tags") or []],
+        )
+        if not record:
+            return
+        changes = []
+        for product, _ in batch:
+            pid = str(product["id"])
+            if pid in previous:
+                fields = _changed_fields(previous[pid], product)
+                changes.append((shop_id, pid, "updated", json.dumps(fields), now))
+            else:
+                changes.append((shop_id, pid, "added", None, now))
+        conn.executemany(
+            "INSERT INTO product_changes (shop_id, product_id, change, fields, detected_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            changes,
+        )
+
+    @staticmethod
+    def _finish(
+        conn, shop_id: str, not_seen: list[str], found_again: list[str], record: bool
+    ) -> int:
+        """見逃し回数を更新し、続けて見つからなかった商品を削除する。削除件数を返す"""
+        now = time.time()
+        conn.executemany(
+            "UPDATE products SET missed_syncs = 0 WHERE id = ?", [(pid,) for pid in found_again]
+        )
+        conn.executemany(
+            "UPDATE products SET missed_syncs = missed_syncs + 1 WHERE id = ?",
+            [(pid,) for pid in not_seen],
+        )
+        removed = [
+            r["id"]
+            for r in conn.execute(
+                "SELECT id FROM products WHERE shop_id = ? AND missed_syncs >= ?",
+                (shop_id, REMOVE_AFTER_MISSES),
+            )
+        ]
+        ids = [(pid,) for pid in removed]
+        conn.executemany("DELETE FROM products WHERE id = ?", ids)
+        conn.executemany("DELETE FROM product_tags WHERE product_id = ?", ids)
+        if record:
+            conn.executemany(
+                "INSERT INTO product_changes (shop_id, product_id, change, fields, detected_at)"
+                " VALUES (?, ?, 'removed', NULL, ?)",
+                [(shop_id, pid, now) for pid in removed],
+            )
+        conn.execute(
+            """
+            DELETE FROM product_changes WHERE shop_id = ? AND seq <= (
+                SELECT seq FROM product_changes WHERE shop_id = ?
+                ORDER BY seq DESC LIMIT 1 OFFSET ?
+            )
+            """,
+            (shop_id, shop_id, MAX_CHANGES),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO product_sync_state (shop_id, synced_at) VALUES (?, ?)",
+            (shop_id, now),
+        )
+        return len(removed)
+
+    # --- Queries ---
+
+    async def status(self, shop_id: str) -> dict:
+        def query(conn):
+            rows = conn.execute(
+                "SELECT publish_state, COUNT(*) AS n FROM products WHERE shop_id = ?"
+                " GROUP BY publish_state",
+                (shop_id,),
+            ).fetchall()
+            state = conn.execute(
+                "SELECT synced_at FROM product_sync_state WHERE shop_id = ?", (shop_id,)
+            ).fetchone()
+            by_state = {r["publish_state"]: r["n"] for r in rows}
+            return {
+                "products_stored": sum(by_state.values()),
+                "by_publish_state": by_state,
+                "synced_at": state["synced_at"] if state else None,
+            }
+
+        return await self._run(query)
+
+    async def query(
+        self,
+        shop_id: str,
+        publish_state: str | None = None,
+        blueprint_id: int | None = None,
+        print_provider_id: int | None = None,
+        tag: str | None = None,
+        title: str | None = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        if publish_state is not None and publish_state not in PUBLISH_STATES:
+            raise ValueError(f"publish_state must be one of {', '.join(PUBLISH_STATES)}")
+        where = ["p.shop_id = ?"]
+        params: list = [shop_id]
+        if publish_state:
+            where.append("p.publish_state = ?")
+            params.append(publish_state)
+        if blueprint_id is not None:
+            where.append("p.blueprint_id = ?")
+            params.append(blueprint_id)
+        if print_provider_id is not None:
+            where.append("p.print_provider_id = ?")
+            params.append(print_provider_id)
+        if tag:
+            where.append(
+                "EXISTS (SELECT 1 FROM product_tags t WHERE t.product_id = p.id AND t.tag = ?)"
+            )
+            params.append(tag)
+        if title:
+            where.append("p.title LIKE ?")
+            params.append(f"%{title}%")
+
+        def query(conn):
+            rows = conn.execute(
+                f"""
+                SELECT p.id, p.title, p.blueprint_id, p.print_provider_id, p.publish_state,
+                       p.visible, p.is_locked, p.external_id, p.updated_at
+                FROM products p WHERE {' AND '.join(where)}
+                ORDER BY p.updated_at DESC, p.id LIMIT ?
+                """,
+                [*params, limit],
+            ).fetchall()
+            return [
+                {**dict(r), "visible": bool(r["visible"]), "is_locked": bool(r["is_locked"])}
+                for r in rows
+            ]
+
+        return await self._run(query)
+
+    async def changes(self, shop_id: str, since: float | None = None, limit: int = 50) -> list:
+        """検知した変更を新しい順に返す。`since` は UNIX 時刻（秒）"""
+
+        def query(conn):
+            rows = conn.execute(
+                """
+                SELECT c.product_id, c.change, c.fields, c.detected_at, p.title
+                FROM product_changes c LEFT JOIN products p ON p.id = c.product_id
+                WHERE c.shop_id = ? AND c.detected_at >= ?
+                ORDER BY c.seq DESC LIMIT ?
+                """,
+                (shop_id, since or 0, limit),
+            ).fetchall()
+            return [
+                {**dict(r), "fields": json.loads(r["fields"]) if r["fields"] else None}
+                for r in rows
+            ]
+
+        return await self._run(query)
@@ -0,0 +1,177 @@
+"""Printify API 向けのプロアクティブなレート制限
+
+Printify のレート制限（全体 600 req/分、カタログ 100 req/分、
+商品の作成・更新・パブリッシュ 200 req/30分）に合わせたトークンバケットを持ち、
+すべてのリクエストは送信前にトークンを予約する。トークンが不足している場合は
+負の残高として予約するため、同時実行中の呼び出しは一斉に止まらず
+1件ずつ時間をずらして送信される。
+
+複数のワーカープロセスで動かす場合は、予算をワーカー間で共有する
+`SharedRateLimiter` を使う。
+"""
+
+import asyncio
+import logging
+import re
+import time
+
+from httpx import Headers
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_LIMIT = (600, 60.0)  # (リクエスト数, 秒)
+CATALOG_LIMIT = (100, 60.0)
+WRITE_LIMIT = (200, 1800.0)
+LIMITS = {"global": GLOBAL_LIMIT, "catalog": CATALOG_LIMIT, "write": WRITE_LIMIT}
+WINDOWS = 10  # SharedRateLimiter で1つの制限期間を分ける区間の数
+
+# 商品の作成・更新・パブリッシュだけが WRITE_LIMIT の対象（削除・画像アップロード・
+# 注文の送信は全体の制限のみ）
+_WRITE_PATH_RE = re.compile(
+    r"^/v1/shops/[^/]+/products(?:\.json|/[^/]+\.json|/[^/]+/publish\.json)$"
+)
+
+
+class TokenBucket:
+    """予約型トークンバケット（GCRA 相当）
+
+    `reserve()` はトークンを1つ消費し、そのトークンが実際に使えるようになるまでの
+    待ち時間を返す。残高は負になり得るので、後から来た呼び出しほど長く待つ。
+    """
+
+    def __init__(self, limit: int, period: float):
+        self.capacity = float(limit)
+        self.rate = limit / period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        self._refill()
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+    def sync(self, remaining: float) -> None:
+        """サーバーが報告した残量に合わせて見積もりを補正する
+
+        待ち行列がない（残高が正の）ときだけ上方向にも補正し、
+        それ以外はサーバー側の残量より多く見積もらないようにのみ補正する。
+        """
+        self._refill()
+        if self._tokens >= 0:
+            self._tokens = min(self.capacity, remaining)
+        else:
+            self._tokens = min(self._tokens, remaining)
+
+    def penalize(self, seconds: float) -> None:
+        """429 を受けた場合に、少なくとも `seconds` 秒は新しい予約を待たせる"""
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class RateLimiter:
+    """エンドポイントの種類ごとにバケットを束ねたレートリミッター
+
+    全リクエストは "global" を消費し、カタログ（`/v1/catalog/`）は "catalog" を、
+    商品の作成・更新・パブリッシュ（`_WRITE_PATH_RE` に一致する POST / PUT）は "write" を
+    追加で消費する。削除・画像アップロード・注文の送信は "global" のみ。
+    """
+
+    def __init__(self, margin: int = 0, buckets: dict[str, TokenBucket] | None = None):
+        self.margin = margin
+        self.buckets = buckets or {name: TokenBucket(*limit) for name, limit in LIMITS.items()}
+
+    @staticmethod
+    def _names_for(method: str, path: str) -> list[str]:
+        names = ["global"]
+        if method in ("POST", "PUT") and _WRITE_PATH_RE.match(path):
+            names.append("write")
+        elif path.startswith("/v1/catalog/"):
+            names.append("catalog")
+        return names
+
+    def _buckets_for(self, method: str, path: str) -> list[TokenBucket]:
+        return [self.buckets[n] for n in self._names_for(method, path) if n in self.buckets]
+
+    async def acquire(self, method: str, path: str) -> float:
+        """リクエスト1件分のトークンを予約し、必要な時間だけ待つ。待った秒数を返す"""
+        wait = max((b.reserve() for b in self._buckets_for(method, path)), default=0.0)
+        if wait > 0:
+            logger.info(f"Rate limiter delaying {method} {path} by {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def update(self, headers: Headers) -> None:
+        """X-RateLimit-Remaining ヘッダーで全体バケットを補正する"""
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None or "global" not in self.buckets:
+            return
+        try:
+            value = float(remaining)
+        except ValueError:
+            return
+        self.buckets["global"].sync(value - self.margin)
+
+    def penalize(self, method: str, path: str, seconds: float) -> None:
+        for bucket in self._buckets_for(method, path):
+            bucket.penalize(seconds)
+
+
+class SharedRateLimiter(RateLimiter):
+    """`SharedState` 上のカウンターで全ワーカーの予算を共有するレートリミッター
+
+    Printify の制限は API キー単位なので、ワーカーごとにバケットを持つと合計で
+    制限の N 倍まで送ってしまう。各制限を `windows` 個の区間に分け、区間ごとの件数を
+    共有のカウンターで数える（`SharedState.take`）。区間が埋まっていれば次の区間の
+    枠を予約して待つので、トークンバケットと同じく同時実行中の呼び出しは順番に送られる。
+
+    `X-RateLimit-Remaining` はワーカーごとの見積もりを補正するためのもので、
+    共有のカウンターとは合算できないため使わない。429 を受けた場合は、待ち時間の分だけ
+    区間を埋めて全ワーカーの送信を止める（次の `acquire` で反映する）。
+    """
+
+    def __init__(
+        self,
+        state,
+        limits: dict[str, tuple[int, float]] | None = None,
+        windows: int = WINDOWS,
+    ):
+        self.margin = 0
+        self.buckets = {}  # 見積もりはプロセス内に持たない
+        self.state = state
+        # 名前 → (区間あたりの件数, 区間の秒数)
+        self.windows = {
+            name: (max(1, limit // windows), period / windows)
+            for name, (limit, period) in (limits or LIMITS).items()
+        }
+        self._penalties: list[tuple[str, float]] = []
+
+    def _windows_for(self, method: str, path: str) -> list[str]:
+        return [n for n in self._names_for(method, path) if n in self.windows]
+
+    async def acquire(self, method: str, path: str) -> float:
+        while self._penalties:
+            name, seconds = self._penalties.pop(0)
+            await self.state.fill(f"rate:{name}", *self.windows[name], seconds)
+        wait = 0.0
+        for name in self._windows_for(method, path):
+            wait = max(wait, await self.state.take(f"rate:{name}", *self.windows[name]))
+        if wait > 0:
+            logger.info(f"Rate limiter delaying {method} {path} by {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def update(self, headers: Headers) -> None:
+        pass
+
+    def penalize(self, method: str, path: str, seconds: float) -> None:
+        self._penalties += [(name, seconds) for name in self._windows_for(method, path)]
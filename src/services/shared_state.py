@@ -0,0 +1,287 @@
+"""複数のワーカープロセスで共有する状態（`SHARED_STORE`。`WORKERS` が2以上なら必須）
+
+uvicorn の `workers=N` ではワーカーごとにメモリが分かれるため、次のものをここに置く。
+
+- レート制限の予算: Printify の制限は API キー単位なので、全ワーカーで同じ枠を消費する
+  （`SharedRateLimiter`）
+- キャッシュの無効化: 書き込んだワーカー以外のキャッシュからも該当パスを消す
+  （`PrintifyService.sync_shared` が `SYNC_INTERVAL` ごとに送受信する）
+- バックグラウンドジョブのリース: 注文・商品の同期やカタログの巡回を、同じ `DATA_DIR` を
+  使うワーカーのうち1つだけで動かす（`leader_only`）
+
+バックエンドは `SqliteSharedState`（`DATA_DIR` 下。同じホストのワーカー間）と
+`RedisSharedState`（`redis` extra が必要）。Redis なら複数ホストでレート制限の予算と
+キャッシュの無効化を共有できるが、注文・商品のミラーやインデックスは各ホストの
+`DATA_DIR` にあるので、ジョブのリースはホストと `DATA_DIR` ごとに分ける（`lease_scope`）。
+時刻をプロセス間で比較するため壁時計（`time.time()`）を使う。
+"""
+
+import hashlib
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+
+from src.services.background import Job
+from src.services.store import SqliteStore, store_path
+
+BACKENDS = ("sqlite", "redis")
+SYNC_INTERVAL = 1.0  # キャッシュの無効化を送受信する間隔（秒）
+MAX_INVALIDATIONS = 10_000  # 保持する無効化の件数（これより遅れたワーカーは取りこぼす）
+LEASE_INTERVALS = 3  # リースの有効期間（ジョブの実行間隔の何倍か）
+
+
+class SharedState(ABC):
+    """ワーカー間で共有する状態のバックエンド
+
+    - `take` / `fill`: `key` ごとに `window` 秒の区間に区切った件数カウンター
+    - `publish` / `poll` / `cursor`: キャッシュの無効化の連番付きログ
+    - `lease`: 名前付きのリース（期限切れか自分が持っているときだけ取れる）
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.owner = uuid.uuid4().hex  # このプロセスの識別子
+        self.clock = clock
+
+    @abstractmethod
+    async def _incr(self, key: str, slot: int, amount: int, expires: float) -> int:
+        """区間 `slot` のカウンターに `amount` を足し、足した後の値を返す"""
+
+    async def take(self, key: str, limit: int, window: float) -> float:
+        """`key` の枠を1つ予約し、その枠の区間が始まるまでの秒数を返す
+
+        現在の区間が `limit` 件に達していれば次の区間、と空きのある区間まで進む。
+        カウンターは加算だけなので、複数のプロセスから同時に呼ばれても同じ枠は渡さない。
+        """
+        now = self.clock()
+        slot = int(now // window)
+        while await self._incr(key, slot, 1, (slot + 1) * window) > limit:
+            slot += 1
+        return max(0.0, slot * window - now)
+
+    async def fill(self, key: str, limit: int, window: float, seconds: float) -> None:
+        """`seconds` 秒後を含む区間までを埋め、その間は新しい予約を入れさせない"""
+        now = self.clock()
+        for slot in range(int(now // window), int((now + seconds) // window) + 1):
+            await self._incr(key, slot, limit, (slot + 1) * window)
+
+    @abstractmethod
+    async def publish(self, paths: list[str]) -> None:
+        """このプロセスが無効化したパスを他のプロセスに公開する"""
+
+    @abstractmethod
+    async def poll(self, cursor: int) -> tuple[int, list[str]]:
+        """`cursor` より後に他のプロセスが公開した無効化と、次に渡す cursor を返す"""
+
+    @abstractmethod
+    async def cursor(self) -> int:
+        """最新の無効化の位置（起動時はここから読み始める）"""
+
+    @abstractmethod
+    async def lease(self, name: str, ttl: float) -> bool:
+        """リース `name` を `ttl` 秒取る（延長する）。他のプロセスが持っていれば False"""
+
+    async def close(self) -> None:
+        pass
+
+
+class SqliteSharedState(SqliteStore, SharedState):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rate_slots (
+        key TEXT NOT NULL,
+        slot INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        expires REAL NOT NULL,
+        PRIMARY KEY (key, slot)
+    );
+    CREATE INDEX IF NOT EXISTS rate_slots_expires ON rate_slots(expires);
+    CREATE TABLE IF NOT EXISTS invalidations (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner TEXT NOT NULL,
+        path TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        SqliteStore.__init__(self, path)
+        SharedState.__init__(self, clock)
+
+    async def _incr(self, key: str, slot: int, amount: int, expires: float) -> int:
+        now = self.clock()
+
+        def incr(conn):
+            conn.execute("DELETE FROM rate_slots WHERE expires < ?", (now,))
+            return conn.execute(
+                """
+                INSERT INTO rate_slots (key, slot, count, expires) VALUES (?, ?, ?, ?)
+                ON CONFLICT (key, slot) DO UPDATE SET count = count + excluded.count
+                RETURNING count
+                """,
+                (key, slot, amount, expires),
+            ).fetchone()[0]
+
+        return await self._run(incr)
+
+    async def publish(self, paths: list[str]) -> None:
+        def insert(conn):
+            conn.executemany(
+                "INSERT INTO invalidations (owner, path) VALUES (?, ?)",
+                [(self.owner, p) for p in paths],
+            )
+            conn.execute(
+                "DELETE FROM invalidations WHERE seq <= (SELECT MAX(seq) FROM invalidations) - ?",
+                (MAX_INVALIDATIONS,),
+            )
+
+        await self._run(insert)
+
+    async def poll(self, cursor: int) -> tuple[int, list[str]]:
+        def query(conn):
+            return conn.execute(
+                "SELECT seq, owner, path FROM invalidations WHERE seq > ? ORDER BY seq",
+                (cursor,),
+            ).fetchall()
+
+        rows = await self._run(query)
+        if not rows:
+            return cursor, []
+        return rows[-1]["seq"], [r["path"] for r in rows if r["owner"] != self.owner]
+
+    async def cursor(self) -> int:
+        def query(conn):
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+
+        return await self._run(query)
+
+    async def lease(self, name: str, ttl: float) -> bool:
+        now = self.clock()
+
+        def upsert(conn):
+            return conn.execute(
+                """
+                INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires
+                WHERE leases.owner = excluded.owner OR leases.expires < ?
+                RETURNING owner
+                """,
+                (name, self.owner, now + ttl, now),
+            ).fetchone()
+
+        return await self._run(upsert) is not None
+
+    async def close(self) -> None:
+        SqliteStore.close(self)
+
+
+class RedisSharedState(SharedState):
+    """Redis に保存する（`redis.asyncio.Redis(decode_responses=True)` 互換のクライアント）
+
+    キー（`prefix` 以下）:
+    - `<key>:<slot>`: 区間ごとのカウンター（区間の終わりに期限切れ）
+    - `invalidations`（連番をスコアにした sorted set。メンバーは "<連番>:<owner>:<パス>"）、
+      `invalidation_seq`（連番）
+    - `lease:<name>`: リースを持つプロセスの owner
+    """
+
+    def __init__(
+        self, client, prefix: str = "printify-mcp:shared:", clock: Callable[[], float] = time.time
+    ):
+        super().__init__(clock)
+        self.redis = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisSharedState":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("SHARED_STORE=redis requires the redis extra") from e
+        return cls(redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    async def _incr(self, key: str, slot: int, amount: int, expires: float) -> int:
+        counter = self._key(key, str(slot))
+        count = await self.redis.incrby(counter, amount)
+        if count == amount:
+            await self.redis.expireat(counter, int(expires) + 1)
+        return count
+
+    async def publish(self, paths: list[str]) -> None:
+        seq = 0
+        for path in paths:
+            seq = await self.redis.incr(self._key("invalidation_seq"))
+            await self.redis.zadd(self._key("invalidations"), {f"{seq}:{self.owner}:{path}": seq})
+        if seq > MAX_INVALIDATIONS:
+            await self.redis.zremrangebyscore(
+                self._key("invalidations"), "-inf", seq - MAX_INVALIDATIONS
+            )
+
+    async def poll(self, cursor: int) -> tuple[int, list[str]]:
+        members = await self.redis.zrangebyscore(self._key("invalidations"), cursor + 1, "+inf")
+        paths = []
+        for member in members:
+            seq, owner, path = member.split(":", 2)
+            cursor = max(cursor, int(seq))
+            if owner != self.owner:
+                paths.append(path)
+        return cursor, paths
+
+    async def cursor(self) -> int:
+        return int(await self.redis.get(self._key("invalidation_seq")) or 0)
+
+    async def lease(self, name: str, ttl: float) -> bool:
+        key = self._key("lease", name)
+        milliseconds = int(ttl * 1000)
+        if await self.redis.set(key, self.owner, nx=True, px=milliseconds):
+            return True
+        if await self.redis.get(key) == self.owner:
+            await self.redis.pexpire(key, milliseconds)
+            return True
+        return False
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def lease_scope(data_dir: str) -> str:
+    """ホスト名と `DATA_DIR` の絶対パスから、リースを分ける単位の識別子を作る"""
+    path = str(Path(data_dir).resolve())
+    return hashlib.sha256(f"{socket.gethostname()}:{path}".encode()).hexdigest()[:16]
+
+
+def leader_only(state: SharedState, job: Job, scope: str = "") -> Job:
+    """`job` を、同じ `scope` のうちリースを取れた1ワーカーだけで実行するようにする
+
+    リースは実行のたびに延長し、持っているワーカーが止まれば `LEASE_INTERVALS` 回分の
+    間隔の後に他のワーカーが引き継ぐ。
+    """
+    name = f"{job.name}:{scope}" if scope else job.name
+
+    async def run():
+        if await state.lease(name, job.interval * LEASE_INTERVALS):
+            await job.func()
+
+    return Job(job.name, job.interval, run)
+
+
+def create_shared_state(
+    backend: str, data_dir: str | None = None, redis_url: str | None = None
+) -> SharedState:
+    if backend == "sqlite":
+        if not data_dir:
+            raise ValueError("SHARED_STORE=sqlite requires DATA_DIR")
+        return SqliteSharedState(store_path(data_dir, "shared.db"))
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("SHARED_STORE=redis requires REDIS_URL")
+        return RedisSharedState.from_url(redis_url)
+    raise ValueError(f"SHARED_STORE must be one of {', '.join(BACKENDS)}, got {backend!r}")
@@ -0,0 +1,67 @@
+"""ショップ一覧のキャッシュ（ID で引ける辞書）
+
+Printify にはショップ単体の取得 API がなく、`get_shop` は毎回 `/v1/shops.json` を
+読んで線形探索していた。一覧は一度読んで ID で索引し、TTL 経過時または未知の ID を
+引いたときだけ読み直す。ロード済みなら、他のツールに渡された `shop_id` が存在するかを
+API を呼ばずに判定できる。
+"""
+
+import time
+from collections.abc import Awaitable, Callable
+
+SHOP_TTL = 600.0  # 秒
+MISS_REFRESH_INTERVAL = 30.0  # 未知の ID による再読み込みの最短間隔（秒）
+
+
+class ShopRegistry:
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[list[dict]]],
+        ttl: float = SHOP_TTL,
+        miss_refresh_interval: float = MISS_REFRESH_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        self._load = load
+        self._clock = clock
+        self._shops: dict[str, dict] | None = None
+        self._loaded_at = 0.0
+
+    def _age(self) -> float:
+        return self._clock() - self._loaded_at
+
+    @property
+    def fresh(self) -> bool:
+        return self._shops is not None and self._age() < self.ttl
+
+    async def refresh(self) -> list[dict]:
+        shops = await self._load()
+        self._shops = {str(s["id"]): s for s in shops}
+        self._loaded_at = self._clock()
+        return shops
+
+    async def all(self, refresh: bool = False) -> list[dict]:
+        if refresh or not self.fresh:
+            return await self.refresh()
+        return list(self._shops.values())
+
+    async def get(self, shop_id: str) -> dict | None:
+        if not self.fresh:
+            await self.refresh()
+        shop = self._shops.get(str(shop_id))
+        if shop is None and self._age() >= self.miss_refresh_interval:
+            # 新しく追加されたショップかもしれないので読み直す
+            await self.refresh()
+            shop = self._shops.get(str(shop_id))
+        return shop
+
+    def contains(self, shop_id: str) -> bool | None:
+        """API を呼ばずに判定する。未ロードまたは TTL 切れで判定できなければ None。
+        一覧にない ID も、読み込みから `miss_refresh_interval` 以上経っていれば後から
+        追加されたショップかもしれないので None にする（`get` なら読み直す場合）"""
+        if not self.fresh:
+            return None
+        if str(shop_id) in self._shops:
+            return True
+        return False if self._age() < self.miss_refresh_interval else None
@@ -0,0 +1,71 @@
+"""ローカル SQLite ストアの共通基盤
+
+`DATA_DIR` が設定されていればその下のファイルに、未設定ならプロセス内の
+インメモリ DB に保存する。sqlite3 は同期 API なので、操作はスレッドに逃がして
+イベントループを止めないようにする。
+"""
+
+import asyncio
+import sqlite3
+import threading
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+MEMORY = ":memory:"
+
+
+def store_path(data_dir: str | None, name: str) -> str:
+    if not data_dir:
+        return MEMORY
+    return str(Path(data_dir) / name)
+
+
+def normalize_timestamp(value: str | None) -> str | None:
+    """Printify の日時（"2024-01-02 03:04:05+00:00" 等）や日付を UTC の
+    "YYYY-MM-DD HH:MM:SS" に揃え、文字列比較で範囲検索できるようにする"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(UTC).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SqliteStore:
+    SCHEMA = ""
+
+    def __init__(self, path: str = MEMORY):
+        self.path = path
+        if path != MEMORY:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != MEMORY:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+
+    def _call(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            try:
+                result = fn(self._conn, *args)
+                self._conn.commit()
+                return result
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        """`fn(conn, *args)` をワーカースレッドで1トランザクションとして実行する"""
+        return await asyncio.to_thread(self._call, fn, *args)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
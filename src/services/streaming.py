@@ -0,0 +1,44 @@
+"""ローカルファイルを base64 エンコードしながら送る JSON リクエストボディ
+
+Printify の画像アップロードは {"file_name": ..., "contents": "<base64>"} 形式の
+JSON しか受け付けないため、ファイルを3の倍数バイトずつ読み、チャンクごとに
+base64 化してストリーミングする。ファイルサイズにかかわらずメモリ使用量は
+チャンク1つ分に収まる。
+"""
+
+import asyncio
+import base64
+import json
+import math
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+READ_CHUNK = 3 * 64 * 1024  # 3の倍数にするとチャンク境界でパディングが入らない
+
+
+class Base64FileBody:
+    """`fields` に base64 化したファイルを `key` として加えた JSON を生成する
+
+    反復するたびにファイルを先頭から読み直すので、リトライ時も再利用できる。
+    """
+
+    def __init__(self, path: Path, fields: dict, key: str, chunk_size: int = READ_CHUNK):
+        if chunk_size % 3:
+            raise ValueError("chunk_size must be a multiple of 3")
+        self.path = path
+        self.chunk_size = chunk_size
+        head = json.dumps(fields)[:-1]  # 末尾の "}" を外す
+        separator = ", " if fields else ""
+        self._prefix = f'{head}{separator}"{key}": "'.encode()
+        self._suffix = b'"}'
+        self._size = path.stat().st_size
+
+    def __len__(self) -> int:
+        return len(self._prefix) + 4 * math.ceil(self._size / 3) + len(self._suffix)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self._prefix
+        with open(self.path, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, self.chunk_size):
+                yield base64.b64encode(chunk)
+        yield self._suffix
@@ -0,0 +1,83 @@
+"""OpenTelemetry によるトレース（任意。`otel` extra が必要）
+
+`OTEL_EXPORTER`（"otlp" または "console"）を設定したときだけ有効になる。OTLP の送信先は
+OpenTelemetry 標準の環境変数（`OTEL_EXPORTER_OTLP_ENDPOINT` など）で指定する。
+無効なとき、または OpenTelemetry がインストールされていないときは `span()` は何もしない。
+
+スパンの構成:
+- `tool <name>`: `handle_errors` が付いたツール呼び出し
+- `printify.request`: `PrintifyService._request`。その下にリトライの試行ごとの
+  `printify.attempt`、レート制限の待ち時間 `printify.rate_limit_wait`、HTTP 呼び出し
+  `HTTP <method>` が入る
+"""
+
+import contextlib
+import logging
+from collections.abc import Iterator
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "printify-mcp-server"
+EXPORTERS = ("otlp", "console")
+
+_tracer = None
+_provider = None
+
+
+def set_tracer(tracer) -> None:
+    """スパンの送り先を差し替える（None で無効化）"""
+    global _tracer
+    _tracer = tracer
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """現在のスパンの子としてスパンを開始する。トレースが無効なら None を返す"""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def setup_tracing(exporter: str) -> bool:
+    """エクスポーターを設定してトレースを有効にする。終了時は `shutdown_tracing()` を呼ぶ"""
+    if exporter not in EXPORTERS:
+        raise ValueError(f"OTEL_EXPORTER must be one of {', '.join(EXPORTERS)}, got {exporter!r}")
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        if exporter == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            span_exporter = OTLPSpanExporter()
+        else:
+            span_exporter = ConsoleSpanExporter()
+    except ImportError:
+        logger.warning(
+            "OTEL_EXPORTER is set but OpenTelemetry is not installed "
+            "(install the otel extra). Tracing disabled"
+        )
+        return False
+
+    global _provider
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    set_tracer(provider.get_tracer(SERVICE_NAME))
+    _provider = provider
+    logger.info(f"Tracing enabled ({exporter} exporter)")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """未送信のスパンを送り切ってトレースを止める"""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+    set_tracer(None)
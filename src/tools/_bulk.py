@@ -0,0 +1,108 @@
+"""複数アイテムを一括処理するツールの共通処理
+
+アイテムは上限付きのワーカープールで並行処理する（送信間隔は PrintifyService の
+レートリミッターが調整する）。1件の失敗で全体を止めず、アイテムごとの結果を返す。
+リトライを使い切っても 429 になったアイテムは、完了済みの結果を保持したまま
+レート制限の回復後に再実行する。
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+
+from src.tools._error_handler import error_response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+MAX_CONCURRENCY = 8
+RATE_LIMIT_ROUNDS = 3  # 429 で失敗したアイテムを再実行する最大回数
+
+
+def _item_error(e: Exception) -> dict:
+    return error_response(e) or {
+        "error": True,
+        "status_code": None,
+        "message": str(e) or type(e).__name__,
+        "details": {},
+    }
+
+
+async def _worker(
+    queue,
+    func: Callable[[Any], Awaitable[Any]],
+    results: list[dict | None],
+    rate_limited: list[tuple[int, Any]] | None,
+) -> None:
+    """共有イテレーター `queue` からアイテムを取り出して処理する。`rate_limited` が
+    None でなければ、429 で失敗したアイテムは結果に書かずにそこへ回す"""
+    for index, item in queue:
+        try:
+            results[index] = {"index": index, "result": await func(item)}
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429 and rate_limited is not None:
+                rate_limited.append((index, item))
+            else:
+                results[index] = {"index": index, "error": _item_error(e)}
+        except Exception as e:
+            results[index] = {"index": index, "error": _item_error(e)}
+
+
+async def run_bulk(
+    items: list,
+    func: Callable[[Any], Awaitable[Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[dict]:
+    """各アイテムに `func` を適用し、入力順に {"index", "result"} か {"index", "error"} を返す"""
+    results: list[dict | None] = [None] * len(items)
+    pending = list(enumerate(items))
+
+    for round_ in range(RATE_LIMIT_ROUNDS + 1):
+        # 最終ラウンドでは 429 もそのままエラーとして返す
+        rate_limited = [] if round_ < RATE_LIMIT_ROUNDS else None
+        queue = iter(pending)
+        workers = max(1, min(concurrency, MAX_CONCURRENCY, len(pending)))
+        await asyncio.gather(
+            *(_worker(queue, func, results, rate_limited) for _ in range(workers))
+        )
+        if not rate_limited:
+            break
+        # レートリミッターが Retry-After 分の待ちを入れているので、そのまま再実行する
+        logger.warning(
+            f"Bulk: {len(rate_limited)} items rate limited, resuming (round {round_ + 1})"
+        )
+        pending = sorted(rate_limited)
+
+    return results
+
+
+def summarize(results: list[dict], compact: Callable[[Any], dict]) -> dict:
+    """run_bulk の結果を件数サマリーとアイテムごとのコンパクトな結果にまとめる"""
+    failed = sum(1 for r in results if "error" in r)
+    return {
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": [
+            {"index": r["index"], "error": r["error"]}
+            if "error" in r
+            else {"index": r["index"], **compact(r["result"])}
+            for r in results
+        ],
+    }
+
+
+def report(results: list[dict], keys: list, key_name: str) -> dict:
+    """run_bulk の結果を件数と失敗したアイテムだけのレポートにまとめる"""
+    failures = [
+        {key_name: keys[r["index"]], "error": r["error"]} for r in results if "error" in r
+    ]
+    return {
+        "total": len(results),
+        "succeeded": len(results) - len(failures),
+        "failed": len(failures),
+        "failures": failures,
+    }
@@ -1,33 +1,59 @@
 import functools
+import time
 
 import httpx
 
+from src.services.metrics import TOOL_CALLS, TOOL_DURATION
+from src.services.tracing import span
+
+
+def error_response(e: Exception) -> dict | None:
+    """例外を構造化エラーレスポンスに変換する。対象外の例外なら None を返す"""
+    if isinstance(e, httpx.HTTPStatusError):
+        details = {}
+        content_type = e.response.headers.get("content-type", "")
+        if content_type.startswith("application/json"):
+            try:
+                details = e.response.json()
+            except Exception:
+                pass
+        return {
+            "error": True,
+            "status_code": e.response.status_code,
+            "message": str(e),
+            "details": details,
+        }
+    if isinstance(e, ValueError):
+        return {
+            "error": True,
+            "status_code": 400,
+            "message": str(e),
+            "details": {},
+        }
+    return None
+
 
 def handle_errors(func):
+    """ツールの例外を構造化エラーに変換し、呼び出し回数とレイテンシを記録する（トレースが
+    有効ならツール呼び出し全体をスパンにする）"""
+    tool = func.__name__
+
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
-        try:
-            return await func(*args, **kwargs)
-        except httpx.HTTPStatusError as e:
-            details = {}
-            content_type = e.response.headers.get("content-type", "")
-            if content_type.startswith("application/json"):
-                try:
-                    details = e.response.json()
-                except Exception:
-                    pass
-            return {
-                "error": True,
-                "status_code": e.response.status_code,
-                "message": str(e),
-                "details": details,
-            }
-        except ValueError as e:
-            return {
-                "error": True,
-                "status_code": 400,
-                "message": str(e),
-                "details": {},
-            }
+        outcome = "exception"
+        started = time.perf_counter()
+        with span(f"tool {tool}", **{"mcp.tool.name": tool}) as current:
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            except (httpx.HTTPStatusError, ValueError) as e:
+                outcome = "error"
+                return error_response(e)
+            finally:
+                TOOL_DURATION.observe(time.perf_counter() - started, tool=tool)
+                TOOL_CALLS.inc(tool=tool, outcome=outcome)
+                if current is not None:
+                    current.set_attribute("mcp.tool.outcome", outcome)
 
     return wrapper
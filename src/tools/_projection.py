@@ -0,0 +1,159 @@
+"""ツールのレスポンスを指定フィールドだけに絞り込む（フィールド射影）
+
+`fields` はドット区切りのパス（例: "variants.price"）のリスト。リストの要素には
+同じパスが要素ごとに適用される。`fields` を省略すると各ツールのコンパクトな
+デフォルトビューを使い、`["*"]` を指定すると Printify のレスポンスをそのまま返す。
+
+ツールには `@projected(VIEW)` を `handle_errors` の内側に付けて `fields` 引数を追加する。
+"""
+
+import functools
+import inspect
+from typing import Any
+
+ALL_FIELDS = "*"
+
+PRODUCT_VIEW = [
+    "id",
+    "title",
+    "tags",
+    "blueprint_id",
+    "print_provider_id",
+    "visible",
+    "is_locked",
+    "external",
+    "created_at",
+    "updated_at",
+    "variants.id",
+    "variants.title",
+    "variants.price",
+    "variants.is_enabled",
+    "images.src",
+    "images.is_default",
+]
+
+PRODUCT_LIST_VIEW = [
+    "id",
+    "title",
+    "blueprint_id",
+    "print_provider_id",
+    "visible",
+    "is_locked",
+    "external.id",
+    "updated_at",
+]
+
+ORDER_VIEW = [
+    "id",
+    "status",
+    "created_at",
+    "sent_to_production_at",
+    "fulfilled_at",
+    "total_price",
+    "total_shipping",
+    "total_tax",
+    "address_to.country",
+    "line_items.product_id",
+    "line_items.variant_id",
+    "line_items.quantity",
+    "line_items.status",
+    "line_items.metadata.title",
+    "line_items.metadata.sku",
+    "shipments",
+]
+
+ORDER_LIST_VIEW = [
+    "id",
+    "status",
+    "created_at",
+    "total_price",
+    "line_items.product_id",
+    "line_items.quantity",
+    "line_items.metadata.sku",
+]
+
+BLUEPRINT_LIST_VIEW = ["id", "title", "brand", "model"]
+
+# 元々レスポンス全体を返していたツールのデフォルト（絞り込みは fields で指定する）
+FULL_VIEW = [ALL_FIELDS]
+
+VARIANTS_VIEW = [
+    "id",
+    "title",
+    "variants.id",
+    "variants.title",
+    "variants.options",
+    "variants.placeholders.position",
+]
+
+# ページ付きレスポンスでそのまま残すキー
+_PAGE_KEYS = ("current_page", "last_page", "per_page", "total", "count", "truncated")
+
+
+def _tree(fields: list[str]) -> dict:
+    """パスのリストをネストした辞書にする。値が None の葉はその値全体を残す"""
+    tree: dict = {}
+    for field in fields:
+        node = tree
+        parts = field.split(".")
+        for i, part in enumerate(parts):
+            if part in node and node[part] is None:
+                break
+            if i == len(parts) - 1:
+                node[part] = None
+            else:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def _apply(value: Any, tree: dict | None) -> Any:
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_apply(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: _apply(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+def project(data: Any, fields: list[str] | None, default: list[str]) -> Any:
+    """`data` を `fields`（省略時は `default`）に射影した新しい値を返す"""
+    fields = fields or default
+    if ALL_FIELDS in fields:
+        return data
+    return _apply(data, _tree(fields))
+
+
+def project_page(page: dict, fields: list[str] | None, default: list[str]) -> dict:
+    """ページ付きレスポンス（{"data": [...], "current_page": ...}）の各アイテムを射影する"""
+    if fields and ALL_FIELDS in fields:
+        return page
+    result = {k: page[k] for k in _PAGE_KEYS if k in page}
+    result["data"] = project(page.get("data", []), fields, default)
+    return result
+
+
+def projected(default: list[str], page: bool = False):
+    """ツールに `fields` 引数を追加し、戻り値を射影するデコレーター
+
+    `page=True` ならページ付きレスポンスとして `project_page` で射影する。
+    エラーレスポンスを射影しないよう、`handle_errors` の内側に置くこと。
+    """
+    apply = project_page if page else project
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, fields: list[str] | None = None, **kwargs):
+            return apply(await func(*args, **kwargs), fields, default)
+
+        # FastMCP はシグネチャからツールの入力スキーマを作るので、fields を見せる
+        signature = inspect.signature(func)
+        fields_param = inspect.Parameter(
+            "fields", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=list[str] | None
+        )
+        wrapper.__signature__ = signature.replace(
+            parameters=[*signature.parameters.values(), fields_param]
+        )
+        return wrapper
+
+    return decorator
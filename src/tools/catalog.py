@@ -1,30 +1,84 @@
 from mcp.server.fastmcp import FastMCP
 
+from src.services.catalog_index import CatalogIndex
 from src.services.printify import PrintifyService
 from src.tools._error_handler import handle_errors
+from src.tools._projection import BLUEPRINT_LIST_VIEW, FULL_VIEW, VARIANTS_VIEW, projected
 
 
-def register(mcp: FastMCP, service: PrintifyService):
+def register(
+    mcp: FastMCP, service: PrintifyService, index: CatalogIndex, indexed: bool = True
+):
+
     @mcp.tool()
     @handle_errors
+    @projected(BLUEPRINT_LIST_VIEW)
     async def list_blueprints() -> list[dict]:
-        """List all available product blueprints (templates) from Printify catalog."""
+        """List all available product blueprints (templates) from Printify catalog.
+
+        Returns id/title/brand/model only by default (the full list is very large); pass
+        'fields' to choose fields, or ["*"] for descriptions and images. Prefer search_catalog
+        to find specific products."""
         return await service.list_blueprints()
 
     @mcp.tool()
     @handle_errors
+    @projected(FULL_VIEW)
     async def get_blueprint(blueprint_id: int) -> dict:
-        """Get details for a specific blueprint including available images and description."""
+        """Get details for a specific blueprint including available images and description.
+
+        Pass 'fields' (e.g. ["id", "title", "images"]) to return only some fields."""
         return await service.get_blueprint(blueprint_id)
 
     @mcp.tool()
     @handle_errors
+    @projected(FULL_VIEW)
     async def get_print_providers(blueprint_id: int) -> list[dict]:
-        """List print providers available for a specific blueprint."""
+        """List print providers available for a specific blueprint.
+
+        Pass 'fields' (e.g. ["id", "title"]) to return only some fields of each provider."""
         return await service.get_print_providers(blueprint_id)
 
     @mcp.tool()
     @handle_errors
+    @projected(VARIANTS_VIEW)
     async def get_variants(blueprint_id: int, provider_id: int) -> dict:
-        """List variants (sizes, colors) for a blueprint and print provider combination."""
+        """List variants (sizes, colors) for a blueprint and print provider combination.
+
+        Returns variant id/title/options and print positions by default; pass
+        fields=["*"] to include placeholder dimensions."""
         return await service.get_variants(blueprint_id, provider_id)
+
+    @mcp.tool()
+    @handle_errors
+    async def search_catalog(
+        query: str | None = None,
+        brand: str | None = None,
+        provider: str | None = None,
+        color: str | None = None,
+        size: str | None = None,
+        location: str | None = None,
+        limit: int = 10,
+    ) -> dict:
+        """Search the local catalog index for blueprint + print provider combinations.
+
+        Much smaller than list_blueprints. 'query' is full-text over title/brand/model/description,
+        'provider' is a provider name or ID, 'location' is the provider's country code or region
+        (e.g. 'US'). Each match lists up to 10 variant IDs matching color/size. The index is built
+        in the background when DATA_DIR is set; check 'pending_blueprints' for coverage."""
+        if not indexed:
+            # DATA_DIR 未設定ではインデックスが作られないため、空の結果ではなく理由を返す
+            raise ValueError(
+                "search_catalog needs the catalog index, which is only built when DATA_DIR is "
+                "set. Use list_blueprints and get_print_providers instead."
+            )
+        results = await index.search(
+            text=query,
+            brand=brand,
+            provider=provider,
+            color=color,
+            size=size,
+            location=location,
+            limit=limit,
+        )
+        return {"results": results, **await index.status()}
@@ -1,6 +1,9 @@
+import time
+
 from mcp.server.fastmcp import FastMCP
 
 from src.services.printify import PrintifyService
+from src.tools._bulk import DEFAULT_CONCURRENCY, run_bulk, summarize
 from src.tools._error_handler import handle_errors
 
 
@@ -8,9 +11,50 @@ def register(mcp: FastMCP, service: PrintifyService):
     @mcp.tool()
     @handle_errors
     async def upload_image(
-        file_name: str, url: str | None = None, contents: str | None = None
+        file_name: str,
+        url: str | None = None,
+        contents: str | None = None,
+        path: str | None = None,
     ) -> dict:
-        """Upload an image to Printify. Provide either a URL or base64-encoded contents."""
+        """Upload an image to Printify. Provide either a URL, base64-encoded contents, or a path.
+
+        'path' is a file in the server's upload staging directory (UPLOAD_DIR); it is streamed to
+        Printify without passing the image through the tool arguments. Prefer it for large files.
+        Images that were already uploaded (same content or URL) return the existing record."""
+        return await service.upload_image(
+            file_name=file_name, url=url, contents=contents, path=path
+        )
+
+    async def upload_one(item: dict) -> dict:
+        if not isinstance(item, dict) or not item.get("file_name"):
+            raise ValueError("Each image needs a file_name")
         return await service.upload_image(
-            file_name=file_name, url=url, contents=contents
+            file_name=item["file_name"],
+            url=item.get("url"),
+            contents=item.get("contents"),
+            path=item.get("path"),
+        )
+
+    @mcp.tool()
+    @handle_errors
+    async def upload_images(images: list[dict], concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+        """Upload many images in one call. Each item is {"file_name", and one of "url", "contents"
+        (base64) or "path"} as in upload_image.
+
+        Uploads run in parallel (at most 'concurrency' at a time, max 8). Results are in input
+        order: {"index", "id", "file_name", "preview_url"} or {"index", "error"}, plus overall
+        elapsed_seconds and images_per_second."""
+        started = time.monotonic()
+        results = await run_bulk(images, upload_one, concurrency=concurrency)
+        elapsed = time.monotonic() - started
+        summary = summarize(
+            results,
+            lambda r: {
+                "id": r.get("id"),
+                "file_name": r.get("file_name"),
+                "preview_url": r.get("preview_url"),
+            },
         )
+        summary["elapsed_seconds"] = round(elapsed, 3)
+        summary["images_per_second"] = round(summary["succeeded"] / elapsed, 2) if elapsed else None
+        return summary
@@ -1,22 +1,50 @@
 from mcp.server.fastmcp import FastMCP
 
+from src.services.order_store import OrderStore
 from src.services.printify import PrintifyService
 from src.tools._error_handler import handle_errors
+from src.tools._projection import ORDER_LIST_VIEW, ORDER_VIEW, projected
 
 
-def register(mcp: FastMCP, service: PrintifyService):
+def register(mcp: FastMCP, service: PrintifyService, store: OrderStore):
     @mcp.tool()
     @handle_errors
-    async def list_orders(
-        page: int = 1, limit: int = 10, shop_id: str | None = None
-    ) -> dict:
-        """List orders in a shop. Supports pagination. If shop_id is omitted, uses the default shop."""
+    @projected(ORDER_LIST_VIEW, page=True)
+    async def list_orders(page: int = 1, limit: int = 10, shop_id: str | None = None) -> dict:
+        """List orders in a shop. Supports pagination. If shop_id is omitted, uses the default shop.
+
+        Returns a compact view of each order; pass 'fields' (dotted paths such as
+        "line_items.metadata.sku") to choose fields, or ["*"] for the full Printify response."""
         return await service.list_orders(page=page, limit=limit, shop_id=shop_id)
 
     @mcp.tool()
     @handle_errors
+    @projected(ORDER_LIST_VIEW, page=True)
+    async def list_all_orders(max_items: int = 100, shop_id: str | None = None) -> dict:
+        """List orders across all pages in one call, up to max_items (newest first).
+
+        Pages are fetched automatically. 'truncated' = true means more orders
+        exist beyond max_items. 'fields' works as in list_orders."""
+        # 1件多く読み、max_items ちょうどで終わったのか続きがあるのかを区別する
+        data = [
+            o async for o in service.iter_orders(shop_id=shop_id, max_items=max_items + 1)
+        ]
+        truncated = len(data) > max_items
+        data = data[:max_items]
+        return {
+            "data": data,
+            "count": len(data),
+            "truncated": truncated,
+        }
+
+    @mcp.tool()
+    @handle_errors
+    @projected(ORDER_VIEW)
     async def get_order(order_id: str, shop_id: str | None = None) -> dict:
-        """Get detailed order information including line items and shipping status."""
+        """Get detailed order information including line items and shipping status.
+
+        Returns a compact view by default; pass 'fields' to choose fields, or ["*"] for the full
+        order (e.g. the complete shipping address)."""
         return await service.get_order(order_id, shop_id=shop_id)
 
     @mcp.tool()
@@ -24,3 +52,71 @@ def register(mcp: FastMCP, service: PrintifyService):
     async def submit_order(order_id: str, shop_id: str | None = None) -> dict:
         """Send an order to production. This action cannot be undone."""
         return await service.submit_order(order_id, shop_id=shop_id)
+
+    @mcp.tool()
+    @handle_errors
+    async def sync_orders(full: bool = False, shop_id: str | None = None) -> dict:
+        """Sync orders from Printify into the local order store used by query_orders/order_stats.
+
+        Runs automatically in the background for the default shop when DATA_DIR is set; call
+        this for other shops or to force a refresh. Incremental by default (new orders plus
+        those from the last 14 days), with a full pass at least once a day so older orders
+        pick up fulfillment and cancellation; full=true re-reads every page now."""
+        return await store.sync(service, shop_id=shop_id, full=full)
+
+    @mcp.tool()
+    @handle_errors
+    async def query_orders(
+        status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        sku: str | None = None,
+        date_field: str = "created_at",
+        limit: int = 50,
+        shop_id: str | None = None,
+    ) -> dict:
+        """Find orders in the local order store (fast, no API paging).
+
+        Filters: status (e.g. 'fulfilled', 'in-production'), since/until (ISO date or datetime,
+        UTC; since inclusive, until exclusive) applied to date_field ('created_at',
+        'sent_to_production_at' or 'fulfilled_at'), and line item sku. Newest first. Check
+        'synced_at' for freshness; call sync_orders if it is stale."""
+        sid = service.resolve_shop_id(shop_id)
+        results = await store.query(
+            sid,
+            status=status,
+            since=since,
+            until=until,
+            sku=sku,
+            date_field=date_field,
+            limit=limit,
+        )
+        return {"data": results, "count": len(results), **await store.status(sid)}
+
+    @mcp.tool()
+    @handle_errors
+    async def order_stats(
+        status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        sku: str | None = None,
+        date_field: str = "created_at",
+        group_by: str | None = None,
+        shop_id: str | None = None,
+    ) -> dict:
+        """Aggregate order counts, item quantities and revenue from the local order store.
+
+        Same filters as query_orders (e.g. orders shipped this week: date_field='fulfilled_at',
+        since=<monday>). Money values are in cents. group_by: 'status', 'day', 'country' or
+        'sku' (per-SKU orders, quantity and line item revenue)."""
+        sid = service.resolve_shop_id(shop_id)
+        result = await store.stats(
+            sid,
+            status=status,
+            since=since,
+            until=until,
+            sku=sku,
+            date_field=date_field,
+            group_by=group_by,
+        )
+        return {**result, **await store.status(sid)}
@@ -1,44 +1,114 @@
 from mcp.server.fastmcp import FastMCP
 
 from src.services.printify import PrintifyService
+from src.services.product_store import ProductStore
+from src.tools._bulk import DEFAULT_CONCURRENCY, report, run_bulk, summarize
 from src.tools._error_handler import handle_errors
+from src.tools._projection import PRODUCT_LIST_VIEW, PRODUCT_VIEW, project, projected
 
 
-def register(mcp: FastMCP, service: PrintifyService):
+def register(mcp: FastMCP, service: PrintifyService, store: ProductStore):
     @mcp.tool()
     @handle_errors
-    async def list_products(
-        page: int = 1, limit: int = 10, shop_id: str | None = None
-    ) -> dict:
+    @projected(PRODUCT_LIST_VIEW, page=True)
+    async def list_products(page: int = 1, limit: int = 10, shop_id: str | None = None) -> dict:
         """List products in a shop. Supports pagination. If shop_id is omitted, uses the default shop.
 
         Note on publish status: There is no 'is_published' field. To determine if a product is published
         to a sales channel, check: (1) 'external' object exists and has an 'id' = listed on the channel,
-        (2) 'visible' = true means the listing is active/visible on the channel."""
+        (2) 'visible' = true means the listing is active/visible on the channel.
+
+        Returns a compact view of each product; pass 'fields' (dotted paths such as
+        "variants.price") to choose fields, or ["*"] for the full Printify response."""
         return await service.list_products(page=page, limit=limit, shop_id=shop_id)
 
     @mcp.tool()
     @handle_errors
-    async def get_product(product_id: str, shop_id: str | None = None) -> dict:
+    @projected(PRODUCT_LIST_VIEW, page=True)
+    async def list_all_products(max_items: int = 100, shop_id: str | None = None) -> dict:
+        """List products across all pages in one call, up to max_items.
+
+        Pages are fetched automatically. 'truncated' = true means more products
+        exist beyond max_items. 'fields' works as in list_products."""
+        # 1件多く読み、max_items ちょうどで終わったのか続きがあるのかを区別する
+        data = [
+            p async for p in service.iter_products(shop_id=shop_id, max_items=max_items + 1)
+        ]
+        truncated = len(data) > max_items
+        data = data[:max_items]
+        return {
+            "data": data,
+            "count": len(data),
+            "truncated": truncated,
+        }
+
+    @mcp.tool()
+    @handle_errors
+    @projected(PRODUCT_VIEW)
+    async def get_product(
+        product_id: str, shop_id: str | None = None, refresh: bool = False
+    ) -> dict:
         """Get detailed product info including mockup image URLs.
 
         Key fields: 'visible' (active on channel), 'external' (sales channel reference with listing id),
-        'is_locked' (locked during publish). A product with 'external.id' is published to the channel."""
-        return await service.get_product(product_id, shop_id=shop_id)
+        'is_locked' (locked during publish). A product with 'external.id' is published to the channel.
+        Reads are cached for up to 5 minutes (locked products are not cached); pass refresh=true to
+        fetch the latest state, e.g. when polling publish status.
+        Returns a compact view by default; pass 'fields' (e.g. ["id", "print_areas"]) to choose
+        fields, or ["*"] for the full product."""
+        return await service.get_product(product_id, shop_id=shop_id, refresh=refresh)
 
     @mcp.tool()
     @handle_errors
+    @projected(PRODUCT_VIEW)
     async def create_product(data: dict, shop_id: str | None = None) -> dict:
-        """Create a new product. Requires title, blueprint_id, print_provider_id, variants, and print_areas."""
+        """Create a new product. Requires title, blueprint_id, print_provider_id, variants, and print_areas.
+
+        Returns the created product in get_product's compact view ('fields' works the same)."""
         return await service.create_product(data, shop_id=shop_id)
 
+    @mcp.tool()
+    @handle_errors
+    async def bulk_create_products(
+        products: list[dict],
+        shop_id: str | None = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> dict:
+        """Create many products in one call. Each item is a create_product 'data' payload.
+
+        Items are created in parallel (at most 'concurrency' at a time, max 8). Failures do not stop
+        the batch: each result is {"index", "id", "title"} or {"index", "error"} in input order."""
+        results = await run_bulk(
+            products,
+            lambda data: service.create_product(data, shop_id=shop_id),
+            concurrency=concurrency,
+        )
+        return summarize(results, lambda p: {"id": p.get("id"), "title": p.get("title")})
+
     @mcp.tool()
     @handle_errors
     async def update_product(
-        product_id: str, data: dict, shop_id: str | None = None
+        product_id: str,
+        data: dict,
+        shop_id: str | None = None,
+        fields: list[str] | None = None,
+        patch: bool = False,
     ) -> dict:
-        """Update an existing product's properties."""
-        return await service.update_product(product_id, data, shop_id=shop_id)
+        """Update an existing product's properties.
+
+        With patch=true, 'data' is compared with the current product and only changed fields
+        are sent (if any variant changed, the full 'variants' list from 'data' is sent, so include
+        every variant); if nothing changed the update is skipped and
+        {"id", "unchanged": true} is returned. Use patch=true when sending a whole edited product.
+        Returns the updated product in get_product's compact view ('fields' works the same)."""
+        # 「変更なし」の応答は射影すると消えてしまうため、@projected を使わず個別に射影する
+        if patch:
+            result = await service.patch_product(product_id, data, shop_id=shop_id)
+            if result is None:
+                return {"id": product_id, "unchanged": True}
+        else:
+            result = await service.update_product(product_id, data, shop_id=shop_id)
+        return project(result, fields, PRODUCT_VIEW)
 
     @mcp.tool()
     @handle_errors
@@ -46,6 +116,24 @@ def register(mcp: FastMCP, service: PrintifyService):
         """Delete a product from the shop."""
         return await service.delete_product(product_id, shop_id=shop_id)
 
+    @mcp.tool()
+    @handle_errors
+    async def bulk_delete_products(
+        product_ids: list[str],
+        shop_id: str | None = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> dict:
+        """Delete many products in one call.
+
+        Runs in parallel (max 8 at a time) and resumes automatically after rate limiting.
+        Returns counts plus the product_id and error of each failure."""
+        results = await run_bulk(
+            product_ids,
+            lambda pid: service.delete_product(pid, shop_id=shop_id),
+            concurrency=concurrency,
+        )
+        return report(results, product_ids, "product_id")
+
     @mcp.tool()
     @handle_errors
     async def publish_product(
@@ -53,3 +141,84 @@ def register(mcp: FastMCP, service: PrintifyService):
     ) -> dict:
         """Publish a product to sales channels. Data should specify which fields to publish (title, description, images, variants, tags)."""
         return await service.publish_product(product_id, data, shop_id=shop_id)
+
+    @mcp.tool()
+    @handle_errors
+    async def bulk_publish_products(
+        product_ids: list[str],
+        data: dict | None = None,
+        shop_id: str | None = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> dict:
+        """Publish many products in one call with the same publish 'data' as publish_product.
+
+        'data' defaults to publishing title, description, images, variants and tags. Runs in
+        parallel (max 8 at a time) and resumes automatically after rate limiting.
+        Returns counts plus the product_id and error of each failure."""
+        publish_data = data or {
+            "title": True,
+            "description": True,
+            "images": True,
+            "variants": True,
+            "tags": True,
+        }
+        results = await run_bulk(
+            product_ids,
+            lambda pid: service.publish_product(pid, publish_data, shop_id=shop_id),
+            concurrency=concurrency,
+        )
+        return report(results, product_ids, "product_id")
+
+    @mcp.tool()
+    @handle_errors
+    async def sync_products(shop_id: str | None = None) -> dict:
+        """Sync products from Printify into the local product store used by query_products.
+
+        Runs automatically in the background for the default shop when DATA_DIR is set; call
+        this for other shops or to force a refresh. Returns how many products were added,
+        updated and removed (a product counts as removed after two syncs without it)."""
+        return await store.sync(service, shop_id=shop_id)
+
+    @mcp.tool()
+    @handle_errors
+    async def query_products(
+        publish_state: str | None = None,
+        blueprint_id: int | None = None,
+        print_provider_id: int | None = None,
+        tag: str | None = None,
+        title: str | None = None,
+        limit: int = 50,
+        shop_id: str | None = None,
+    ) -> dict:
+        """Find products in the local product store (fast, no API paging).
+
+        publish_state is derived from 'external', 'visible' and 'is_locked': 'published' (listed
+        and visible), 'hidden' (listed but not visible), 'publishing' (locked while publishing)
+        or 'unpublished' (no 'external.id'). Also filters by blueprint_id, print_provider_id,
+        exact tag and title substring. Check 'synced_at' for freshness; call sync_products if
+        it is stale."""
+        sid = service.resolve_shop_id(shop_id)
+        results = await store.query(
+            sid,
+            publish_state=publish_state,
+            blueprint_id=blueprint_id,
+            print_provider_id=print_provider_id,
+            tag=tag,
+            title=title,
+            limit=limit,
+        )
+        return {"data": results, "count": len(results), **await store.status(sid)}
+
+    @mcp.tool()
+    @handle_errors
+    async def product_changes(
+        since: float | None = None, limit: int = 50, shop_id: str | None = None
+    ) -> dict:
+        """List product changes detected by product syncs, newest first.
+
+        Each entry has the product_id, the change ('added', 'updated' or 'removed') and, for
+        updates, the top-level fields that changed. 'since' is a UNIX timestamp in seconds
+        (e.g. a previous 'synced_at')."""
+        sid = service.resolve_shop_id(shop_id)
+        results = await store.changes(sid, since=since, limit=limit)
+        return {"data": results, "count": len(results), **await store.status(sid)}
@@ -2,19 +2,25 @@ from mcp.server.fastmcp import FastMCP
 
 from src.services.printify import PrintifyService
 from src.tools._error_handler import handle_errors
+from src.tools._projection import FULL_VIEW, projected
 
 
 def register(mcp: FastMCP, service: PrintifyService):
     @mcp.tool()
     @handle_errors
-    async def list_shops() -> list[dict]:
-        """List all Printify shops in your account."""
-        return await service.list_shops()
+    @projected(FULL_VIEW)
+    async def list_shops(refresh: bool = False) -> list[dict]:
+        """List all Printify shops in your account.
+
+        The list is cached for a few minutes; pass refresh=true after adding a shop.
+        Pass 'fields' (e.g. ["id", "title"]) to return only some fields of each shop."""
+        return await service.list_shops(refresh=refresh)
 
     @mcp.tool()
     @handle_errors
+    @projected(FULL_VIEW)
     async def get_shop(shop_id: str) -> dict | str:
-        """Get details for a specific shop by ID."""
+        """Get details for a specific shop by ID. 'fields' works as in list_shops."""
         result = await service.get_shop(shop_id)
         if result is None:
             return f"Shop {shop_id} not found"
@@ -12,3 +12,109 @@ def printify_api():
 @pytest.fixture
 def service():
     return PrintifyService(api_key="test-key", shop_id="12345")
+
+
+class StandInRedis:
+    """RedisOAuthStorage と RedisSharedState が使うコマンドだけを実装したローカルの代替
+    （redis.asyncio.Redis(decode_responses=True) と同じ戻り値の型。キーの期限は無視する）"""
+
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = str(value)
+        return True
+
+    async def expireat(self, key, when):
+        return key in self.strings
+
+    async def pexpire(self, key, milliseconds):
+        return key in self.strings
+
+    async def getdel(self, key):
+        return self.strings.pop(key, None)
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            for store in (self.strings, self.zsets, self.hashes):
+                removed += store.pop(key, None) is not None
+        return removed
+
+    async def incr(self, key):
+        return await self.incrby(key, 1)
+
+    async def incrby(self, key, amount):
+        value = int(self.strings.get(key, 0)) + amount
+        self.strings[key] = str(value)
+        return value
+
+    async def zadd(self, key, mapping):
+        zset = self.zsets.setdefault(key, {})
+        added = sum(1 for m in mapping if m not in zset)
+        zset.update({m: float(s) for m, s in mapping.items()})
+        return added
+
+    async def zrem(self, key, *members):
+        zset = self.zsets.get(key, {})
+        removed = sum(1 for m in members if zset.pop(m, None) is not None)
+        if not zset:
+            self.zsets.pop(key, None)
+        return removed
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def _sorted(self, key):
+        return sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    async def zrange(self, key, start, end):
+        members = [m for m, _ in self._sorted(key)]
+        return members[start:] if end == -1 else members[start:end + 1]
+
+    async def zrangebyscore(self, key, min, max):
+        low = float(min)
+        high = float(max)
+        return [m for m, s in self._sorted(key) if low <= s <= high]
+
+    async def zremrangebyscore(self, key, min, max):
+        return await self.zrem(key, *await self.zrangebyscore(key, min, max))
+
+    async def zpopmin(self, key, count=1):
+        popped = self._sorted(key)[:count]
+        await self.zrem(key, *(m for m, _ in popped))
+        return popped
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = str(value)
+        return 1
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def hdel(self, key, *fields):
+        h = self.hashes.get(key, {})
+        return sum(1 for f in fields if h.pop(f, None) is not None)
+
+    async def hincrby(self, key, field, amount=1):
+        h = self.hashes.setdefault(key, {})
+        h[field] = str(int(h.get(field, 0)) + amount)
+        return int(h[field])
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def stand_in_redis():
+    return StandInRedis()
@@ -1,18 +1,22 @@
-from starlette.testclient import TestClient
+from contextlib import asynccontextmanager
+
+import pytest
 from starlette.applications import Starlette
 from starlette.responses import JSONResponse
 from starlette.routing import Route
+from starlette.testclient import TestClient
 
 from src.auth import BearerAuthMiddleware
+from src.services.metrics import AUTH_REQUESTS
 
 
-def _make_app(token: str | None):
+def _make_app(token: str | None, tokens: dict[str, str] | None = None):
     async def homepage(request):
         return JSONResponse({"ok": True})
 
     app = Starlette(routes=[Route("/", homepage)])
-    if token:
-        app.add_middleware(BearerAuthMiddleware, token=token)
+    if token or tokens:
+        app.add_middleware(BearerAuthMiddleware, token=token, tokens=tokens)
     return app
 
 
@@ -58,3 +62,44 @@ class TestBearerAuthMiddleware:
         client = TestClient(app)
         resp = client.get("/health")
         assert resp.status_code == 404  # route doesn't exist, but NOT 401
+
+
+class TestRotatingTokens:
+    def test_accepts_every_configured_token(self):
+        client = TestClient(_make_app(None, tokens={"old": "tok-1", "new": "tok-2"}))
+        for token in ("tok-1", "tok-2"):
+            resp = client.get("/", headers={"authorization": f"Bearer {token}"})
+            assert resp.status_code == 200
+        assert client.get("/", headers={"authorization": "Bearer tok-3"}).status_code == 401
+
+    def test_single_token_and_labelled_tokens_combine(self):
+        client = TestClient(_make_app("legacy", tokens={"ci": "tok-ci"}))
+        assert client.get("/", headers={"authorization": "Bearer legacy"}).status_code == 200
+        assert client.get("/", headers={"authorization": "Bearer tok-ci"}).status_code == 200
+
+    def test_records_token_label(self):
+        client = TestClient(_make_app(None, tokens={"laptop-label": "tok-l"}))
+        before = AUTH_REQUESTS.value(token="laptop-label", outcome="ok")
+        rejected = AUTH_REQUESTS.value(token="", outcome="rejected")
+        client.get("/", headers={"authorization": "Bearer tok-l"})
+        client.get("/", headers={"authorization": "Bearer nope"})
+        assert AUTH_REQUESTS.value(token="laptop-label", outcome="ok") == before + 1
+        assert AUTH_REQUESTS.value(token="", outcome="rejected") == rejected + 1
+
+    def test_requires_a_token(self):
+        with pytest.raises(ValueError):
+            BearerAuthMiddleware(app=None)
+
+    def test_lifespan_passes_through(self):
+        started = []
+
+        @asynccontextmanager
+        async def lifespan(app):
+            started.append(True)
+            yield
+
+        app = Starlette(lifespan=lifespan)
+        app.add_middleware(BearerAuthMiddleware, token="secret123")
+        with TestClient(app):
+            pass
+        assert started == [True]
@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import httpx
+import respx
+
+from src.services.printify import PrintifyService
+from src.tools._bulk import report, run_bulk, summarize
+
+API = "https://api.printify.com"
+SHOP_ID = "12345"
+
+
+class TestRunBulk:
+    async def test_results_in_input_order(self):
+        async def work(n):
+            await asyncio.sleep(0.001 * (5 - n))
+            return n * 10
+
+        results = await run_bulk([1, 2, 3, 4], work, concurrency=4)
+        assert [r["result"] for r in results] == [10, 20, 30, 40]
+        assert [r["index"] for r in results] == [0, 1, 2, 3]
+
+    async def test_concurrency_is_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def work(_):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+
+        await run_bulk(list(range(10)), work, concurrency=3)
+        assert peak == 3
+
+    async def test_concurrency_is_capped(self):
+        in_flight = 0
+        peak = 0
+
+        async def work(_):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+
+        await run_bulk(list(range(20)), work, concurrency=100)
+        assert peak == 8
+
+    async def test_partial_failure(self):
+        async def work(n):
+            if n == 2:
+                raise ValueError("bad item")
+            if n == 3:
+                raise RuntimeError()
+            return n
+
+        results = await run_bulk([1, 2, 3], work)
+        assert results[0] == {"index": 0, "result": 1}
+        assert results[1]["error"]["status_code"] == 400
+        assert results[1]["error"]["message"] == "bad item"
+        assert results[2]["error"]["message"] == "RuntimeError"
+
+    async def test_empty_input(self):
+        assert await run_bulk([], lambda x: x) == []
+
+
+class TestSummarize:
+    def test_counts_and_compacts(self):
+        results = [
+            {"index": 0, "result": {"id": "a", "title": "A", "variants": []}},
+            {"index": 1, "error": {"error": True, "status_code": 422}},
+        ]
+        summary = summarize(results, lambda p: {"id": p["id"]})
+        assert summary == {
+            "total": 2,
+            "succeeded": 1,
+            "failed": 1,
+            "results": [
+                {"index": 0, "id": "a"},
+                {"index": 1, "error": {"error": True, "status_code": 422}},
+            ],
+        }
+
+
+class TestBulkCreateProducts:
+    @respx.mock
+    async def test_partial_success_with_http_errors(self, service: PrintifyService):
+        def respond(request):
+            body = json.loads(request.content)
+            if not body.get("title"):
+                return httpx.Response(422, json={"title": ["is required"]})
+            return httpx.Response(200, json={"id": f"prod_{body['title']}", "title": body["title"]})
+
+        route = respx.post(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=respond)
+        results = await run_bulk(
+            [{"title": "a"}, {"title": ""}, {"title": "c"}],
+            lambda data: service.create_product(data),
+        )
+        summary = summarize(results, lambda p: {"id": p["id"]})
+        assert route.call_count == 3
+        assert summary["succeeded"] == 2
+        assert summary["results"][0] == {"index": 0, "id": "prod_a"}
+        assert summary["results"][1]["error"]["details"] == {"title": ["is required"]}
+        assert summary["results"][2] == {"index": 2, "id": "prod_c"}
+
+
+class TestRateLimitResume:
+    async def test_rate_limited_items_are_resumed(self, monkeypatch):
+        monkeypatch.setattr("src.tools._bulk.RATE_LIMIT_ROUNDS", 2)
+        request = httpx.Request("POST", f"{API}/x")
+        attempts: dict[int, int] = {}
+
+        async def work(n):
+            attempts[n] = attempts.get(n, 0) + 1
+            if n == 2 and attempts[n] == 1:
+                response = httpx.Response(429, request=request)
+                raise httpx.HTTPStatusError("429", request=request, response=response)
+            return n
+
+        results = await run_bulk([1, 2, 3], work)
+        assert [r["result"] for r in results] == [1, 2, 3]
+        assert attempts == {1: 1, 2: 2, 3: 1}
+
+    async def test_gives_up_after_max_rounds(self, monkeypatch):
+        monkeypatch.setattr("src.tools._bulk.RATE_LIMIT_ROUNDS", 2)
+        request = httpx.Request("POST", f"{API}/x")
+        calls = 0
+
+        async def work(n):
+            nonlocal calls
+            calls += 1
+            response = httpx.Response(429, request=request)
+            raise httpx.HTTPStatusError("429", request=request, response=response)
+
+        results = await run_bulk([1], work)
+        assert calls == 3
+        assert results[0]["error"]["status_code"] == 429
+
+
+class TestReport:
+    def test_reports_failures_only(self):
+        results = [
+            {"index": 0, "result": {}},
+            {"index": 1, "error": {"error": True, "status_code": 404}},
+        ]
+        assert report(results, ["a", "b"], "product_id") == {
+            "total": 2,
+            "succeeded": 1,
+            "failed": 1,
+            "failures": [{"product_id": "b", "error": {"error": True, "status_code": 404}}],
+        }
+
+
+class TestBulkDeleteProducts:
+    @respx.mock
+    async def test_resumes_after_429(self, service: PrintifyService, monkeypatch):
+        async def noop_sleep(_):
+            pass
+
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", noop_sleep)
+        monkeypatch.setattr("src.services.printify.MAX_RETRIES", 1)
+        route_1 = respx.delete(f"{API}/v1/shops/{SHOP_ID}/products/p1.json")
+        route_1.side_effect = [
+            httpx.Response(429, headers={"Retry-After": "1"}),
+            httpx.Response(204),
+        ]
+        respx.delete(f"{API}/v1/shops/{SHOP_ID}/products/p2.json").mock(
+            return_value=httpx.Response(204)
+        )
+        respx.delete(f"{API}/v1/shops/{SHOP_ID}/products/p3.json").mock(
+            return_value=httpx.Response(404, json={"error": "Not found"})
+        )
+        ids = ["p1", "p2", "p3"]
+        results = await run_bulk(ids, lambda pid: service.delete_product(pid))
+        summary = report(results, ids, "product_id")
+        assert route_1.call_count == 2
+        assert summary["succeeded"] == 2
+        assert summary["failures"][0]["product_id"] == "p3"
+        assert summary["failures"][0]["error"]["status_code"] == 404
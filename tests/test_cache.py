@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+
+from src.services.cache import ConditionalCache, SingleFlight, TTLCache
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": 1}
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        assert calls == 1
+        assert all(r == {"id": 1} for r in results)
+        assert len(flight) == 0
+
+    async def test_exception_propagates_to_all_waiters(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            *(flight.do("k", fail) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_sequential_calls_run_again(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("k", fetch) == 1
+        assert await flight.do("k", fetch) == 2
+
+
+class TestTTLCache:
+    def test_set_and_get(self):
+        cache = TTLCache()
+        cache.set("a", 1, ttl=60)
+        assert cache.get("a") == 1
+        assert "a" in cache
+
+    def test_expired_entry_is_missing(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("src.services.cache.time.monotonic", lambda: now[0])
+        cache = TTLCache()
+        cache.set("a", 1, ttl=10)
+        now[0] += 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    async def test_get_or_fill_counts_hits_and_misses(self):
+        cache = TTLCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return [1, 2]
+
+        assert await cache.get_or_fill("k", 60, fetch) == [1, 2]
+        assert await cache.get_or_fill("k", 60, fetch) == [1, 2]
+        assert calls == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    async def test_get_or_fill_single_flight(self):
+        cache = TTLCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "v"
+
+        await asyncio.gather(*(cache.get_or_fill("k", 60, fetch) for _ in range(4)))
+        assert calls == 1
+
+    async def test_failed_fill_is_not_cached(self):
+        cache = TTLCache()
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_fill("k", 60, fail)
+        assert "k" not in cache
+
+
+class TestInvalidation:
+    def test_delete_where(self):
+        cache = TTLCache()
+        cache.set(("a", 1), 1, 60)
+        cache.set(("a", 2), 2, 60)
+        cache.set(("b", 1), 3, 60)
+        assert cache.delete_where(lambda k: k[0] == "a") == 2
+        assert ("b", 1) in cache
+        assert ("a", 1) not in cache
+
+    async def test_fill_started_before_invalidation_is_not_cached(self):
+        cache = TTLCache()
+        release = asyncio.Event()
+
+        async def stale():
+            await release.wait()
+            return "stale"
+
+        task = asyncio.create_task(cache.get_or_fill("k", 60, stale))
+        await asyncio.sleep(0)
+        cache.delete("k")
+        release.set()
+        assert await task == "stale"
+        assert "k" not in cache
+
+    async def test_new_callers_do_not_join_invalidated_fill(self):
+        cache = TTLCache()
+        release = asyncio.Event()
+
+        async def stale():
+            await release.wait()
+            return "stale"
+
+        async def fresh():
+            return "fresh"
+
+        task = asyncio.create_task(cache.get_or_fill("k", 60, stale))
+        await asyncio.sleep(0)
+        cache.delete("k")
+        assert await cache.get_or_fill("k", 60, fresh) == "fresh"
+        release.set()
+        await task
+        assert cache.get("k") == "fresh"
+
+
+class TestConditionalCache:
+    def test_validators(self):
+        cache = ConditionalCache()
+        cache.store("k", {"etag": '"abc"', "last-modified": "Wed, 01 Oct 2026 00:00:00 GMT"}, [1])
+        validators, body = cache.get("k")
+        assert validators == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 01 Oct 2026 00:00:00 GMT",
+        }
+        assert cache.revalidate("k", body) == [1]
+        assert cache.revalidated == 1
+
+    def test_revalidate_after_entry_dropped_in_flight(self):
+        # 応答待ちの間に検証子のない 200 で消されても、送信前に受け取った本文を返す
+        cache = ConditionalCache()
+        cache.store("k", {"etag": '"abc"'}, [1])
+        _, body = cache.get("k")
+        cache.store("k", {}, [2])
+        assert cache.revalidate("k", body) == [1]
+
+    def test_response_without_validators_drops_entry(self):
+        cache = ConditionalCache()
+        cache.store("k", {"etag": '"abc"'}, [1])
+        cache.store("k", {}, [2])
+        assert cache.get("k") is None
+
+    def test_bounded(self):
+        cache = ConditionalCache(maxsize=2)
+        for key in ("a", "b", "c"):
+            cache.store(key, {"etag": key}, key)
+        assert len(cache) == 2
+        assert cache.get("a") is None
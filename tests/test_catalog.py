@@ -1,7 +1,12 @@
+import json
+
 import httpx
 import respx
+from mcp.server.fastmcp import FastMCP
 
+from src.services.catalog_index import CatalogIndex
 from src.services.printify import PrintifyService
+from src.tools import catalog
 
 API = "https://api.printify.com"
 
@@ -55,3 +60,61 @@ class TestGetVariants:
         )
         result = await service.get_variants(6, 3)
         assert result["variants"][0]["title"] == "S / White"
+
+
+class TestCatalogCache:
+    @respx.mock
+    async def test_repeated_variants_calls_hit_cache(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/catalog/blueprints/6/print_providers/3/variants.json").mock(
+            return_value=httpx.Response(200, json={"id": 3, "variants": []})
+        )
+        await service.get_variants(6, 3)
+        await service.get_variants(6, 3)
+        assert route.call_count == 1
+        assert service.cache.stats()["hits"] == 1
+
+    @respx.mock
+    async def test_different_keys_are_cached_separately(self, service: PrintifyService):
+        route6 = respx.get(f"{API}/v1/catalog/blueprints/6.json").mock(
+            return_value=httpx.Response(200, json={"id": 6})
+        )
+        route7 = respx.get(f"{API}/v1/catalog/blueprints/7.json").mock(
+            return_value=httpx.Response(200, json={"id": 7})
+        )
+        assert (await service.get_blueprint(6))["id"] == 6
+        assert (await service.get_blueprint(7))["id"] == 7
+        assert route6.call_count == 1
+        assert route7.call_count == 1
+
+    @respx.mock
+    async def test_errors_are_not_cached(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/catalog/blueprints.json")
+        route.side_effect = [
+            httpx.Response(500),
+            httpx.Response(200, json=[{"id": 6}]),
+        ]
+        try:
+            await service.list_blueprints()
+            assert False, "Should have raised"
+        except httpx.HTTPStatusError:
+            pass
+        assert await service.list_blueprints() == [{"id": 6}]
+        assert route.call_count == 2
+
+
+class TestSearchCatalogTool:
+    async def _search(self, service: PrintifyService, indexed: bool) -> dict:
+        mcp = FastMCP("test")
+        catalog.register(mcp, service, CatalogIndex(), indexed=indexed)
+        content = await mcp.call_tool("search_catalog", {"query": "tee"})
+        return json.loads(content[0].text)
+
+    async def test_without_data_dir_explains_missing_index(self, service: PrintifyService):
+        result = await self._search(service, indexed=False)
+        assert result["error"] is True
+        assert "DATA_DIR" in result["message"]
+
+    async def test_with_index_returns_results(self, service: PrintifyService):
+        result = await self._search(service, indexed=True)
+        assert result["results"] == []
+        assert "pending_blueprints" in result
@@ -0,0 +1,166 @@
+import httpx
+import pytest
+import respx
+
+from src.services.catalog_index import CatalogIndex, _fts_query
+from src.services.printify import PrintifyService
+
+API = "https://api.printify.com"
+
+BLUEPRINTS = [
+    {
+        "id": 6,
+        "title": "Unisex Heavy Cotton Tee",
+        "brand": "Gildan",
+        "model": "5000",
+        "description": "<p>Classic <b>cotton</b> tee</p>",
+    },
+    {"id": 12, "title": "Ceramic Mug 11oz", "brand": "Generic", "model": "", "description": ""},
+]
+
+
+def _variants(provider_id: int, colors: list[str], sizes: list[str]) -> dict:
+    return {
+        "id": provider_id,
+        "variants": [
+            {
+                "id": provider_id * 1000 + i,
+                "title": f"{c} / {s}",
+                "options": {"color": c, "size": s},
+            }
+            for i, (c, s) in enumerate((c, s) for c in colors for s in sizes)
+        ],
+    }
+
+
+@pytest.fixture
+def catalog_api():
+    with respx.mock(base_url=API) as mock:
+        mock.get("/v1/catalog/blueprints.json").mock(
+            return_value=httpx.Response(200, json=BLUEPRINTS)
+        )
+        mock.get("/v1/catalog/blueprints/6/print_providers.json").mock(
+            return_value=httpx.Response(
+                200, json=[{"id": 3, "title": "DJ"}, {"id": 29, "title": "Monster Digital"}]
+            )
+        )
+        mock.get("/v1/catalog/blueprints/12/print_providers.json").mock(
+            return_value=httpx.Response(200, json=[{"id": 3, "title": "DJ"}])
+        )
+        mock.get("/v1/catalog/print_providers/3.json", name="provider_3").mock(
+            return_value=httpx.Response(200, json={
+                "id": 3,
+                "title": "DJ",
+                "location": {"country": "US", "region": "IL", "city": "Chicago"},
+            })
+        )
+        mock.get("/v1/catalog/print_providers/29.json").mock(
+            return_value=httpx.Response(200, json={
+                "id": 29, "title": "Monster Digital", "location": {"country": "LV", "region": ""},
+            })
+        )
+        mock.get("/v1/catalog/blueprints/6/print_providers/3/variants.json").mock(
+            return_value=httpx.Response(200, json=_variants(3, ["Black", "White"], ["M", "XL"]))
+        )
+        mock.get("/v1/catalog/blueprints/6/print_providers/29/variants.json").mock(
+            return_value=httpx.Response(200, json=_variants(29, ["White"], ["M", "2XL"]))
+        )
+        mock.get("/v1/catalog/blueprints/12/print_providers/3/variants.json").mock(
+            return_value=httpx.Response(200, json=_variants(3, ["White"], ["11oz"]))
+        )
+        yield mock
+
+
+@pytest.fixture
+async def index(catalog_api, service: PrintifyService):
+    idx = CatalogIndex()
+    await idx.refresh(service, batch_size=10)
+    yield idx
+    idx.close()
+
+
+class TestFtsQuery:
+    def test_quotes_words_with_prefix_match(self):
+        assert _fts_query("heavy cotton") == '"heavy"* "cotton"*'
+
+    def test_strips_fts_syntax(self):
+        assert _fts_query('tee" OR (x') == '"tee"* "OR"* "x"*'
+
+    def test_empty_text(self):
+        assert _fts_query("  -- ") is None
+
+
+class TestRefresh:
+    async def test_refresh_is_incremental(self, catalog_api, service: PrintifyService):
+        idx = CatalogIndex()
+        result = await idx.refresh(service, batch_size=1)
+        assert result["indexed"] == 1
+        assert result["pending_blueprints"] == 1
+        result = await idx.refresh(service, batch_size=1)
+        assert result["indexed"] == 1
+        assert result["pending_blueprints"] == 0
+        result = await idx.refresh(service, batch_size=1)
+        assert result["indexed"] == 0
+
+    async def test_provider_detail_fetched_once(self, index, catalog_api):
+        assert catalog_api["provider_3"].call_count == 1
+
+    async def test_crawl_bypasses_response_cache(self, index, service):
+        # ブループリント一覧以外は巡回でキャッシュに入らない
+        assert len(service.cache) == 1
+
+    async def test_removed_blueprints_are_dropped(self, index, catalog_api, service):
+        catalog_api.get("/v1/catalog/blueprints.json").mock(
+            return_value=httpx.Response(200, json=BLUEPRINTS[:1])
+        )
+        service.cache.clear()
+        await index.refresh(service)
+        assert (await index.status())["total_blueprints"] == 1
+        assert await index.search(text="mug") == []
+
+    async def test_persists_to_disk(self, catalog_api, service, tmp_path):
+        path = str(tmp_path / "catalog.db")
+        idx = CatalogIndex(path)
+        await idx.refresh(service, batch_size=10)
+        idx.close()
+        reopened = CatalogIndex(path)
+        assert (await reopened.status())["indexed_blueprints"] == 2
+        reopened.close()
+
+
+class TestSearch:
+    async def test_text_search(self, index):
+        results = await index.search(text="heavy cotton")
+        assert {r["blueprint_id"] for r in results} == {6}
+        assert {r["provider_id"] for r in results} == {3, 29}
+
+    async def test_text_search_matches_description_without_html(self, index):
+        results = await index.search(text="classic")
+        assert results[0]["blueprint_id"] == 6
+
+    async def test_color_and_size_filter(self, index):
+        results = await index.search(text="tee", color="black", size="xl")
+        assert len(results) == 1
+        match = results[0]
+        assert match["provider_id"] == 3
+        assert match["variants"] == [{"id": 3001, "title": "Black / XL"}]
+
+    async def test_size_is_exact(self, index):
+        results = await index.search(size="XL")
+        assert {r["provider_id"] for r in results} == {3}
+
+    async def test_brand_and_provider_filter(self, index):
+        results = await index.search(brand="gildan", provider="monster")
+        assert [(r["blueprint_id"], r["provider_id"]) for r in results] == [(6, 29)]
+
+    async def test_provider_id_filter(self, index):
+        results = await index.search(provider="3")
+        assert {r["blueprint_id"] for r in results} == {6, 12}
+
+    async def test_location_filter(self, index):
+        results = await index.search(location="US")
+        assert {r["provider_id"] for r in results} == {3}
+        assert results[0]["location"] == "IL, US"
+
+    async def test_limit(self, index):
+        assert len(await index.search(limit=1)) == 1
@@ -0,0 +1,44 @@
+from src.services.diff import diff_product
+
+CURRENT = {
+    "id": "prod_1",
+    "title": "T-Shirt",
+    "tags": ["a", "b"],
+    "variants": [
+        {"id": 1, "price": 2000, "is_enabled": True},
+        {"id": 2, "price": 2100, "is_enabled": True},
+    ],
+}
+
+
+class TestDiffProduct:
+    def test_no_changes(self):
+        assert diff_product(CURRENT, dict(CURRENT)) == {}
+
+    def test_changed_scalar(self):
+        assert diff_product(CURRENT, {**CURRENT, "title": "New"}) == {"title": "New"}
+
+    def test_new_field(self):
+        assert diff_product(CURRENT, {"description": "x"}) == {"description": "x"}
+
+    def test_changed_plain_list_is_sent_whole(self):
+        assert diff_product(CURRENT, {"tags": ["a"]}) == {"tags": ["a"]}
+
+    def test_any_changed_variant_sends_every_variant(self):
+        # Printify は variants を送るときに全バリアントを要求する
+        desired = {
+            "title": "T-Shirt",
+            "variants": [
+                {"id": 1, "price": 2500, "is_enabled": True},
+                {"id": 2, "price": 2100, "is_enabled": True},
+            ],
+        }
+        assert diff_product(CURRENT, desired) == {"variants": desired["variants"]}
+
+    def test_unknown_variant_is_sent_whole(self):
+        desired = {"variants": [{"id": 3, "price": 100, "is_enabled": True}]}
+        assert diff_product(CURRENT, desired) == desired
+
+    def test_unchanged_variants_are_omitted(self):
+        desired = {"title": "T-Shirt", "variants": [{"id": 2, "price": 2100}]}
+        assert diff_product(CURRENT, desired) == {}
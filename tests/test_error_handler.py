@@ -1,5 +1,7 @@
 import httpx
+import pytest
 
+from src.services.metrics import TOOL_CALLS, TOOL_DURATION
 from src.tools._error_handler import handle_errors
 
 
@@ -68,3 +70,24 @@ class TestHandleErrors:
         assert result["error"] is True
         assert result["status_code"] == 400
         assert "shop_id" in result["message"]
+
+
+class TestToolMetrics:
+    async def test_records_outcomes_and_latency(self):
+        @handle_errors
+        async def metered_tool(fail: str | None = None):
+            if fail == "value":
+                raise ValueError("bad")
+            if fail == "crash":
+                raise RuntimeError("boom")
+            return {}
+
+        await metered_tool()
+        await metered_tool(fail="value")
+        with pytest.raises(RuntimeError):
+            await metered_tool(fail="crash")
+
+        assert TOOL_CALLS.value(tool="metered_tool", outcome="ok") == 1
+        assert TOOL_CALLS.value(tool="metered_tool", outcome="error") == 1
+        assert TOOL_CALLS.value(tool="metered_tool", outcome="exception") == 1
+        assert TOOL_DURATION.count(tool="metered_tool") == 3
@@ -0,0 +1,58 @@
+import base64
+import hashlib
+
+from src.services.image_index import (
+    ImageIndex,
+    contents_digest,
+    image_key,
+    normalize_url,
+)
+
+
+class TestNormalizeUrl:
+    def test_case_port_fragment_and_query_order(self):
+        assert normalize_url("HTTPS://Example.COM:443/a.png?b=2&a=1#x") == (
+            "https://example.com/a.png?a=1&b=2"
+        )
+
+    def test_keeps_path_case_and_custom_port(self):
+        assert normalize_url("http://example.com:8080/A.png") == "http://example.com:8080/A.png"
+
+
+class TestContentsDigest:
+    def test_hashes_decoded_bytes(self):
+        raw = bytes(range(256)) * 5000
+        encoded = base64.b64encode(raw).decode()
+        assert contents_digest(encoded) == hashlib.sha256(raw).hexdigest()
+
+    def test_ignores_line_breaks(self):
+        raw = b"x" * 1000
+        encoded = base64.b64encode(raw).decode()
+        wrapped = "\n".join(encoded[i:i + 76] for i in range(0, len(encoded), 76))
+        assert contents_digest(wrapped) == contents_digest(encoded)
+
+    def test_invalid_base64_falls_back_to_string_hash(self):
+        assert contents_digest("not base64!") == contents_digest("not base64!")
+
+
+class TestImageKey:
+    def test_url_key(self):
+        assert image_key(url="https://a.com/x.png") == "url:https://a.com/x.png"
+
+    def test_contents_key(self):
+        assert image_key(contents=base64.b64encode(b"png").decode()).startswith("sha256:")
+
+
+class TestImageIndex:
+    async def test_put_and_get(self):
+        index = ImageIndex()
+        assert await index.get("sha256:abc") is None
+        await index.put("sha256:abc", {"id": "img_1", "file_name": "a.png"})
+        assert await index.get("sha256:abc") == {"id": "img_1", "file_name": "a.png"}
+
+    async def test_persists_to_disk(self, tmp_path):
+        path = str(tmp_path / "images.db")
+        index = ImageIndex(path)
+        await index.put("url:https://a.com/x.png", {"id": "img_1"})
+        index.close()
+        assert await ImageIndex(path).get("url:https://a.com/x.png") == {"id": "img_1"}
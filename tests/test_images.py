@@ -1,7 +1,15 @@
+import asyncio
+import base64
+import json
+
 import httpx
+import pytest
 import respx
+from mcp.server.fastmcp import FastMCP
 
+from src.services.image_index import ImageIndex
 from src.services.printify import PrintifyService
+from src.tools import images
 
 API = "https://api.printify.com"
 
@@ -34,3 +42,177 @@ class TestUploadImage:
             contents="iVBORw0KGgoAAAANS...",
         )
         assert result["id"] == "img_def456"
+
+
+class TestUploadDeduplication:
+    @respx.mock
+    async def test_repeat_contents_upload_returns_existing_record(self):
+        service = PrintifyService(api_key="test-key", image_index=ImageIndex())
+        route = respx.post(f"{API}/v1/uploads/images.json").mock(
+            return_value=httpx.Response(200, json={"id": "img_1", "file_name": "a.png"})
+        )
+        contents = base64.b64encode(b"same image").decode()
+        first = await service.upload_image(file_name="a.png", contents=contents)
+        second = await service.upload_image(file_name="b.png", contents=contents)
+        assert route.call_count == 1
+        assert first == second == {"id": "img_1", "file_name": "a.png"}
+
+    @respx.mock
+    async def test_equivalent_urls_are_deduplicated(self):
+        service = PrintifyService(api_key="test-key", image_index=ImageIndex())
+        route = respx.post(f"{API}/v1/uploads/images.json").mock(
+            return_value=httpx.Response(200, json={"id": "img_1"})
+        )
+        await service.upload_image(file_name="a.png", url="https://Example.com/a.png#x")
+        await service.upload_image(file_name="a.png", url="https://example.com/a.png")
+        assert route.call_count == 1
+
+    @respx.mock
+    async def test_different_contents_are_uploaded(self):
+        service = PrintifyService(api_key="test-key", image_index=ImageIndex())
+        route = respx.post(f"{API}/v1/uploads/images.json").mock(
+            return_value=httpx.Response(200, json={"id": "img_1"})
+        )
+        await service.upload_image(file_name="a.png", contents=base64.b64encode(b"a").decode())
+        await service.upload_image(file_name="b.png", contents=base64.b64encode(b"b").decode())
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_concurrent_identical_uploads_share_one_request(self):
+        async def slow(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"id": "img_1"})
+
+        service = PrintifyService(api_key="test-key", image_index=ImageIndex())
+        route = respx.post(f"{API}/v1/uploads/images.json").mock(side_effect=slow)
+        await asyncio.gather(
+            service.upload_image(file_name="a.png", url="https://example.com/a.png"),
+            service.upload_image(file_name="a.png", url="https://example.com/a.png"),
+        )
+        assert route.call_count == 1
+
+    @respx.mock
+    async def test_failed_upload_is_not_indexed(self):
+        service = PrintifyService(api_key="test-key", image_index=ImageIndex())
+        route = respx.post(f"{API}/v1/uploads/images.json")
+        route.side_effect = [
+            httpx.Response(400, json={"error": "bad image"}),
+            httpx.Response(200, json={"id": "img_1"}),
+        ]
+        try:
+            await service.upload_image(file_name="a.png", url="https://example.com/a.png")
+            assert False, "Should have raised"
+        except httpx.HTTPStatusError:
+            pass
+        result = await service.upload_image(file_name="a.png", url="https://example.com/a.png")
+        assert result == {"id": "img_1"}
+
+
+class TestUploadFromStagedFile:
+    @respx.mock
+    async def test_streams_file_as_base64_json(self, tmp_path):
+        raw = bytes(range(256)) * 1000
+        (tmp_path / "design.png").write_bytes(raw)
+        service = PrintifyService(api_key="test-key", upload_dir=str(tmp_path))
+        route = respx.post(f"{API}/v1/uploads/images.json").mock(
+            return_value=httpx.Response(200, json={"id": "img_1"})
+        )
+        result = await service.upload_image(file_name="design.png", path="design.png")
+        assert result == {"id": "img_1"}
+        request = route.calls.last.request
+        body = json.loads(request.content)
+        assert body["file_name"] == "design.png"
+        assert base64.b64decode(body["contents"]) == raw
+        assert int(request.headers["content-length"]) == len(request.content)
+
+    @respx.mock
+    async def test_file_upload_shares_dedup_key_with_base64_upload(self, tmp_path):
+        raw = b"same image"
+        (tmp_path / "a.png").write_bytes(raw)
+        service = PrintifyService(
+            api_key="test-key", image_index=ImageIndex(), upload_dir=str(tmp_path)
+        )
+        route = respx.post(f"{API}/v1/uploads/images.json").mock(
+            return_value=httpx.Response(200, json={"id": "img_1"})
+        )
+        await service.upload_image(file_name="a.png", contents=base64.b64encode(raw).decode())
+        await service.upload_image(file_name="a.png", path="a.png")
+        assert route.call_count == 1
+
+    async def test_disabled_without_upload_dir(self, service: PrintifyService):
+        with pytest.raises(ValueError, match="UPLOAD_DIR"):
+            await service.upload_image(file_name="a.png", path="a.png")
+
+    async def test_rejects_path_outside_upload_dir(self, tmp_path):
+        staging = tmp_path / "staging"
+        staging.mkdir()
+        (tmp_path / "secret.txt").write_text("secret")
+        service = PrintifyService(api_key="test-key", upload_dir=str(staging))
+        with pytest.raises(ValueError, match="inside the upload directory"):
+            await service.upload_image(file_name="a.png", path="../secret.txt")
+        with pytest.raises(ValueError, match="inside the upload directory"):
+            await service.upload_image(file_name="a.png", path=str(tmp_path / "secret.txt"))
+
+    async def test_missing_file(self, tmp_path):
+        service = PrintifyService(api_key="test-key", upload_dir=str(tmp_path))
+        with pytest.raises(ValueError, match="not found"):
+            await service.upload_image(file_name="a.png", path="missing.png")
+
+
+async def _call_tool(service: PrintifyService, name: str, args: dict) -> dict:
+    mcp = FastMCP("test")
+    images.register(mcp, service)
+    content = await mcp.call_tool(name, args)
+    return json.loads(content[0].text)
+
+
+class TestUploadImages:
+    @respx.mock
+    async def test_results_in_input_order_with_per_item_errors(self, service: PrintifyService):
+        def respond(request):
+            body = json.loads(request.content)
+            if body["url"].endswith("bad.png"):
+                return httpx.Response(400, json={"error": "invalid image"})
+            return httpx.Response(200, json={
+                "id": f"img_{body['file_name']}",
+                "file_name": body["file_name"],
+                "preview_url": "https://images.printify.com/p.png",
+            })
+
+        respx.post(f"{API}/v1/uploads/images.json").mock(side_effect=respond)
+        result = await _call_tool(service, "upload_images", {"images": [
+            {"file_name": "a.png", "url": "https://example.com/a.png"},
+            {"file_name": "b.png", "url": "https://example.com/bad.png"},
+            {"url": "https://example.com/c.png"},
+            {"file_name": "d.png", "url": "https://example.com/d.png"},
+        ]})
+        assert result["total"] == 4
+        assert result["succeeded"] == 2
+        assert [r["index"] for r in result["results"]] == [0, 1, 2, 3]
+        assert result["results"][0]["id"] == "img_a.png"
+        assert result["results"][1]["error"]["status_code"] == 400
+        assert "file_name" in result["results"][2]["error"]["message"]
+        assert result["results"][3]["id"] == "img_d.png"
+        assert result["elapsed_seconds"] >= 0
+        assert "images_per_second" in result
+
+    @respx.mock
+    async def test_uploads_run_in_parallel(self, service: PrintifyService):
+        in_flight = 0
+        peak = 0
+
+        async def respond(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"id": "img"})
+
+        respx.post(f"{API}/v1/uploads/images.json").mock(side_effect=respond)
+        items = [
+            {"file_name": f"{i}.png", "url": f"https://example.com/{i}.png"} for i in range(6)
+        ]
+        result = await _call_tool(service, "upload_images", {"images": items, "concurrency": 3})
+        assert result["succeeded"] == 6
+        assert peak == 3
@@ -0,0 +1,66 @@
+import pytest
+
+from src.services.metrics import Registry, Snapshot, endpoint_label
+
+
+class TestEndpointLabel:
+    def test_replaces_ids(self):
+        assert (
+            endpoint_label("/v1/shops/12345/products/5f3a9c.json")
+            == "/v1/shops/{id}/products/{id}.json"
+        )
+
+    def test_keeps_static_paths(self):
+        assert endpoint_label("/v1/shops.json") == "/v1/shops.json"
+        assert endpoint_label("/v1/uploads/images.json") == "/v1/uploads/images.json"
+
+    def test_nested_catalog_path(self):
+        assert (
+            endpoint_label("/v1/catalog/blueprints/6/print_providers/3/variants.json")
+            == "/v1/catalog/blueprints/{id}/print_providers/{id}/variants.json"
+        )
+
+
+class TestRegistry:
+    def test_counter_renders_labels(self):
+        registry = Registry()
+        calls = registry.counter("calls_total", "Calls", ("tool",))
+        calls.inc(tool="get_shop")
+        calls.inc(2, tool="get_shop")
+        text = registry.render()
+        assert "# TYPE calls_total counter" in text
+        assert 'calls_total{tool="get_shop"} 3.0' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5.0)
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 1.0' in text
+        assert 'latency_seconds_bucket{le="1.0"} 2.0' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3.0' in text
+        assert "latency_seconds_sum 5.55" in text
+        assert "latency_seconds_count 3.0" in text
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.counter("c_total", "C", ("path",)).inc(path='a"b\\c')
+        assert 'c_total{path="a\\"b\\\\c"} 1.0' in registry.render()
+
+    def test_wrong_labels_raise(self):
+        counter = Registry().counter("c_total", "C", ("tool",))
+        with pytest.raises(ValueError):
+            counter.inc(endpoint="/v1/shops.json")
+
+    def test_duplicate_name_raises(self):
+        registry = Registry()
+        registry.counter("c_total", "C")
+        with pytest.raises(ValueError):
+            registry.counter("c_total", "C")
+
+    def test_render_includes_snapshots(self):
+        text = Registry().render(extra=[Snapshot("gauge", "size", "Size", [({}, 4)])])
+        assert "# TYPE size gauge" in text
+        assert "size 4.0" in text
@@ -3,7 +3,8 @@ import time
 import pytest
 from pydantic import AnyUrl
 
-from src.oauth_provider import InMemoryOAuthProvider
+from src.oauth_provider import InMemoryOAuthProvider, _hash
+from src.oauth_storage import MemoryOAuthStorage
 
 from mcp.server.auth.provider import AuthorizationParams
 from mcp.shared.auth import OAuthClientInformationFull
@@ -109,7 +110,8 @@ class TestTokenExchange:
 
         # 有効期限を過去に設定
         from src.oauth_provider import _hash
-        provider._auth_codes[_hash(code)].expires_at = time.time() - 1
+        stored = await provider.storage.get_grant("auth_codes", _hash(code))
+        stored.expires_at = time.time() - 1
 
         ac = await provider.load_authorization_code(client_info, code)
         assert ac is None
@@ -166,3 +168,138 @@ class TestRevocation:
 
         at2 = await provider.load_access_token(token.access_token)
         assert at2 is None
+
+
+async def _issue_tokens(provider, client_info, auth_params):
+    redirect_url = await provider.authorize(client_info, auth_params)
+    code = redirect_url.split("code=")[1].split("&")[0]
+    ac = await provider.load_authorization_code(client_info, code)
+    return await provider.exchange_authorization_code(client_info, ac)
+
+
+def _client(client_id):
+    return OAuthClientInformationFull(
+        client_id=client_id,
+        redirect_uris=[AnyUrl("http://localhost:3000/callback")],
+        token_endpoint_auth_method="none",
+    )
+
+
+class TestSweep:
+    async def test_removes_only_expired_grants(self, provider, client_info, auth_params):
+        await provider.register_client(client_info)
+        await _issue_tokens(provider, client_info, auth_params)
+        await provider.authorize(client_info, auth_params)  # 未使用の認可コード
+
+        assert await provider.sweep() == 0
+        # 認可コード（10分）とアクセストークン（1時間）は期限切れ、リフレッシュトークンは有効
+        assert await provider.sweep(now=time.time() + 7200) == 2
+        stats = await provider.stats()
+        assert (stats["auth_codes"], stats["access_tokens"], stats["refresh_tokens"]) == (0, 0, 1)
+
+    async def test_revoked_tokens_are_skipped(self, provider, client_info, auth_params):
+        await provider.register_client(client_info)
+        token = await _issue_tokens(provider, client_info, auth_params)
+        await provider.revoke_token(await provider.load_access_token(token.access_token))
+        assert await provider.sweep(now=time.time() + 7200) == 0
+
+
+class TestLimits:
+    async def test_oldest_grant_of_client_is_evicted(self, client_info, auth_params):
+        provider = InMemoryOAuthProvider(storage=MemoryOAuthStorage(max_grants_per_client=2))
+        await provider.register_client(client_info)
+        tokens = [await _issue_tokens(provider, client_info, auth_params) for _ in range(3)]
+        assert await provider.load_access_token(tokens[0].access_token) is None
+        assert await provider.load_access_token(tokens[2].access_token) is not None
+        assert (await provider.stats())["access_tokens"] == 2
+
+    async def test_least_recently_used_client_is_evicted(self, auth_params):
+        provider = InMemoryOAuthProvider(storage=MemoryOAuthStorage(max_clients=2))
+        a, b, c = _client("a"), _client("b"), _client("c")
+        await provider.register_client(a)
+        await provider.register_client(b)
+        token = await _issue_tokens(provider, a, auth_params)
+        await provider.get_client("a")
+        await provider.register_client(c)
+
+        assert await provider.get_client("b") is None
+        assert await provider.get_client("a") is not None
+        assert await provider.load_access_token(token.access_token) is not None
+
+    async def test_evicted_client_loses_its_tokens(self, auth_params):
+        provider = InMemoryOAuthProvider(storage=MemoryOAuthStorage(max_clients=1))
+        a = _client("a")
+        await provider.register_client(a)
+        token = await _issue_tokens(provider, a, auth_params)
+        await provider.register_client(_client("b"))
+        assert await provider.load_access_token(token.access_token) is None
+        assert (await provider.stats())["refresh_tokens"] == 0
+
+
+class TestMemoryAccounting:
+    async def test_bytes_follow_stored_grants(self, provider, client_info, auth_params):
+        await provider.register_client(client_info)
+        assert (await provider.stats())["bytes"] == 0
+        token = await _issue_tokens(provider, client_info, auth_params)
+        assert (await provider.stats())["bytes"] > 0
+        await provider.revoke_token(await provider.load_access_token(token.access_token))
+        await provider.revoke_token(
+            await provider.load_refresh_token(client_info, token.refresh_token)
+        )
+        assert (await provider.stats())["bytes"] == 0
+
+
+class _CountingStorage(MemoryOAuthStorage):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_grant(self, kind, key):
+        self.reads += 1
+        return await super().get_grant(kind, key)
+
+
+class TestAccessTokenCache:
+    async def _setup(self, client_info, auth_params, **kwargs):
+        storage = _CountingStorage()
+        provider = InMemoryOAuthProvider(storage=storage, **kwargs)
+        await provider.register_client(client_info)
+        token = await _issue_tokens(provider, client_info, auth_params)
+        storage.reads = 0
+        return provider, storage, token
+
+    async def test_repeated_loads_skip_storage(self, client_info, auth_params):
+        provider, storage, token = await self._setup(client_info, auth_params)
+        for _ in range(3):
+            at = await provider.load_access_token(token.access_token)
+            assert at.token == token.access_token
+        assert storage.reads == 1
+
+    async def test_revoke_invalidates(self, client_info, auth_params):
+        provider, _, token = await self._setup(client_info, auth_params)
+        at = await provider.load_access_token(token.access_token)
+        await provider.revoke_token(at)
+        assert await provider.load_access_token(token.access_token) is None
+
+    async def test_refresh_rotation_invalidates(self, client_info, auth_params):
+        provider, storage, token = await self._setup(client_info, auth_params)
+        await provider.load_access_token(token.access_token)
+        rt = await provider.load_refresh_token(client_info, token.refresh_token)
+        await provider.exchange_refresh_token(client_info, rt, [])
+        assert len(provider.token_cache) == 0
+        storage.reads = 0
+        assert await provider.load_access_token(token.access_token) is not None
+        assert storage.reads == 1
+
+    async def test_expired_cached_token_is_rejected(self, client_info, auth_params):
+        provider, _, token = await self._setup(client_info, auth_params)
+        at = await provider.load_access_token(token.access_token)
+        at.expires_at = int(time.time()) - 1
+        assert await provider.load_access_token(token.access_token) is None
+        assert await provider.storage.get_grant("access_tokens", _hash(token.access_token)) is None
+
+    async def test_disabled_with_zero_size(self, client_info, auth_params):
+        provider, storage, token = await self._setup(client_info, auth_params, token_cache_size=0)
+        await provider.load_access_token(token.access_token)
+        await provider.load_access_token(token.access_token)
+        assert storage.reads == 2
@@ -0,0 +1,184 @@
+import time
+
+import pytest
+from mcp.server.auth.provider import AccessToken, AuthorizationParams
+from mcp.shared.auth import OAuthClientInformationFull
+from pydantic import AnyUrl
+
+from src.oauth_provider import InMemoryOAuthProvider, _hash
+from src.oauth_storage import (
+    MemoryOAuthStorage,
+    OAuthStorage,
+    RedisOAuthStorage,
+    SqliteOAuthStorage,
+    create_storage,
+)
+
+
+def _make(backend, tmp_path, redis, **limits):
+    if backend == "memory":
+        return MemoryOAuthStorage(**limits)
+    if backend == "sqlite":
+        return SqliteOAuthStorage(str(tmp_path / "oauth.db"), **limits)
+    return RedisOAuthStorage(redis, **limits)
+
+
+BACKENDS = ["memory", "sqlite", "redis"]
+
+
+def _client(client_id):
+    return OAuthClientInformationFull(
+        client_id=client_id,
+        redirect_uris=[AnyUrl("http://localhost:3000/callback")],
+        token_endpoint_auth_method="none",
+    )
+
+
+def _token(client_id, expires_at, token=""):
+    return AccessToken(token=token, client_id=client_id, scopes=[], expires_at=expires_at)
+
+
+@pytest.fixture(params=BACKENDS)
+def make_storage(request, tmp_path, stand_in_redis):
+    return lambda **limits: _make(request.param, tmp_path, stand_in_redis, **limits)
+
+
+class TestStorageContract:
+    async def test_client_roundtrip(self, make_storage):
+        storage = make_storage()
+        assert await storage.put_client(_client("a")) == []
+        assert (await storage.get_client("a")).client_id == "a"
+        assert await storage.get_client("missing") is None
+
+    async def test_least_recently_used_client_is_evicted_with_grants(self, make_storage):
+        storage = make_storage(max_clients=2)
+        await storage.put_client(_client("a"))
+        await storage.put_client(_client("b"))
+        await storage.put_grant("access_tokens", "kb", _token("b", int(time.time()) + 60))
+        await storage.get_client("a")
+        assert await storage.put_client(_client("c")) == ["b"]
+        assert await storage.get_client("b") is None
+        assert await storage.get_grant("access_tokens", "kb") is None
+
+    async def test_grant_is_popped_once(self, make_storage):
+        storage = make_storage()
+        await storage.put_grant("access_tokens", "k1", _token("a", int(time.time()) + 60))
+        assert (await storage.get_grant("access_tokens", "k1")).client_id == "a"
+        assert await storage.get_grant("refresh_tokens", "k1") is None
+        assert (await storage.pop_grant("access_tokens", "k1")) is not None
+        assert await storage.pop_grant("access_tokens", "k1") is None
+
+    async def test_oldest_grant_over_client_limit_is_evicted(self, make_storage):
+        storage = make_storage(max_grants_per_client=2)
+        expires = int(time.time()) + 60
+        assert await storage.put_grant("access_tokens", "k1", _token("a", expires)) == 0
+        await storage.put_grant("access_tokens", "k2", _token("a", expires))
+        await storage.put_grant("access_tokens", "x1", _token("b", expires))
+        assert await storage.put_grant("access_tokens", "k3", _token("a", expires)) == 1
+        assert await storage.get_grant("access_tokens", "k1") is None
+        assert await storage.get_grant("access_tokens", "k3") is not None
+        assert await storage.get_grant("access_tokens", "x1") is not None
+
+    async def test_sweep_removes_expired(self, make_storage):
+        storage = make_storage()
+        now = time.time()
+        await storage.put_grant("access_tokens", "old", _token("a", int(now) - 10))
+        await storage.put_grant("access_tokens", "new", _token("a", int(now) + 60))
+        assert await storage.sweep(now) == 1
+        assert await storage.get_grant("access_tokens", "old") is None
+        assert (await storage.stats())["access_tokens"] == 1
+
+    async def test_stats_track_bytes(self, make_storage):
+        storage = make_storage()
+        await storage.put_client(_client("a"))
+        await storage.put_grant("access_tokens", "k1", _token("a", int(time.time()) + 60))
+        stats = await storage.stats()
+        assert (stats["clients"], stats["access_tokens"]) == (1, 1)
+        assert stats["bytes"] > 0
+        await storage.pop_grant("access_tokens", "k1")
+        assert (await storage.stats())["bytes"] == 0
+
+
+class TestProviderWithStorage:
+    @pytest.fixture
+    def auth_params(self):
+        return AuthorizationParams(
+            state="s",
+            scopes=["read"],
+            code_challenge="challenge123",
+            redirect_uri=AnyUrl("http://localhost:3000/callback"),
+            redirect_uri_provided_explicitly=True,
+        )
+
+    async def test_full_flow_stores_only_hashed_secrets(self, make_storage, auth_params):
+        storage = make_storage()
+        provider = InMemoryOAuthProvider(storage=storage)
+        client = _client("c1")
+        await provider.register_client(client)
+        redirect_url = await provider.authorize(client, auth_params)
+        code = redirect_url.split("code=")[1].split("&")[0]
+        ac = await provider.load_authorization_code(client, code)
+        assert ac.code == code
+        token = await provider.exchange_authorization_code(client, ac)
+
+        stored = await storage.get_grant("access_tokens", _hash(token.access_token))
+        assert stored.token == ""
+        at = await provider.load_access_token(token.access_token)
+        assert at.token == token.access_token
+
+    async def test_code_cannot_be_exchanged_twice(self, make_storage, auth_params):
+        from mcp.server.auth.provider import TokenError
+
+        provider = InMemoryOAuthProvider(storage=make_storage())
+        client = _client("c1")
+        await provider.register_client(client)
+        redirect_url = await provider.authorize(client, auth_params)
+        ac = await provider.load_authorization_code(
+            client, redirect_url.split("code=")[1].split("&")[0]
+        )
+        await provider.exchange_authorization_code(client, ac)
+        with pytest.raises(TokenError):
+            await provider.exchange_authorization_code(client, ac)
+
+
+class TestSqlitePersistence:
+    async def test_tokens_survive_reopen(self, tmp_path):
+        path = str(tmp_path / "oauth.db")
+        provider = InMemoryOAuthProvider(storage=SqliteOAuthStorage(path))
+        await provider.register_client(_client("c1"))
+        await provider.storage.put_grant(
+            "access_tokens", _hash("raw"), _token("c1", int(time.time()) + 60)
+        )
+        await provider.storage.close()
+
+        reopened = InMemoryOAuthProvider(storage=SqliteOAuthStorage(path))
+        assert await reopened.get_client("c1") is not None
+        assert (await reopened.load_access_token("raw")).client_id == "c1"
+
+
+class TestInterface:
+    def test_incomplete_backend_fails_when_built(self):
+        class GetOnly(OAuthStorage):
+            async def get_client(self, client_id):
+                return None
+
+        with pytest.raises(TypeError, match="abstract"):
+            GetOnly()
+
+
+class TestCreateStorage:
+    def test_sqlite_requires_data_dir(self):
+        with pytest.raises(ValueError):
+            create_storage("sqlite")
+
+    def test_redis_requires_url(self):
+        with pytest.raises(ValueError):
+            create_storage("redis")
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_storage("postgres")
+
+    def test_sqlite_under_data_dir(self, tmp_path):
+        storage = create_storage("sqlite", data_dir=str(tmp_path))
+        assert storage.path == str(tmp_path / "oauth.db")
@@ -0,0 +1,197 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import respx
+
+from src.services.order_store import OrderStore
+from src.services.printify import PrintifyService
+
+API = "https://api.printify.com"
+SHOP_ID = "12345"
+
+
+def _order(n: int, created: datetime, status: str = "fulfilled", sku: str = "SKU-A") -> dict:
+    return {
+        "id": f"order_{n}",
+        "status": status,
+        "created_at": created.strftime("%Y-%m-%d %H:%M:%S+00:00"),
+        "fulfilled_at": (created + timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S+00:00")
+        if status == "fulfilled"
+        else None,
+        "total_price": 2500,
+        "total_shipping": 400,
+        "total_tax": 0,
+        "address_to": {"country": "US"},
+        "line_items": [
+            {"product_id": "prod_1", "variant_id": 1, "quantity": 2,
+             "metadata": {"sku": sku, "title": "Tee", "price": 1000}},
+        ],
+    }
+
+
+class FakeOrders:
+    """list_orders の新しい順ページングを模したモック"""
+
+    def __init__(self, orders: list[dict], per_page: int = 10):
+        self.orders = sorted(orders, key=lambda o: o["created_at"], reverse=True)
+        self.per_page = per_page
+        self.pages: list[int] = []
+
+    def __call__(self, request):
+        page = int(request.url.params["page"])
+        self.pages.append(page)
+        start = (page - 1) * self.per_page
+        last_page = max(1, -(-len(self.orders) // self.per_page))
+        return httpx.Response(200, json={
+            "current_page": page,
+            "last_page": last_page,
+            "data": self.orders[start:start + self.per_page],
+        })
+
+
+BASE = datetime(2026, 10, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def store():
+    s = OrderStore()
+    yield s
+    s.close()
+
+
+class TestSync:
+    @respx.mock
+    async def test_initial_sync_reads_all_pages(self, store, service: PrintifyService):
+        fake = FakeOrders([_order(i, BASE - timedelta(days=i * 5)) for i in range(25)])
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/orders.json").mock(side_effect=fake)
+        result = await store.sync(service)
+        assert result["fetched"] == 25
+        assert result["orders_stored"] == 25
+        assert result["newest_order_at"] == "2026-10-01 12:00:00"
+        assert sorted(fake.pages) == [1, 2, 3]
+
+    @respx.mock
+    async def test_incremental_sync_stops_before_old_pages(self, store, service):
+        old = [_order(i, BASE - timedelta(days=30 + i)) for i in range(40)]
+        fake = FakeOrders(old)
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/orders.json").mock(side_effect=fake)
+        await store.sync(service)
+
+        new = [_order(100 + i, BASE + timedelta(days=1, hours=i)) for i in range(3)]
+        fake.orders = sorted(new + old, key=lambda o: o["created_at"], reverse=True)
+        fake.pages = []
+        result = await store.sync(service)
+        assert result["orders_stored"] == 43
+        # 新しい3件と再同期ウィンドウ内の注文を含む1ページ目で止まる
+        assert 1 in fake.pages
+        assert 5 not in fake.pages
+        assert result["fetched"] < 20
+
+    @respx.mock
+    async def test_resync_window_updates_changed_status(self, store, service):
+        order = _order(1, BASE, status="in-production")
+        fake = FakeOrders([order])
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/orders.json").mock(side_effect=fake)
+        await store.sync(service)
+        fake.orders = [_order(1, BASE, status="fulfilled")]
+        await store.sync(service)
+        assert (await store.query(SHOP_ID))[0]["status"] == "fulfilled"
+
+    @respx.mock
+    async def test_periodic_full_resync_updates_old_orders(self, store, service):
+        old = _order(1, BASE - timedelta(days=60), status="in-production")
+        recent = [_order(10 + i, BASE - timedelta(hours=i)) for i in range(25)]
+        fake = FakeOrders([old, *recent])
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/orders.json").mock(side_effect=fake)
+        await store.sync(service)
+
+        fake.orders = [*fake.orders[:-1], _order(1, BASE - timedelta(days=60))]
+        result = await store.sync(service)
+        assert result["full"] is False
+        assert (await store.query(SHOP_ID, status="in-production"))[0]["id"] == "order_1"
+
+        store.full_resync_interval = 0
+        result = await store.sync(service)
+        assert result["full"] is True
+        assert await store.query(SHOP_ID, status="in-production") == []
+
+    async def test_requires_shop_id(self, store):
+        with pytest.raises(ValueError):
+            await store.sync(PrintifyService(api_key="test-key"))
+
+
+@pytest.fixture
+async def synced(store, service):
+    orders = [
+        _order(1, datetime(2026, 10, 1, 9), sku="SKU-A"),
+        _order(2, datetime(2026, 10, 2, 9), sku="SKU-B"),
+        _order(3, datetime(2026, 10, 3, 9), status="in-production", sku="SKU-A"),
+        _order(4, datetime(2026, 9, 20, 9), status="canceled", sku="SKU-C"),
+    ]
+    with respx.mock(base_url=API) as mock:
+        mock.get(f"/v1/shops/{SHOP_ID}/orders.json").mock(side_effect=FakeOrders(orders))
+        await store.sync(service)
+    return store
+
+
+class TestQuery:
+    async def test_filter_by_status(self, synced):
+        results = await synced.query(SHOP_ID, status="fulfilled")
+        assert [r["id"] for r in results] == ["order_2", "order_1"]
+
+    async def test_filter_by_date_range(self, synced):
+        results = await synced.query(SHOP_ID, since="2026-10-02", until="2026-10-03")
+        assert [r["id"] for r in results] == ["order_2"]
+
+    async def test_filter_by_fulfilled_at(self, synced):
+        results = await synced.query(SHOP_ID, since="2026-10-04", date_field="fulfilled_at")
+        assert [r["id"] for r in results] == ["order_2"]
+
+    async def test_filter_by_sku(self, synced):
+        results = await synced.query(SHOP_ID, sku="SKU-A")
+        assert [r["id"] for r in results] == ["order_3", "order_1"]
+        assert results[0]["items"] == [{"sku": "SKU-A", "quantity": 2}]
+
+    async def test_other_shop_is_empty(self, synced):
+        assert await synced.query("99999") == []
+
+    async def test_invalid_date(self, synced):
+        with pytest.raises(ValueError, match="since"):
+            await synced.query(SHOP_ID, since="last week")
+
+    async def test_invalid_date_field(self, synced):
+        with pytest.raises(ValueError, match="date_field"):
+            await synced.query(SHOP_ID, date_field="data")
+
+
+class TestStats:
+    async def test_totals(self, synced):
+        result = await synced.stats(SHOP_ID, since="2026-10-01")
+        assert result["orders"] == 3
+        assert result["revenue"] == 7500
+        assert result["shipping"] == 1200
+        assert result["items"] == 6
+
+    async def test_group_by_status(self, synced):
+        result = await synced.stats(SHOP_ID, group_by="status")
+        assert {g["key"]: g["orders"] for g in result["groups"]} == {
+            "canceled": 1,
+            "fulfilled": 2,
+            "in-production": 1,
+        }
+
+    async def test_group_by_day(self, synced):
+        result = await synced.stats(SHOP_ID, since="2026-10-01", group_by="day")
+        assert [g["key"] for g in result["groups"]] == ["2026-10-01", "2026-10-02", "2026-10-03"]
+
+    async def test_group_by_sku(self, synced):
+        result = await synced.stats(SHOP_ID, group_by="sku")
+        groups = {g["key"]: g for g in result["groups"]}
+        assert groups["SKU-A"]["orders"] == 2
+        assert groups["SKU-A"]["items"] == 4
+        assert groups["SKU-A"]["revenue"] == 4000
+
+    async def test_invalid_group_by(self, synced):
+        with pytest.raises(ValueError, match="group_by"):
+            await synced.stats(SHOP_ID, group_by="week")
@@ -42,3 +42,38 @@ class TestSubmitOrder:
         )
         result = await service.submit_order("order_1")
         assert result == {}
+
+    @respx.mock
+    async def test_evicts_cached_order_and_list(self, service: PrintifyService):
+        detail = respx.get(f"{API}/v1/shops/{SHOP_ID}/orders/order_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "order_1", "status": "on-hold"})
+        )
+        listing = respx.get(f"{API}/v1/shops/{SHOP_ID}/orders.json").mock(
+            return_value=httpx.Response(200, json={"data": [{"id": "order_1"}]})
+        )
+        respx.post(f"{API}/v1/shops/{SHOP_ID}/orders/order_1/send_to_production.json").mock(
+            return_value=httpx.Response(200, json={})
+        )
+        await service.get_order("order_1")
+        await service.list_orders()
+        await service.submit_order("order_1")
+        await service.get_order("order_1")
+        await service.list_orders()
+        assert detail.call_count == 2
+        assert listing.call_count == 2
+
+
+class TestIterOrders:
+    @respx.mock
+    async def test_iterates_all_pages(self, service: PrintifyService):
+        def respond(request):
+            page = int(request.url.params["page"])
+            return httpx.Response(200, json={
+                "current_page": page,
+                "last_page": 2,
+                "data": [{"id": f"order_{page}"}],
+            })
+
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/orders.json").mock(side_effect=respond)
+        ids = [o["id"] async for o in service.iter_orders()]
+        assert ids == ["order_1", "order_2"]
@@ -1,6 +1,12 @@
+import asyncio
+
 import httpx
 import respx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
 
+from src.services.metrics import API_REQUESTS, API_RETRIES, RATE_LIMITED
 from src.services.printify import PrintifyService
 
 API = "https://api.printify.com"
@@ -63,7 +69,7 @@ class TestResponseHandling:
         async def noop_sleep(_):
             pass
 
-        monkeypatch.setattr("src.services.printify.asyncio.sleep", noop_sleep)
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", noop_sleep)
 
         respx.get(f"{API}/v1/shops.json").mock(
             return_value=httpx.Response(429, headers={"Retry-After": "0"})
@@ -133,24 +139,67 @@ class TestUploadImageValidation:
 
 class TestProactiveRateLimit:
     @respx.mock
-    async def test_sleeps_when_remaining_below_threshold(self, service: PrintifyService, monkeypatch):
+    async def test_low_remaining_delays_next_request_instead_of_sleeping_reset(
+        self, service: PrintifyService, monkeypatch
+    ):
         sleep_calls = []
 
         async def mock_sleep(seconds):
             sleep_calls.append(seconds)
 
-        monkeypatch.setattr("src.services.printify.asyncio.sleep", mock_sleep)
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
 
         respx.get(f"{API}/v1/shops.json").mock(
             return_value=httpx.Response(
                 200,
                 json=[{"id": 1}],
-                headers={"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "2"},
+                headers={"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "60"},
             )
         )
         result = await service._get("/v1/shops.json")
         assert result == [{"id": 1}]
-        assert sleep_calls == [2.0]
+        assert sleep_calls == []
+
+        await service._get("/v1/shops.json")
+        assert len(sleep_calls) == 1
+        assert 0 < sleep_calls[0] < 1
+
+    @respx.mock
+    async def test_concurrent_calls_are_spread(self, service: PrintifyService, monkeypatch):
+        sleep_calls = []
+
+        async def mock_sleep(seconds):
+            sleep_calls.append(seconds)
+
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
+        service.rate_limiter.buckets["global"].sync(0)
+
+        respx.get(f"{API}/v1/shops.json").mock(
+            return_value=httpx.Response(200, json=[{"id": 1}])
+        )
+        await asyncio.gather(*(service._get("/v1/shops.json", page=i) for i in range(3)))
+        assert len(sleep_calls) == 3
+        assert sleep_calls == sorted(sleep_calls)
+        assert sleep_calls[-1] < 1
+
+    @respx.mock
+    async def test_429_delays_following_requests(self, service: PrintifyService, monkeypatch):
+        sleep_calls = []
+
+        async def mock_sleep(seconds):
+            sleep_calls.append(seconds)
+
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
+
+        route = respx.get(f"{API}/v1/shops.json")
+        route.side_effect = [
+            httpx.Response(429, headers={"Retry-After": "5"}),
+            httpx.Response(200, json=[{"id": 1}]),
+        ]
+        result = await service._get("/v1/shops.json")
+        assert result == [{"id": 1}]
+        assert len(sleep_calls) == 1
+        assert sleep_calls[0] >= 5
 
     @respx.mock
     async def test_no_sleep_when_remaining_above_threshold(self, service: PrintifyService, monkeypatch):
@@ -159,7 +208,7 @@ class TestProactiveRateLimit:
         async def mock_sleep(seconds):
             sleep_calls.append(seconds)
 
-        monkeypatch.setattr("src.services.printify.asyncio.sleep", mock_sleep)
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
 
         respx.get(f"{API}/v1/shops.json").mock(
             return_value=httpx.Response(
@@ -179,7 +228,7 @@ class TestProactiveRateLimit:
         async def mock_sleep(seconds):
             sleep_calls.append(seconds)
 
-        monkeypatch.setattr("src.services.printify.asyncio.sleep", mock_sleep)
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
 
         respx.get(f"{API}/v1/shops.json").mock(
             return_value=httpx.Response(200, json=[{"id": 1}])
@@ -187,3 +236,212 @@ class TestProactiveRateLimit:
         result = await service._get("/v1/shops.json")
         assert result == [{"id": 1}]
         assert sleep_calls == []
+
+
+class TestRequestCoalescing:
+    @respx.mock
+    async def test_identical_concurrent_gets_share_one_request(self, service: PrintifyService):
+        async def slow_response(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"data": [{"id": "prod_1"}]})
+
+        route = respx.get(f"{API}/v1/shops/12345/products.json").mock(side_effect=slow_response)
+        results = await asyncio.gather(
+            service.list_products(page=1, limit=10),
+            service.list_products(limit=10, page=1),
+            service.list_products(page=1, limit=10),
+        )
+        assert route.call_count == 1
+        assert all(r == {"data": [{"id": "prod_1"}]} for r in results)
+
+    @respx.mock
+    async def test_different_params_are_not_coalesced(self, service: PrintifyService):
+        async def slow_response(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"current_page": int(request.url.params["page"])})
+
+        route = respx.get(f"{API}/v1/shops/12345/products.json").mock(side_effect=slow_response)
+        first, second = await asyncio.gather(
+            service.list_products(page=1), service.list_products(page=2)
+        )
+        assert route.call_count == 2
+        assert first["current_page"] == 1
+        assert second["current_page"] == 2
+
+    @respx.mock
+    async def test_sequential_gets_are_not_coalesced(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops/12345/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1"})
+        )
+        # キャッシュを通さない GET は、完了後に同じ GET をしても共有されない
+        await service.get_product("prod_1", cache=False)
+        await service.get_product("prod_1", cache=False)
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_error_is_shared_by_all_waiters(self, service: PrintifyService):
+        async def slow_error(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(404, json={"error": "Not found"})
+
+        route = respx.get(f"{API}/v1/shops/12345/products/missing.json").mock(
+            side_effect=slow_error
+        )
+        results = await asyncio.gather(
+            service.get_product("missing"),
+            service.get_product("missing"),
+            return_exceptions=True,
+        )
+        assert route.call_count == 1
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+
+
+class StandInPrintify:
+    """ETag / Last-Modified を返すローカルの Printify 代替サーバー（ASGI）"""
+
+    def __init__(self, payload, etag: str | None = None, last_modified: str | None = None):
+        self.payload = payload
+        self.etag = etag
+        self.last_modified = last_modified
+        self.full = 0
+        self.not_modified = 0
+        self.app = Starlette(routes=[
+            Route("/v1/catalog/blueprints.json", self.endpoint),
+            Route("/v1/catalog/blueprints/{bp}/print_providers/{pp}/variants.json", self.endpoint),
+        ])
+
+    async def endpoint(self, request):
+        if (self.etag and request.headers.get("if-none-match") == self.etag) or (
+            self.last_modified and request.headers.get("if-modified-since") == self.last_modified
+        ):
+            self.not_modified += 1
+            return Response(status_code=304)
+        self.full += 1
+        headers = {}
+        if self.etag:
+            headers["etag"] = self.etag
+        if self.last_modified:
+            headers["last-modified"] = self.last_modified
+        return JSONResponse(self.payload, headers=headers)
+
+    def service(self) -> PrintifyService:
+        return PrintifyService(api_key="test-key", transport=httpx.ASGITransport(app=self.app))
+
+
+class TestConditionalGet:
+    async def test_etag_revalidation_reuses_body(self):
+        server = StandInPrintify([{"id": 6, "title": "Tee"}], etag='"v1"')
+        service = server.service()
+        first = await service.list_blueprints()
+        service.cache.clear()  # TTL 切れ相当
+        second = await service.list_blueprints()
+        assert second == first
+        assert (server.full, server.not_modified) == (1, 1)
+        assert service.conditional.revalidated == 1
+
+    async def test_last_modified_revalidation(self):
+        server = StandInPrintify(
+            {"id": 6, "variants": []}, last_modified="Wed, 01 Oct 2026 00:00:00 GMT"
+        )
+        service = server.service()
+        await service.get_variants(6, 3)
+        service.cache.clear()
+        assert await service.get_variants(6, 3) == {"id": 6, "variants": []}
+        assert server.not_modified == 1
+
+    async def test_changed_resource_is_downloaded(self):
+        server = StandInPrintify([{"id": 6}], etag='"v1"')
+        service = server.service()
+        await service.list_blueprints()
+        server.payload, server.etag = [{"id": 6}, {"id": 12}], '"v2"'
+        service.cache.clear()
+        assert len(await service.list_blueprints()) == 2
+        assert (server.full, server.not_modified) == (2, 0)
+
+    async def test_responses_without_validators_are_not_kept(self):
+        server = StandInPrintify([{"id": 6}])
+        service = server.service()
+        await service.list_blueprints()
+        assert len(service.conditional) == 0
+
+    async def test_uncached_reads_skip_revalidation(self):
+        server = StandInPrintify({"id": 6, "variants": []}, etag='"v1"')
+        service = server.service()
+        await service.get_variants(6, 3, cache=False)
+        await service.get_variants(6, 3, cache=False)
+        assert len(service.conditional) == 0
+        assert server.full == 2
+
+
+class TestConnectionPool:
+    def test_client_uses_configured_limits_and_timeouts(self):
+        limits = httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=5.0)
+        timeout = httpx.Timeout(connect=1.0, read=2.0, write=3.0, pool=4.0)
+        service = PrintifyService(api_key="k", limits=limits, timeout=timeout)
+        assert service._client.timeout == timeout
+        assert service.pool_stats()["max_connections"] == 4
+        assert service.pool_stats()["max_keepalive_connections"] == 2
+
+    def test_http2_falls_back_without_h2(self, monkeypatch):
+        monkeypatch.setattr("src.services.printify._h2_available", lambda: False)
+        service = PrintifyService(api_key="k", http2=True)
+        assert service.pool_stats()["http_version"] == "HTTP/1.1"
+
+    @respx.mock
+    async def test_tracks_peak_in_flight(self, service: PrintifyService):
+        async def slow_response(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"id": request.url.path})
+
+        respx.get(url__regex=rf"{API}/v1/shops/12345/orders/.*").mock(side_effect=slow_response)
+        await asyncio.gather(*(service.get_order(f"o{i}", cache=False) for i in range(3)))
+        stats = service.pool_stats()
+        assert stats["peak_in_flight"] == 3
+        assert stats["in_flight"] == 0
+
+    @respx.mock
+    async def test_in_flight_released_on_error(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops/12345/orders/o1.json").mock(
+            side_effect=httpx.ConnectError("down")
+        )
+        try:
+            await service.get_order("o1", cache=False)
+        except httpx.ConnectError:
+            pass
+        assert service.in_flight == 0
+
+
+class TestRequestMetrics:
+    @respx.mock
+    async def test_counts_statuses_and_retries_per_endpoint(self, service: PrintifyService):
+        labels = {"method": "GET", "endpoint": "/v1/shops/{id}/orders/{id}.json"}
+        before = (
+            API_REQUESTS.value(**labels, status="429"),
+            API_REQUESTS.value(**labels, status="200"),
+            API_RETRIES.value(**labels),
+            RATE_LIMITED.value(**labels),
+        )
+        respx.get(f"{API}/v1/shops/12345/orders/o9.json").mock(
+            side_effect=[
+                httpx.Response(429, headers={"Retry-After": "0"}),
+                httpx.Response(200, json={"id": "o9"}),
+            ]
+        )
+        await service.get_order("o9", cache=False)
+        after = (
+            API_REQUESTS.value(**labels, status="429"),
+            API_REQUESTS.value(**labels, status="200"),
+            API_RETRIES.value(**labels),
+            RATE_LIMITED.value(**labels),
+        )
+        assert [a - b for a, b in zip(after, before)] == [1, 1, 1, 1]
+
+    async def test_snapshot_reports_cache_and_pool(self, service: PrintifyService):
+        service.cache.hits, service.cache.misses = 3, 1
+        snapshots = {m.name: list(m.samples()) for m in service.metrics()}
+        assert snapshots["printify_cache_hit_ratio"] == [("printify_cache_hit_ratio", {}, 0.75)]
+        assert ("printify_http_max_connections", {}, 20) in snapshots[
+            "printify_http_max_connections"
+        ]
+        buckets = {labels["bucket"] for _, labels, _ in snapshots["printify_rate_limit_tokens"]}
+        assert buckets == {"global", "catalog", "write"}
@@ -0,0 +1,188 @@
+import httpx
+import pytest
+import respx
+
+from src.services.printify import PrintifyService
+from src.services.product_store import ProductStore, publish_state
+
+API = "https://api.printify.com"
+SHOP_ID = "12345"
+
+
+def _product(n: int, blueprint_id: int = 6, provider_id: int = 1, tags=("tee",), **extra):
+    return {
+        "id": f"prod_{n}",
+        "title": f"Product {n}",
+        "blueprint_id": blueprint_id,
+        "print_provider_id": provider_id,
+        "tags": list(tags),
+        "visible": False,
+        "is_locked": False,
+        "created_at": "2026-09-01 10:00:00+00:00",
+        "updated_at": f"2026-09-{n + 1:02d} 10:00:00+00:00",
+        **extra,
+    }
+
+
+class FakeProducts:
+    def __init__(self, products: list[dict], per_page: int = 50):
+        self.products = products
+        self.per_page = per_page
+
+    def __call__(self, request):
+        page = int(request.url.params["page"])
+        start = (page - 1) * self.per_page
+        return httpx.Response(200, json={
+            "current_page": page,
+            "last_page": max(1, -(-len(self.products) // self.per_page)),
+            "data": self.products[start:start + self.per_page],
+        })
+
+
+@pytest.fixture
+def store():
+    s = ProductStore()
+    yield s
+    s.close()
+
+
+class TestPublishState:
+    def test_unpublished(self):
+        assert publish_state({"visible": False}) == "unpublished"
+
+    def test_published(self):
+        assert publish_state({"external": {"id": "ext"}, "visible": True}) == "published"
+
+    def test_hidden(self):
+        assert publish_state({"external": {"id": "ext"}, "visible": False}) == "hidden"
+
+    def test_locked_is_publishing(self):
+        assert publish_state({"is_locked": True, "external": {"id": "ext"}}) == "publishing"
+
+
+class TestSync:
+    @respx.mock
+    async def test_initial_sync(self, store, service: PrintifyService):
+        fake = FakeProducts([_product(i) for i in range(60)])
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=fake)
+        result = await store.sync(service)
+        assert result["added"] == 60
+        assert result["products_stored"] == 60
+        assert result["by_publish_state"] == {"unpublished": 60}
+
+    @respx.mock
+    async def test_initial_sync_records_no_changes(self, store, service):
+        fake = FakeProducts([_product(1), _product(2)])
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=fake)
+        await store.sync(service)
+        assert await store.changes(SHOP_ID) == []
+
+    @respx.mock
+    async def test_detects_changes(self, store, service):
+        fake = FakeProducts([_product(1), _product(2), _product(3)])
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=fake)
+        await store.sync(service)
+
+        fake.products = [
+            _product(1),
+            _product(2, visible=True, external={"id": "ext_2", "handle": "h"}),
+            _product(4),
+        ]
+        result = await store.sync(service)
+        assert (result["added"], result["updated"], result["removed"], result["unchanged"]) == (
+            1, 1, 0, 1,
+        )
+        # 2回続けて一覧になければ削除
+        result = await store.sync(service)
+        assert result["removed"] == 1
+
+        changes = await store.changes(SHOP_ID)
+        assert [(c["product_id"], c["change"]) for c in changes] == [
+            ("prod_3", "removed"),
+            ("prod_4", "added"),
+            ("prod_2", "updated"),
+        ]
+        assert changes[2]["fields"] == ["external", "visible"]
+
+    @respx.mock
+    async def test_product_skipped_once_is_not_removed(self, store, service):
+        products = [_product(1), _product(2), _product(3)]
+        fake = FakeProducts(products)
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=fake)
+        await store.sync(service)
+
+        # ページ境界のずれで1回だけ読み飛ばされた
+        fake.products = products[:2]
+        await store.sync(service)
+        fake.products = products
+        result = await store.sync(service)
+        assert (result["added"], result["removed"]) == (0, 0)
+
+        # 見逃し回数はリセットされている
+        fake.products = products[:2]
+        result = await store.sync(service)
+        assert result["removed"] == 0
+        assert result["products_stored"] == 3
+        assert await store.changes(SHOP_ID) == []
+
+    @respx.mock
+    async def test_failed_sync_does_not_remove(self, store, service):
+        fake = FakeProducts([_product(i) for i in range(3)])
+        route = respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=fake)
+        await store.sync(service)
+        route.mock(return_value=httpx.Response(500))
+        with pytest.raises(httpx.HTTPStatusError):
+            await store.sync(service)
+        assert (await store.status(SHOP_ID))["products_stored"] == 3
+
+
+@pytest.fixture
+async def synced(store, service):
+    products = [
+        _product(1, blueprint_id=6, tags=("tee", "summer")),
+        _product(2, blueprint_id=6, provider_id=2, visible=True, external={"id": "e2"}),
+        _product(3, blueprint_id=12, external={"id": "e3"}),
+        _product(4, blueprint_id=12, is_locked=True, tags=("mug",)),
+    ]
+    with respx.mock(base_url=API) as mock:
+        mock.get(f"/v1/shops/{SHOP_ID}/products.json").mock(side_effect=FakeProducts(products))
+        await store.sync(service)
+    return store
+
+
+class TestQuery:
+    async def test_by_publish_state(self, synced):
+        assert [p["id"] for p in await synced.query(SHOP_ID, publish_state="unpublished")] == [
+            "prod_1"
+        ]
+        published = await synced.query(SHOP_ID, publish_state="published")
+        assert published[0]["id"] == "prod_2"
+        assert published[0]["visible"] is True
+        assert published[0]["external_id"] == "e2"
+
+    async def test_by_blueprint(self, synced):
+        results = await synced.query(SHOP_ID, blueprint_id=6)
+        assert [p["id"] for p in results] == ["prod_2", "prod_1"]
+
+    async def test_by_provider(self, synced):
+        assert [p["id"] for p in await synced.query(SHOP_ID, print_provider_id=2)] == ["prod_2"]
+
+    async def test_by_tag_case_insensitive(self, synced):
+        assert [p["id"] for p in await synced.query(SHOP_ID, tag="SUMMER")] == ["prod_1"]
+
+    async def test_by_title(self, synced):
+        assert [p["id"] for p in await synced.query(SHOP_ID, title="uct 3")] == ["prod_3"]
+
+    async def test_invalid_publish_state(self, synced):
+        with pytest.raises(ValueError, match="publish_state"):
+            await synced.query(SHOP_ID, publish_state="live")
+
+    async def test_status_counts(self, synced):
+        status = await synced.status(SHOP_ID)
+        assert status["by_publish_state"] == {
+            "hidden": 1,
+            "published": 1,
+            "publishing": 1,
+            "unpublished": 1,
+        }
+        assert status["synced_at"] is not None
@@ -1,7 +1,12 @@
+import json
+
 import httpx
 import respx
+from mcp.server.fastmcp import FastMCP
 
 from src.services.printify import PrintifyService
+from src.services.product_store import ProductStore
+from src.tools import products
 
 API = "https://api.printify.com"
 SHOP_ID = "12345"
@@ -120,3 +125,262 @@ class TestProductErrorHandling:
         assert result["error"] is True
         assert result["status_code"] == 400
         assert "shop_id" in result["message"]
+
+
+def _page(page: int, last_page: int, per_page: int = 2) -> dict:
+    start = (page - 1) * per_page
+    return {
+        "current_page": page,
+        "last_page": last_page,
+        "data": [{"id": f"prod_{i}"} for i in range(start, start + per_page)],
+    }
+
+
+class TestIterProducts:
+    @respx.mock
+    async def test_iterates_all_pages_in_order(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(
+            side_effect=lambda request: httpx.Response(
+                200, json=_page(int(request.url.params["page"]), 4)
+            )
+        )
+        ids = [p["id"] async for p in service.iter_products(page_size=2)]
+        assert ids == [f"prod_{i}" for i in range(8)]
+        assert route.call_count == 4
+
+    @respx.mock
+    async def test_max_items_limits_pages_fetched(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(
+            side_effect=lambda request: httpx.Response(
+                200, json=_page(int(request.url.params["page"]), 10)
+            )
+        )
+        ids = [p["id"] async for p in service.iter_products(page_size=2, max_items=3)]
+        assert ids == ["prod_0", "prod_1", "prod_2"]
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_prefetch_is_bounded(self, service: PrintifyService):
+        import asyncio
+
+        in_flight = 0
+        peak = 0
+
+        async def respond(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=_page(int(request.url.params["page"]), 8))
+
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=respond)
+        ids = [p["id"] async for p in service.iter_products(page_size=2)]
+        assert len(ids) == 16
+        assert 1 < peak <= 3
+
+    @respx.mock
+    async def test_single_page_without_last_page(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(
+            return_value=httpx.Response(200, json={"data": [{"id": "prod_1"}]})
+        )
+        ids = [p["id"] async for p in service.iter_products()]
+        assert ids == ["prod_1"]
+
+    @respx.mock
+    async def test_page_error_propagates(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(
+            side_effect=lambda request: (
+                httpx.Response(200, json=_page(1, 3))
+                if request.url.params["page"] == "1"
+                else httpx.Response(500)
+            )
+        )
+        try:
+            _ = [p async for p in service.iter_products(page_size=2)]
+            assert False, "Should have raised"
+        except httpx.HTTPStatusError as e:
+            assert e.response.status_code == 500
+
+
+async def _call_tool(service: PrintifyService, name: str, args: dict) -> dict:
+    mcp = FastMCP("test")
+    products.register(mcp, service, ProductStore())
+    content = await mcp.call_tool(name, args)
+    return json.loads(content[0].text)
+
+
+def _shop_of(total: int):
+    """`limit` に従ってページを返す、商品が `total` 件あるショップ"""
+
+    def respond(request):
+        page = int(request.url.params["page"])
+        limit = int(request.url.params["limit"])
+        start = (page - 1) * limit
+        return httpx.Response(200, json={
+            "current_page": page,
+            "last_page": max(1, -(-total // limit)),
+            "data": [{"id": f"prod_{i}"} for i in range(start, min(start + limit, total))],
+        })
+
+    return respond
+
+
+class TestListAllProducts:
+    @respx.mock
+    async def test_exact_max_items_is_not_truncated(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=_shop_of(4))
+        result = await _call_tool(service, "list_all_products", {"max_items": 4})
+        assert result["count"] == 4
+        assert result["truncated"] is False
+
+    @respx.mock
+    async def test_more_items_is_truncated(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(side_effect=_shop_of(4))
+        result = await _call_tool(service, "list_all_products", {"max_items": 3})
+        assert result["count"] == 3
+        assert result["truncated"] is True
+
+
+class TestPatchProduct:
+    @respx.mock
+    async def test_puts_only_changed_fields(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={
+                "id": "prod_1",
+                "title": "T-Shirt",
+                "variants": [{"id": 1, "price": 2000}, {"id": 2, "price": 2100}],
+            })
+        )
+        put = respx.put(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1", "title": "T-Shirt"})
+        )
+        await service.patch_product("prod_1", {
+            "title": "T-Shirt",
+            "variants": [{"id": 1, "price": 2000}, {"id": 2, "price": 1900}],
+        })
+        # title は変わっていないので送らず、variants は全バリアントを送る
+        assert json.loads(put.calls.last.request.content) == {
+            "variants": [{"id": 1, "price": 2000}, {"id": 2, "price": 1900}]
+        }
+
+    @respx.mock
+    async def test_skips_put_when_unchanged(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1", "title": "T-Shirt"})
+        )
+        put = respx.put(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json")
+        result = await service.patch_product("prod_1", {"title": "T-Shirt"})
+        assert result is None
+        assert put.call_count == 0
+
+
+class TestProductCache:
+    @respx.mock
+    async def test_get_product_is_cached(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1", "title": "Old"})
+        )
+        await service.get_product("prod_1")
+        await service.get_product("prod_1")
+        assert route.call_count == 1
+
+    @respx.mock
+    async def test_locked_product_is_not_cached(self, service: PrintifyService):
+        # パブリッシュ中の状態をキャッシュすると、完了後も5分間ロック中に見えてしまう
+        route = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            side_effect=[
+                httpx.Response(200, json={"id": "prod_1", "is_locked": True}),
+                httpx.Response(200, json={"id": "prod_1", "is_locked": False}),
+            ]
+        )
+        assert (await service.get_product("prod_1"))["is_locked"] is True
+        assert (await service.get_product("prod_1"))["is_locked"] is False
+        await service.get_product("prod_1")
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_refresh_bypasses_and_replaces_cache(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            side_effect=[
+                httpx.Response(200, json={"id": "prod_1", "title": "Old"}),
+                httpx.Response(200, json={"id": "prod_1", "title": "New"}),
+            ]
+        )
+        await service.get_product("prod_1")
+        assert (await service.get_product("prod_1", refresh=True))["title"] == "New"
+        assert (await service.get_product("prod_1"))["title"] == "New"
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_update_refreshes_detail_and_evicts_list(self, service: PrintifyService):
+        detail = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1", "title": "Old"})
+        )
+        listing = respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(
+            return_value=httpx.Response(200, json={"data": [{"id": "prod_1"}]})
+        )
+        respx.put(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1", "title": "New"})
+        )
+        await service.get_product("prod_1")
+        await service.list_products(page=1)
+        await service.list_products(page=2)
+
+        await service.update_product("prod_1", {"title": "New"})
+        assert (await service.get_product("prod_1"))["title"] == "New"
+        assert detail.call_count == 1
+        await service.list_products(page=1)
+        assert listing.call_count == 3
+
+    @respx.mock
+    async def test_delete_evicts_detail(self, service: PrintifyService):
+        detail = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1"})
+        )
+        respx.delete(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={})
+        )
+        await service.get_product("prod_1")
+        await service.delete_product("prod_1")
+        await service.get_product("prod_1")
+        assert detail.call_count == 2
+
+    @respx.mock
+    async def test_publish_evicts_detail(self, service: PrintifyService):
+        detail = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1", "is_locked": False})
+        )
+        respx.post(f"{API}/v1/shops/{SHOP_ID}/products/prod_1/publish.json").mock(
+            return_value=httpx.Response(200, json={})
+        )
+        await service.get_product("prod_1")
+        await service.publish_product("prod_1", {"title": True})
+        await service.get_product("prod_1")
+        assert detail.call_count == 2
+
+    @respx.mock
+    async def test_create_evicts_list_and_caches_detail(self, service: PrintifyService):
+        listing = respx.get(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(
+            return_value=httpx.Response(200, json={"data": []})
+        )
+        respx.post(f"{API}/v1/shops/{SHOP_ID}/products.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_9", "title": "New"})
+        )
+        detail = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_9.json")
+        await service.list_products()
+        await service.create_product({"title": "New"})
+        await service.list_products()
+        assert listing.call_count == 2
+        assert (await service.get_product("prod_9"))["title"] == "New"
+        assert not detail.called
+
+    @respx.mock
+    async def test_patch_compares_against_fresh_product(self, service: PrintifyService):
+        detail = respx.get(f"{API}/v1/shops/{SHOP_ID}/products/prod_1.json").mock(
+            return_value=httpx.Response(200, json={"id": "prod_1", "title": "A"})
+        )
+        await service.get_product("prod_1")
+        detail.mock(return_value=httpx.Response(200, json={"id": "prod_1", "title": "B"}))
+        # キャッシュ上は "A" だが、実際は既に "B" なので更新は不要
+        assert await service.patch_product("prod_1", {"title": "B"}) is None
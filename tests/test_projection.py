@@ -0,0 +1,121 @@
+import json
+
+from mcp.server.fastmcp import FastMCP
+
+from src.tools._error_handler import handle_errors
+from src.tools._projection import FULL_VIEW, PRODUCT_VIEW, _tree, project, project_page, projected
+
+PRODUCT = {
+    "id": "prod_1",
+    "title": "T-Shirt",
+    "description": "<p>long html</p>",
+    "visible": True,
+    "external": {"id": "ext_1", "handle": "https://shop/t-shirt"},
+    "variants": [
+        {"id": 1, "title": "S", "price": 2000, "is_enabled": True, "sku": "A", "cost": 900},
+        {"id": 2, "title": "M", "price": 2100, "is_enabled": False, "sku": "B", "cost": 950},
+    ],
+    "images": [{"src": "https://img/1.png", "is_default": True, "variant_ids": [1, 2]}],
+    "print_areas": [{"variant_ids": [1, 2], "placeholders": []}],
+}
+
+
+class TestTree:
+    def test_nested_paths(self):
+        assert _tree(["id", "variants.price", "variants.id"]) == {
+            "id": None,
+            "variants": {"price": None, "id": None},
+        }
+
+    def test_whole_field_wins_over_subpath(self):
+        assert _tree(["variants.price", "variants"]) == {"variants": None}
+        assert _tree(["variants", "variants.price"]) == {"variants": None}
+
+
+class TestProject:
+    def test_default_view(self):
+        result = project(PRODUCT, None, PRODUCT_VIEW)
+        assert "description" not in result
+        assert "print_areas" not in result
+        assert result["external"] == PRODUCT["external"]
+        assert result["variants"][0] == {"id": 1, "title": "S", "price": 2000, "is_enabled": True}
+        assert result["images"] == [{"src": "https://img/1.png", "is_default": True}]
+
+    def test_explicit_fields(self):
+        result = project(PRODUCT, ["id", "variants.sku"], PRODUCT_VIEW)
+        assert result == {"id": "prod_1", "variants": [{"sku": "A"}, {"sku": "B"}]}
+
+    def test_star_returns_full_response(self):
+        assert project(PRODUCT, ["*"], PRODUCT_VIEW) is PRODUCT
+
+    def test_missing_fields_are_skipped(self):
+        assert project(PRODUCT, ["id", "nope", "external.nope"], []) == {
+            "id": "prod_1",
+            "external": {},
+        }
+
+    def test_does_not_mutate_input(self):
+        project(PRODUCT, ["id"], [])
+        assert "variants" in PRODUCT
+        assert "sku" in PRODUCT["variants"][0]
+
+    def test_list_input(self):
+        assert project([{"id": 1, "x": 2}, {"id": 3}], ["id"], []) == [{"id": 1}, {"id": 3}]
+
+
+class TestProjectPage:
+    def test_keeps_pagination_keys(self):
+        page = {"current_page": 2, "last_page": 5, "total": 50, "data": [PRODUCT], "links": []}
+        result = project_page(page, ["id"], [])
+        assert result == {
+            "current_page": 2,
+            "last_page": 5,
+            "total": 50,
+            "data": [{"id": "prod_1"}],
+        }
+
+    def test_star_returns_full_page(self):
+        page = {"current_page": 1, "data": [PRODUCT]}
+        assert project_page(page, ["*"], ["id"]) is page
+
+
+def _mcp_with_tools() -> FastMCP:
+    mcp = FastMCP("test")
+
+    @mcp.tool()
+    @handle_errors
+    @projected(["id", "title"])
+    async def get_thing(thing_id: str) -> dict:
+        """Get a thing."""
+        return {**PRODUCT, "id": thing_id}
+
+    @mcp.tool()
+    @handle_errors
+    @projected(FULL_VIEW)
+    async def get_missing() -> dict:
+        """Always fails."""
+        raise ValueError("nope")
+
+    return mcp
+
+
+class TestProjectedDecorator:
+    async def test_adds_fields_to_tool_schema(self):
+        tools = {t.name: t for t in await _mcp_with_tools().list_tools()}
+        properties = tools["get_thing"].inputSchema["properties"]
+        assert set(properties) == {"thing_id", "fields"}
+        assert tools["get_thing"].inputSchema["required"] == ["thing_id"]
+
+    async def test_default_view(self):
+        content = await _mcp_with_tools().call_tool("get_thing", {"thing_id": "t1"})
+        assert json.loads(content[0].text) == {"id": "t1", "title": "T-Shirt"}
+
+    async def test_fields_argument(self):
+        content = await _mcp_with_tools().call_tool(
+            "get_thing", {"thing_id": "t1", "fields": ["external.id"]}
+        )
+        assert json.loads(content[0].text) == {"external": {"id": "ext_1"}}
+
+    async def test_errors_are_not_projected(self):
+        content = await _mcp_with_tools().call_tool("get_missing", {"fields": ["id"]})
+        assert json.loads(content[0].text)["message"] == "nope"
@@ -0,0 +1,93 @@
+from src.services.rate_limit import RateLimiter, TokenBucket
+
+
+class TestTokenBucket:
+    def test_reserve_within_capacity_does_not_wait(self):
+        bucket = TokenBucket(10, 1.0)
+        assert all(bucket.reserve() == 0 for _ in range(10))
+
+    def test_reserve_beyond_capacity_spreads_waits(self):
+        bucket = TokenBucket(10, 1.0)
+        for _ in range(10):
+            bucket.reserve()
+        waits = [bucket.reserve() for _ in range(3)]
+        assert waits[0] > 0
+        assert waits[0] < waits[1] < waits[2]
+        assert abs((waits[1] - waits[0]) - 0.1) < 0.01
+
+    def test_sync_lowers_estimate(self):
+        bucket = TokenBucket(100, 60.0)
+        bucket.sync(3)
+        assert bucket.tokens < 4
+
+    def test_sync_raises_estimate_when_not_queued(self):
+        bucket = TokenBucket(100, 60.0)
+        bucket.sync(3)
+        bucket.sync(50)
+        assert 50 <= bucket.tokens < 51
+
+    def test_sync_does_not_raise_estimate_while_queued(self):
+        bucket = TokenBucket(100, 60.0)
+        bucket.sync(-2)
+        bucket.sync(50)
+        assert bucket.tokens < 0
+
+    def test_penalize_blocks_for_seconds(self):
+        bucket = TokenBucket(10, 1.0)
+        bucket.penalize(2.0)
+        assert bucket.reserve() >= 2.0
+
+
+class TestRateLimiter:
+    def test_catalog_get_uses_catalog_budget(self):
+        limiter = RateLimiter()
+        limiter.buckets["catalog"].sync(0)
+        assert limiter.buckets["global"].tokens > 500
+
+        # カタログは待たされるが、カタログ以外の GET は待たない
+        assert max(b.reserve() for b in limiter._buckets_for("GET", "/v1/catalog/x.json")) > 0
+        assert max(b.reserve() for b in limiter._buckets_for("GET", "/v1/shops.json")) == 0
+
+    def test_writes_use_write_budget(self):
+        limiter = RateLimiter()
+        buckets = limiter._buckets_for("POST", "/v1/shops/1/products.json")
+        assert limiter.buckets["write"] in buckets
+        assert limiter.buckets["catalog"] not in buckets
+        for method, path in [
+            ("PUT", "/v1/shops/1/products/abc.json"),
+            ("POST", "/v1/shops/1/products/abc/publish.json"),
+        ]:
+            assert limiter.buckets["write"] in limiter._buckets_for(method, path)
+
+    def test_other_writes_skip_write_budget(self):
+        limiter = RateLimiter()
+        for method, path in [
+            ("POST", "/v1/uploads/images.json"),
+            ("DELETE", "/v1/shops/1/products/abc.json"),
+            ("POST", "/v1/shops/1/orders/o1/send_to_production.json"),
+        ]:
+            assert limiter._buckets_for(method, path) == [limiter.buckets["global"]]
+
+    def test_update_applies_margin(self):
+        limiter = RateLimiter(margin=5)
+        limiter.update({"X-RateLimit-Remaining": "10"})
+        assert limiter.buckets["global"].tokens < 6
+
+    def test_update_ignores_missing_or_invalid_header(self):
+        limiter = RateLimiter()
+        limiter.update({})
+        limiter.update({"X-RateLimit-Remaining": "n/a"})
+        assert limiter.buckets["global"].tokens == 600
+
+    async def test_acquire_sleeps_for_reservation(self, monkeypatch):
+        sleep_calls = []
+
+        async def mock_sleep(seconds):
+            sleep_calls.append(seconds)
+
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
+        limiter = RateLimiter()
+        limiter.penalize("GET", "/v1/shops.json", 1.5)
+        waited = await limiter.acquire("GET", "/v1/shops.json")
+        assert waited >= 1.5
+        assert sleep_calls == [waited]
@@ -2,9 +2,11 @@ import os
 
 os.environ.setdefault("PRINTIFY_API_KEY", "test-key")
 
+import pytest
 from starlette.testclient import TestClient
 
-from src.server import create_app
+from src.server import _create_service_and_mcp, create_app
+from src.services.rate_limit import SharedRateLimiter
 
 
 class TestHealthEndpoint:
@@ -14,3 +16,65 @@ class TestHealthEndpoint:
         resp = client.get("/health")
         assert resp.status_code == 200
         assert resp.json() == {"status": "ok"}
+
+
+class TestMetricsEndpoint:
+    def test_exposes_prometheus_text(self):
+        client = TestClient(create_app())
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert "# TYPE mcp_tool_calls_total counter" in resp.text
+        assert "# TYPE printify_cache_hit_ratio gauge" in resp.text
+
+    def test_oauth_mode_requires_static_token(self, monkeypatch):
+        monkeypatch.setenv("OAUTH_ISSUER_URL", "https://example.com")
+        monkeypatch.setenv("MCP_AUTH_TOKEN", "secret")
+        client = TestClient(create_app())
+        assert client.get("/metrics").status_code == 401
+        resp = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        assert resp.status_code == 200
+        assert "# TYPE mcp_tool_calls_total counter" in resp.text
+
+    def test_oauth_mode_without_static_token_hides_metrics(self, monkeypatch):
+        monkeypatch.setenv("OAUTH_ISSUER_URL", "https://example.com")
+        monkeypatch.delenv("MCP_AUTH_TOKEN", raising=False)
+        client = TestClient(create_app())
+        resp = client.get("/metrics")
+        assert resp.status_code != 200
+        assert "mcp_tool_calls_total" not in resp.text
+
+
+class TestWorkers:
+    def test_multiple_workers_require_shared_store(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("WORKERS", "4")
+        monkeypatch.setenv("DATA_DIR", str(tmp_path))
+        with pytest.raises(ValueError, match="SHARED_STORE"):
+            create_app()
+
+    def test_multiple_workers_require_data_dir_even_with_redis(self, monkeypatch):
+        # ミラーやインデックスはワーカーごとのインメモリになってしまうため
+        monkeypatch.setenv("WORKERS", "4")
+        monkeypatch.setenv("SHARED_STORE", "redis")
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+        monkeypatch.delenv("DATA_DIR", raising=False)
+        with pytest.raises(ValueError, match="DATA_DIR"):
+            create_app()
+
+    def test_multiple_workers_with_oauth_require_shared_tokens(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("WORKERS", "4")
+        monkeypatch.setenv("SHARED_STORE", "sqlite")
+        monkeypatch.setenv("DATA_DIR", str(tmp_path))
+        monkeypatch.setenv("OAUTH_ISSUER_URL", "https://example.com")
+        with pytest.raises(ValueError, match="OAUTH_STORE"):
+            create_app()
+
+    def test_shared_store_runs_jobs_through_leases(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("WORKERS", "4")
+        monkeypatch.setenv("SHARED_STORE", "sqlite")
+        monkeypatch.setenv("DATA_DIR", str(tmp_path))
+        _, service, _, jobs, _ = _create_service_and_mcp()
+        assert isinstance(service.rate_limiter, SharedRateLimiter)
+        assert {j.name for j in jobs} >= {"catalog-index", "shop-registry", "cache-sync"}
+        client = TestClient(create_app())
+        assert client.get("/health").status_code == 200
@@ -0,0 +1,213 @@
+import httpx
+import pytest
+
+from src.services.background import Job
+from src.services.printify import PrintifyService
+from src.services.rate_limit import SharedRateLimiter
+from src.services.shared_state import (
+    RedisSharedState,
+    SharedState,
+    SqliteSharedState,
+    create_shared_state,
+    leader_only,
+    lease_scope,
+)
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_worker(request, tmp_path, clock, stand_in_redis):
+    """同じ共有先につながる「ワーカー」を作る"""
+
+    def make():
+        if request.param == "sqlite":
+            return SqliteSharedState(str(tmp_path / "shared.db"), clock=clock)
+        return RedisSharedState(stand_in_redis, clock=clock)
+
+    return make
+
+
+class TestSlots:
+    async def test_take_within_limit_does_not_wait(self, make_worker):
+        state = make_worker()
+        assert [await state.take("k", 3, 6.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    async def test_take_beyond_limit_waits_for_next_slot(self, make_worker, clock):
+        clock.now = 1001.0  # 区間 [996, 1002) の途中
+        state = make_worker()
+        for _ in range(2):
+            await state.take("k", 2, 6.0)
+        assert await state.take("k", 2, 6.0) == pytest.approx(1.0)
+        assert await state.take("k", 2, 6.0) == pytest.approx(1.0)
+        assert await state.take("k", 2, 6.0) == pytest.approx(7.0)
+
+    async def test_workers_share_the_budget(self, make_worker):
+        a, b = make_worker(), make_worker()
+        assert await a.take("k", 2, 6.0) == 0.0
+        assert await b.take("k", 2, 6.0) == 0.0
+        assert await a.take("k", 2, 6.0) > 0
+        assert await b.take("other", 2, 6.0) == 0.0
+
+    async def test_fill_blocks_every_worker(self, make_worker, clock):
+        a, b = make_worker(), make_worker()
+        await a.fill("k", 5, 6.0, 10.0)
+        assert await b.take("k", 5, 6.0) >= 10.0
+
+
+class TestInvalidations:
+    async def test_poll_returns_other_workers_paths(self, make_worker):
+        a, b = make_worker(), make_worker()
+        cursor = await b.cursor()
+        await a.publish(["/v1/x.json", "/v1/y.json"])
+        cursor, paths = await b.poll(cursor)
+        assert paths == ["/v1/x.json", "/v1/y.json"]
+        assert await b.poll(cursor) == (cursor, [])
+
+    async def test_poll_skips_own_paths_but_advances(self, make_worker):
+        a = make_worker()
+        await a.publish(["/v1/x.json"])
+        cursor, paths = await a.poll(0)
+        assert paths == []
+        assert cursor == await a.cursor() > 0
+
+
+class TestLease:
+    async def test_only_one_worker_holds_the_lease(self, make_worker):
+        a, b = make_worker(), make_worker()
+        assert await a.lease("job", 30)
+        assert not await b.lease("job", 30)
+        assert await a.lease("job", 30)
+
+    async def test_expired_lease_is_taken_over(self, tmp_path, clock):
+        a = SqliteSharedState(str(tmp_path / "shared.db"), clock=clock)
+        b = SqliteSharedState(str(tmp_path / "shared.db"), clock=clock)
+        assert await a.lease("job", 30)
+        clock.now += 31
+        assert await b.lease("job", 30)
+        assert not await a.lease("job", 30)
+
+    async def test_leader_only_runs_on_one_worker(self, make_worker):
+        calls = []
+
+        async def func():
+            calls.append(1)
+
+        job = Job("order-sync", 60, func)
+        for state in (make_worker(), make_worker()):
+            await leader_only(state, job).func()
+        assert calls == [1]
+
+    async def test_leases_are_separate_per_data_dir(self, make_worker, tmp_path):
+        # 別ホスト・別 DATA_DIR のミラーはそれぞれのワーカーが同期する
+        calls = []
+
+        async def func():
+            calls.append(1)
+
+        job = Job("order-sync", 60, func)
+        scopes = [lease_scope(str(tmp_path / "a")), lease_scope(str(tmp_path / "b"))]
+        assert scopes[0] != scopes[1]
+        for state, scope in zip((make_worker(), make_worker()), scopes):
+            await leader_only(state, job, scope).func()
+        assert calls == [1, 1]
+
+
+class TestSharedRateLimiter:
+    async def test_acquire_waits_once_budget_is_spent(self, make_worker, monkeypatch):
+        sleeps = []
+
+        async def mock_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
+        limits = {"global": (4, 60.0)}
+        a = SharedRateLimiter(make_worker(), limits=limits, windows=1)
+        b = SharedRateLimiter(make_worker(), limits=limits, windows=1)
+        for limiter in (a, b):
+            assert await limiter.acquire("GET", "/v1/shops.json") == 0
+            assert await limiter.acquire("GET", "/v1/shops.json") == 0
+        waited = await a.acquire("GET", "/v1/shops.json")
+        assert waited > 0
+        assert sleeps == [waited]
+
+    async def test_penalize_blocks_other_workers(self, make_worker, monkeypatch):
+        async def mock_sleep(seconds):
+            pass
+
+        monkeypatch.setattr("src.services.rate_limit.asyncio.sleep", mock_sleep)
+        a = SharedRateLimiter(make_worker())
+        b = SharedRateLimiter(make_worker())
+        a.penalize("GET", "/v1/shops.json", 5.0)
+        await a.acquire("GET", "/v1/shops.json")
+        assert await b.acquire("GET", "/v1/shops.json") >= 5.0
+
+    async def test_catalog_and_write_limits_apply(self, make_worker):
+        limiter = SharedRateLimiter(make_worker())
+        assert limiter._windows_for("GET", "/v1/catalog/blueprints.json") == ["global", "catalog"]
+        assert limiter._windows_for("POST", "/v1/shops/1/products.json") == ["global", "write"]
+        assert limiter.windows["global"] == (60, 6.0)
+
+
+class TestCacheSync:
+    async def test_write_on_one_worker_invalidates_the_other(self, make_worker, printify_api):
+        path = "/v1/shops/12345/products/p1.json"
+        printify_api.get(path).mock(return_value=httpx.Response(200, json={"id": "p1"}))
+        printify_api.delete(path).mock(return_value=httpx.Response(200, json={}))
+        a = PrintifyService(api_key="k", shop_id="12345", shared=make_worker())
+        b = PrintifyService(api_key="k", shop_id="12345", shared=make_worker())
+        with printify_api:
+            await b.sync_shared()
+            await b.get_product("p1")
+            await a.delete_product("p1")
+            await b.get_product("p1")
+            assert printify_api.calls.call_count == 2  # b はまだキャッシュを返す
+
+            await a.sync_shared()
+            await b.sync_shared()
+            await b.get_product("p1")
+            assert printify_api.calls.call_count == 3
+
+    async def test_without_shared_state_sync_is_a_no_op(self, service):
+        service._invalidate("/v1/x.json")
+        await service.sync_shared()
+        assert service._unpublished == []
+
+
+class TestCreateSharedState:
+    def test_sqlite_requires_data_dir(self):
+        with pytest.raises(ValueError, match="DATA_DIR"):
+            create_shared_state("sqlite")
+
+    def test_redis_requires_url(self):
+        with pytest.raises(ValueError, match="REDIS_URL"):
+            create_shared_state("redis")
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="SHARED_STORE"):
+            create_shared_state("memcached")
+
+    def test_sqlite_under_data_dir(self, tmp_path):
+        state = create_shared_state("sqlite", str(tmp_path))
+        assert state.path == str(tmp_path / "shared.db")
+
+
+class TestInterface:
+    def test_incomplete_backend_fails_when_built(self):
+        class CountersOnly(SharedState):
+            async def _incr(self, key, slot, amount, expires):
+                return amount
+
+        with pytest.raises(TypeError, match="abstract"):
+            CountersOnly()
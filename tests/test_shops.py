@@ -1,4 +1,5 @@
 import httpx
+import pytest
 import respx
 
 from src.services.printify import PrintifyService
@@ -38,3 +39,107 @@ class TestGetShop:
         )
         result = await service.get_shop("99999")
         assert result is None
+
+
+SHOPS = [
+    {"id": 12345, "title": "My Etsy Shop", "sales_channel": "etsy"},
+    {"id": 67890, "title": "Other Shop", "sales_channel": "custom"},
+]
+
+
+class TestShopRegistry:
+    @respx.mock
+    async def test_loads_once(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops.json").mock(
+            return_value=httpx.Response(200, json=SHOPS)
+        )
+        assert (await service.get_shop("12345"))["title"] == "My Etsy Shop"
+        assert (await service.get_shop(67890))["title"] == "Other Shop"
+        assert len(await service.list_shops()) == 2
+        assert route.call_count == 1
+
+    @respx.mock
+    async def test_list_shops_refresh(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops.json").mock(
+            return_value=httpx.Response(200, json=SHOPS)
+        )
+        await service.list_shops()
+        await service.list_shops(refresh=True)
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_refreshes_after_ttl(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops.json").mock(
+            return_value=httpx.Response(200, json=SHOPS)
+        )
+        now = [1000.0]
+        service.shops._clock = lambda: now[0]
+        await service.list_shops()
+        now[0] += service.shops.ttl + 1
+        await service.list_shops()
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_refreshes_on_miss(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops.json").mock(
+            side_effect=[
+                httpx.Response(200, json=SHOPS[:1]),
+                httpx.Response(200, json=SHOPS),
+            ]
+        )
+        now = [1000.0]
+        service.shops._clock = lambda: now[0]
+        await service.list_shops()
+        now[0] += service.shops.miss_refresh_interval
+        assert (await service.get_shop("67890"))["title"] == "Other Shop"
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_miss_refresh_is_throttled(self, service: PrintifyService):
+        route = respx.get(f"{API}/v1/shops.json").mock(
+            return_value=httpx.Response(200, json=SHOPS)
+        )
+        await service.list_shops()
+        assert await service.get_shop("99999") is None
+        assert await service.get_shop("99998") is None
+        assert route.call_count == 1
+
+
+class TestShopIdValidation:
+    @respx.mock
+    async def test_unknown_shop_rejected_without_request(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops.json").mock(return_value=httpx.Response(200, json=SHOPS))
+        products = respx.get(f"{API}/v1/shops/99999/products.json")
+        await service.list_shops()
+        with pytest.raises(ValueError, match="Shop 99999 not found"):
+            await service.list_products(shop_id="99999")
+        assert not products.called
+
+    @respx.mock
+    async def test_known_shop_allowed(self, service: PrintifyService):
+        respx.get(f"{API}/v1/shops.json").mock(return_value=httpx.Response(200, json=SHOPS))
+        respx.get(f"{API}/v1/shops/67890/products.json").mock(
+            return_value=httpx.Response(200, json={"current_page": 1, "data": []})
+        )
+        await service.list_shops()
+        result = await service.list_products(shop_id="67890")
+        assert result["data"] == []
+
+    @respx.mock
+    async def test_unknown_shop_passed_through_once_list_may_be_stale(
+        self, service: PrintifyService
+    ):
+        # 最後の読み込みの後に追加されたショップを TTL いっぱいまで拒否しないように
+        respx.get(f"{API}/v1/shops.json").mock(return_value=httpx.Response(200, json=SHOPS))
+        products = respx.get(f"{API}/v1/shops/99999/products.json").mock(
+            return_value=httpx.Response(200, json={"current_page": 1, "data": []})
+        )
+        now = [1000.0]
+        service.shops._clock = lambda: now[0]
+        await service.list_shops()
+        now[0] += service.shops.miss_refresh_interval
+        await service.list_products(shop_id="99999")
+        assert products.called
+
+    def test_not_validated_before_load(self, service: PrintifyService):
+        assert service.resolve_shop_id("99999") == "99999"
@@ -0,0 +1,43 @@
+import base64
+import json
+
+import pytest
+
+from src.services.streaming import Base64FileBody
+
+
+async def _collect(body) -> list[bytes]:
+    return [chunk async for chunk in body]
+
+
+class TestBase64FileBody:
+    @pytest.mark.parametrize("size", [0, 1, 2, 3, 100, 3 * 1024 + 1])
+    async def test_produces_valid_json_with_exact_length(self, tmp_path, size):
+        path = tmp_path / "design.png"
+        raw = bytes(i % 251 for i in range(size))
+        path.write_bytes(raw)
+        body = Base64FileBody(path, {"file_name": "design.png"}, "contents", chunk_size=3 * 64)
+        data = b"".join(await _collect(body))
+        assert len(data) == len(body)
+        parsed = json.loads(data)
+        assert parsed["file_name"] == "design.png"
+        assert base64.b64decode(parsed["contents"]) == raw
+
+    async def test_chunks_are_bounded(self, tmp_path):
+        path = tmp_path / "big.png"
+        path.write_bytes(b"\x00" * (3 * 1024 * 10))
+        body = Base64FileBody(path, {"file_name": "big.png"}, "contents", chunk_size=3 * 1024)
+        chunks = await _collect(body)
+        assert max(len(c) for c in chunks) == 4 * 1024
+
+    async def test_can_be_iterated_again_for_retries(self, tmp_path):
+        path = tmp_path / "a.png"
+        path.write_bytes(b"abc")
+        body = Base64FileBody(path, {"file_name": "a.png"}, "contents")
+        assert await _collect(body) == await _collect(body)
+
+    def test_rejects_chunk_size_not_multiple_of_three(self, tmp_path):
+        path = tmp_path / "a.png"
+        path.write_bytes(b"abc")
+        with pytest.raises(ValueError):
+            Base64FileBody(path, {}, "contents", chunk_size=1000)
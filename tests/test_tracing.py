@@ -0,0 +1,75 @@
+import httpx
+import pytest
+import respx
+
+from src.services import tracing
+from src.services.printify import PrintifyService
+from src.tools._error_handler import handle_errors
+
+API = "https://api.printify.com"
+
+
+@pytest.fixture
+def spans():
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracing.set_tracer(provider.get_tracer("test"))
+    yield exporter
+    tracing.set_tracer(None)
+
+
+class TestSpan:
+    def test_noop_when_disabled(self):
+        with tracing.span("anything") as current:
+            assert current is None
+
+    def test_unknown_exporter_raises(self):
+        with pytest.raises(ValueError):
+            tracing.setup_tracing("jaeger")
+
+
+class TestRequestSpans:
+    @respx.mock
+    async def test_tool_request_attempts_and_http_calls_are_nested(self, spans):
+        service = PrintifyService(api_key="k", shop_id="12345")
+        respx.get(f"{API}/v1/shops/12345/orders/o1.json").mock(
+            side_effect=[
+                httpx.Response(429, headers={"Retry-After": "0"}),
+                httpx.Response(200, json={"id": "o1"}),
+            ]
+        )
+
+        @handle_errors
+        async def get_order():
+            return await service.get_order("o1", cache=False)
+
+        assert await get_order() == {"id": "o1"}
+
+        finished = spans.get_finished_spans()
+        by_id = {s.context.span_id: s for s in finished}
+
+        def parent_name(s):
+            return by_id[s.parent.span_id].name if s.parent else None
+
+        names = [(s.name, parent_name(s)) for s in finished]
+        assert ("tool get_order", None) in names
+        assert ("printify.request", "tool get_order") in names
+        assert names.count(("printify.attempt", "printify.request")) == 2
+        assert names.count(("printify.rate_limit_wait", "printify.attempt")) == 2
+        http = [s for s in finished if s.name == "HTTP GET"]
+        assert [s.attributes["http.response.status_code"] for s in http] == [429, 200]
+        assert all(s.attributes["url.template"] == "/v1/shops/{id}/orders/{id}.json" for s in http)
+
+    async def test_tool_span_records_error_outcome(self, spans):
+        @handle_errors
+        async def broken():
+            raise ValueError("bad shop")
+
+        await broken()
+        (tool,) = spans.get_finished_spans()
+        assert tool.attributes["mcp.tool.outcome"] == "error"